@@ -0,0 +1,83 @@
+
+# compares import of a package, which modules call smart_imports.all(), with activated package
+#
+# run from the repository root:
+#
+#     python benchmarks/activate.py
+
+import os
+import sys
+import tempfile
+import subprocess
+
+
+MODULES_NUMBER = 500
+
+
+BODY = '''
+def function(x):
+    return json.dumps([math.sqrt(x), os.path.join('a', str(x))])
+'''
+
+
+def create_project(directory, activated):
+    package_path = os.path.join(directory, 'project_{}'.format('activated' if activated else 'explicit'))
+
+    os.makedirs(package_path)
+
+    with open(os.path.join(package_path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    for i in range(MODULES_NUMBER):
+        with open(os.path.join(package_path, 'module_{}.py'.format(i)), 'w') as f:
+            if not activated:
+                f.write('import smart_imports\nsmart_imports.all()\n')
+
+            f.write(BODY)
+
+    return os.path.basename(package_path)
+
+
+def run(directory, package_name, activated):
+    code = ('import time; started_at = time.perf_counter(); '
+            'import smart_imports; '
+            '{activate}'
+            'import importlib; '
+            '[importlib.import_module("{package}.module_{{}}".format(i)) for i in range({number})]; '
+            'print(time.perf_counter() - started_at)').format(activate='smart_imports.activate("{}"); '.format(package_name)
+                                                              if activated else '',
+                                                              package=package_name,
+                                                              number=MODULES_NUMBER)
+
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([directory, os.getcwd()])
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    return float(subprocess.check_output([sys.executable, '-c', code], env=environment, cwd=directory))
+
+
+def main(repeats=7):
+    times = {False: [], True: []}
+
+    with tempfile.TemporaryDirectory() as directory:
+        packages = {activated: create_project(directory, activated) for activated in (False, True)}
+
+        # first runs compile bytecode
+        for activated in (False, True):
+            run(directory, packages[activated], activated)
+
+        for _ in range(repeats):
+            for activated in (False, True):
+                times[activated].append(run(directory, packages[activated], activated))
+
+    explicit_time = min(times[False])
+    activated_time = min(times[True])
+
+    sys.stdout.write('{} modules: smart_imports.all() in every module {:.1f} ms, activated package {:.1f} ms, x{:.2f}\n'.format(MODULES_NUMBER,
+                                                                                                                         explicit_time * 1000,
+                                                                                                                         activated_time * 1000,
+                                                                                                                         explicit_time / activated_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+
+# compares resolving free names of a module one by one (apply_rules) and by batches (apply_rules_many)
+#
+# run from the repository root:
+#
+#     python benchmarks/apply_many.py
+
+import sys
+import types
+import timeit
+import builtins
+
+from smart_imports import rules
+from smart_imports import config
+from smart_imports import importer
+
+
+def get_variables(number):
+    stdlib_names = sorted(name for name in rules.StdLibRule.get_stdlib_modules() if not name.startswith('_'))
+    builtin_names = sorted(name for name in dir(builtins) if not name.startswith('_'))
+    custom_names = ['custom_name_{}'.format(i) for i in range(number)]
+
+    variables = []
+
+    for names in (stdlib_names, builtin_names, custom_names):
+        variables.extend(names[:number // 3])
+
+    return sorted(variables)
+
+
+def main():
+    module = types.ModuleType('benchmark_module')
+
+    for number in (100, 300, 1000):
+        variables = get_variables(number)
+
+        test_config = config.DEFAULT_CONFIG.clone(path='#benchmark.{}'.format(number),
+                                                  rules=[{'type': 'rule_predefined_names'},
+                                                         {'type': 'rule_stdlib'},
+                                                         {'type': 'rule_custom',
+                                                          'variables': {variable: {'module': 'math'}
+                                                                        for variable in variables
+                                                                        if variable.startswith('custom_')}},
+                                                         {'type': 'rule_global_modules'}])
+
+        # warm up lazy structures
+        importer.apply_rules_many(test_config, module, variables)
+
+        def one_by_one():
+            for variable in variables:
+                importer.apply_rules(test_config, module, variable)
+
+        def batch():
+            importer.apply_rules_many(test_config, module, variables)
+
+        repeats = 50
+
+        one_by_one_time = timeit.timeit(one_by_one, number=repeats) / repeats
+        batch_time = timeit.timeit(batch, number=repeats) / repeats
+
+        sys.stdout.write('{} names: apply_rules {:.3f} ms, apply_rules_many {:.3f} ms, x{:.1f}\n'.format(len(variables),
+                                                                                                       one_by_one_time * 1000,
+                                                                                                       batch_time * 1000,
+                                                                                                       one_by_one_time / batch_time))
+
+
+if __name__ == '__main__':
+    main()
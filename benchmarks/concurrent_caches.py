@@ -0,0 +1,105 @@
+
+# stress test of smart_imports caches: many threads resolve the same names with cold caches
+#
+# reports throughput and number of real computations (spec searches, directories scans, rules chains),
+# every key must be computed only once
+#
+# run from the repository root:
+#
+#     python benchmarks/concurrent_caches.py
+
+import sys
+import time
+import types
+import threading
+import importlib.util
+
+from smart_imports import rules
+from smart_imports import config
+from smart_imports import importer
+from smart_imports import discovering
+
+
+THREADS_NUMBER = 16
+
+ROUNDS = 20
+
+
+COUNTER_LOCK = threading.Lock()
+
+
+def count_calls(module, name, counter, by_arguments=False):
+    function = getattr(module, name)
+
+    def wrapper(*argv, **kwargs):
+        with COUNTER_LOCK:
+            key = (name, argv) if by_arguments else name
+            counter[key] = counter.get(key, 0) + 1
+
+        return function(*argv, **kwargs)
+
+    setattr(module, name, wrapper)
+
+
+def main():
+    counter = {}
+
+    count_calls(importlib.util, 'find_spec', counter)
+    count_calls(discovering, 'scan_directory', counter, by_arguments=True)
+    count_calls(rules, 'create_rule', counter)
+    count_calls(rules, '_collect_stdlib_modules', counter)
+    count_calls(discovering, 'build_top_level_index', counter)
+
+    module = types.ModuleType('benchmark_module')
+    module.__file__ = importer.__file__
+
+    names = sorted(name for name in rules._find_stdlib_modules() if '.' not in name)[:200]
+    names.extend(['unknown_name_{}'.format(i) for i in range(50)])
+
+    module_config = config.get(module.__file__)
+
+    barrier = threading.Barrier(THREADS_NUMBER)
+
+    def worker():
+        barrier.wait()
+
+        for _ in range(ROUNDS):
+            importer.apply_rules_many(config.get(module.__file__), module, names)
+
+            for name in names:
+                discovering.find_spec(name)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS_NUMBER)]
+
+    started_at = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    duration = time.perf_counter() - started_at
+
+    resolutions = THREADS_NUMBER * ROUNDS * len(names)
+
+    sys.stdout.write('{} threads, {} names resolutions: {:.1f} ms, {:.0f} resolutions/s\n'.format(THREADS_NUMBER,
+                                                                                                resolutions,
+                                                                                                duration * 1000,
+                                                                                                resolutions / duration))
+
+    sys.stdout.write('find_spec calls: {} for {} names, rules created: {} for {} rules in config\n'.format(counter.get('find_spec', 0),
+                                                                                                       len(names),
+                                                                                                       counter.get('create_rule', 0),
+                                                                                                       len(module_config.rules)))
+
+    sys.stdout.write('scans of indexed directories: {} for {} directories\n'.format(sum(counter.get(('scan_directory', (path,)), 0)
+                                                                                         for path in discovering.MODULES_INDEX),
+                                                                                     len(discovering.MODULES_INDEX)))
+
+    sys.stdout.write('standard library tables built: {}, top level indexes built: {}\n'.format(counter.get('_collect_stdlib_modules', 0),
+                                                                                             counter.get('build_top_level_index', 0)))
+
+
+if __name__ == '__main__':
+    main()
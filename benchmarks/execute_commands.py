@@ -0,0 +1,66 @@
+
+# compares execution of import commands one by one and grouped execution with bulk binding
+#
+# run from the repository root:
+#
+#     python benchmarks/execute_commands.py
+
+import sys
+import types
+import timeit
+
+from smart_imports import rules
+from smart_imports import importer
+
+
+SOURCE_MODULES = ('os', 'sys', 'math', 'json', 're', 'collections', 'functools', 'itertools')
+
+
+def get_commands(module, number):
+    commands = []
+
+    for i in range(number):
+        source_module = SOURCE_MODULES[i % len(SOURCE_MODULES)]
+
+        source_attribute = None
+
+        if i % 2:
+            source_attribute = '__name__'
+
+        commands.append(rules.ImportCommand(target_module=module,
+                                            target_attribute='name_{}'.format(i),
+                                            source_module=source_module,
+                                            source_attribute=source_attribute))
+
+    return commands
+
+
+def main():
+    for name in SOURCE_MODULES:
+        __import__(name)
+
+    for number in (100, 300, 1000):
+        module = types.ModuleType('benchmark_module')
+
+        commands = get_commands(module, number)
+
+        def one_by_one():
+            for command in commands:
+                command()
+
+        def grouped():
+            importer.execute_commands(commands)
+
+        repeats = 200
+
+        one_by_one_time = timeit.timeit(one_by_one, number=repeats) / repeats
+        grouped_time = timeit.timeit(grouped, number=repeats) / repeats
+
+        sys.stdout.write('{} names: one by one {:.3f} ms, grouped {:.3f} ms, x{:.1f}\n'.format(number,
+                                                                                              one_by_one_time * 1000,
+                                                                                              grouped_time * 1000,
+                                                                                              one_by_one_time / grouped_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+
+# measures scaling of target module discovery: imports N modules, every module calls smart_imports.all()
+#
+# previous implementation searched target module in whole sys.modules on every call,
+# so total time grew quadratically with number of modules
+#
+# run from the repository root:
+#
+#     python benchmarks/find_target_module.py
+
+import os
+import sys
+import tempfile
+import subprocess
+
+
+MODULES_NUMBERS = (1000, 3000, 10000)
+
+
+CODE = '''
+import sys
+import time
+import inspect
+
+from smart_imports import discovering
+
+
+def legacy_find_target_module():
+    frame = sys._getframe(1)
+
+    while frame:
+        if frame.f_code.co_name == '<module>':
+            for module in sys.modules.values():
+                if getattr(module, '__file__', None) == frame.f_code.co_filename:
+                    return module
+
+            return sys.modules[inspect.getmodulename(frame.f_code.co_filename)]
+
+        frame = frame.f_back
+
+
+if {legacy}:
+    discovering.find_target_module = legacy_find_target_module
+
+started_at = time.perf_counter()
+
+for i in range({number}):
+    __import__('project.module_{{}}'.format(i))
+
+print(time.perf_counter() - started_at)
+'''
+
+
+def create_project(directory, number):
+    package_path = os.path.join(directory, 'project')
+
+    os.makedirs(package_path)
+
+    with open(os.path.join(package_path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    for i in range(number):
+        with open(os.path.join(package_path, 'module_{}.py'.format(i)), 'w') as f:
+            f.write('import smart_imports\nsmart_imports.all()\n')
+
+
+def run(directory, number, legacy):
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([directory, os.getcwd()])
+
+    output = subprocess.check_output([sys.executable, '-c', CODE.format(number=number, legacy=legacy)],
+                                     env=environment,
+                                     cwd=directory)
+
+    return float(output)
+
+
+def main():
+    for number in MODULES_NUMBERS:
+        with tempfile.TemporaryDirectory() as directory:
+            create_project(directory, number)
+
+            # first run compiles bytecode
+            run(directory, number, legacy=False)
+
+            legacy_time = run(directory, number, legacy=True)
+            new_time = run(directory, number, legacy=False)
+
+        sys.stdout.write('{} modules: search in sys.modules {:.1f} ms, by frame globals {:.1f} ms, x{:.1f}\n'.format(number,
+                                                                                                             legacy_time * 1000,
+                                                                                                             new_time * 1000,
+                                                                                                             legacy_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+
+# measures memory of workers, forked from master process, which imported a package of modules with smart_imports.all()
+# (like gunicorn --preload): shared and private memory per worker from /proc/<pid>/smaps_rollup
+#
+# "default": workers are forked right after import of the package
+# "prepared": smart_imports.prepare_for_fork() is called before fork
+#
+# every worker imports the other modules of the package and runs garbage collection, like on the first requests
+#
+# linux only, run from the repository root:
+#
+#     python benchmarks/fork_memory.py
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+
+MODULES_NUMBER = 200
+
+FUNCTIONS_NUMBER = 20
+
+WORKERS_NUMBER = 4
+
+MODULES = ['argparse', 'ast', 'base64', 'calendar', 'collections', 'copy', 'csv', 'datetime', 'decimal', 'enum',
+           'fnmatch', 'fractions', 'functools', 'hashlib', 'heapq', 'inspect', 'itertools', 'json', 'logging', 'math',
+           'operator', 'os', 'pathlib', 'pickle', 'pprint', 'queue', 'random', 're', 'shlex', 'shutil', 'statistics',
+           'string', 'struct', 'tempfile', 'textwrap', 'threading', 'time', 'types', 'typing', 'uuid']
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def create_source(index):
+    lines = ['import smart_imports', 'smart_imports.all()', '']
+
+    for i in range(FUNCTIONS_NUMBER):
+        lines.append('def function_{}(argument):'.format(i))
+        lines.append('    return {}, {{"value": argument + {}}}'.format(MODULES[(index + i) % len(MODULES)], i))
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def create_package(directory):
+    path = os.path.join(directory, 'package')
+
+    os.makedirs(path)
+
+    with open(os.path.join(path, 'smart_imports.json'), 'w') as f:
+        json.dump({'rules': [{'type': 'rule_local_modules'},
+                             {'type': 'rule_stdlib'},
+                             {'type': 'rule_predefined_names'},
+                             {'type': 'rule_global_modules'}]}, f)
+
+    with open(os.path.join(path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    for i in range(MODULES_NUMBER):
+        with open(os.path.join(path, 'module_{}.py'.format(i)), 'w') as f:
+            f.write(create_source(i))
+
+    # half of modules is imported by master, other half by workers
+    with open(os.path.join(path, 'master.py'), 'w') as f:
+        f.write(''.join('from . import module_{}\n'.format(i) for i in range(0, MODULES_NUMBER, 2)))
+
+    with open(os.path.join(path, 'worker.py'), 'w') as f:
+        f.write(''.join('from . import module_{}\n'.format(i) for i in range(1, MODULES_NUMBER, 2)))
+
+
+def read_memory(pid):
+    memory = {}
+
+    with open('/proc/{}/smaps_rollup'.format(pid)) as f:
+        for line in f:
+            name, _, value = line.partition(':')
+
+            if name in FIELDS:
+                memory[name] = int(value.split()[0])
+
+    return memory
+
+
+def run_worker(ready_pipe, stop_pipe):
+    import gc
+    import importlib
+
+    importlib.import_module('package.worker')
+
+    gc.collect()
+
+    os.write(ready_pipe, b'1')
+
+    os.read(stop_pipe, 1)
+
+    os._exit(0)
+
+
+def run_master(mode):
+    import importlib
+
+    import smart_imports
+
+    with tempfile.TemporaryDirectory() as directory:
+        create_package(directory)
+
+        sys.path.insert(0, directory)
+
+        importlib.import_module('package.master')
+
+        if mode == 'prepared':
+            smart_imports.prepare_for_fork()
+
+        ready_read, ready_write = os.pipe()
+        stop_read, stop_write = os.pipe()
+
+        pids = []
+
+        for i in range(WORKERS_NUMBER):
+            pid = os.fork()
+
+            if pid == 0:
+                run_worker(ready_write, stop_read)
+
+            pids.append(pid)
+
+        for pid in pids:
+            os.read(ready_read, 1)
+
+        workers_memory = [read_memory(pid) for pid in pids]
+
+        os.write(stop_write, b'1' * len(pids))
+
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+        memory = {field: sum(worker_memory[field] for worker_memory in workers_memory) // len(pids)
+                  for field in FIELDS}
+
+        print(json.dumps(memory))
+
+
+def main():
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print('/proc/<pid>/smaps_rollup is not available')
+        return
+
+    environment = dict(os.environ, PYTHONPATH=REPOSITORY_PATH)
+
+    print('workers: {}, modules: {} (half imported by master)'.format(WORKERS_NUMBER, MODULES_NUMBER))
+    print('memory per worker, kB:')
+    print('{:10} {:>8} {:>8} {:>8} {:>8}'.format('', 'rss', 'pss', 'shared', 'private'))
+
+    for mode in ('default', 'prepared'):
+        output = subprocess.run([sys.executable, __file__, mode],
+                                env=environment,
+                                check=True,
+                                stdout=subprocess.PIPE).stdout
+
+        memory = json.loads(output.decode('utf-8'))
+
+        print('{:10} {:8} {:8} {:8} {:8}'.format(mode,
+                                                 memory['Rss'],
+                                                 memory['Pss'],
+                                                 memory['Shared_Clean'] + memory['Shared_Dirty'],
+                                                 memory['Private_Clean'] + memory['Private_Dirty']))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run_master(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,111 @@
+
+# measures startup time of a process, which imports a package of modules, using smart_imports.all()
+#
+# "dynamic": imports are found at runtime by analysis of modules sources and rules
+# "frozen": imports are read from sidecars, written by "python -m smart_imports freeze"
+#
+# run from the repository root:
+#
+#     python benchmarks/freeze.py
+
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+
+MODULES_NUMBER = 100
+
+FUNCTIONS_NUMBER = 50
+
+REPEATS = 10
+
+MODULES = ['argparse', 'ast', 'base64', 'calendar', 'collections', 'copy', 'csv', 'datetime', 'decimal', 'enum',
+           'fnmatch', 'fractions', 'functools', 'hashlib', 'heapq', 'inspect', 'itertools', 'json', 'logging', 'math',
+           'operator', 'os', 'pathlib', 'pickle', 'pprint', 'queue', 'random', 're', 'shlex', 'shutil', 'statistics',
+           'string', 'struct', 'tempfile', 'textwrap', 'threading', 'time', 'types', 'typing', 'uuid']
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_source(index):
+    lines = ['import smart_imports', 'smart_imports.all()', '']
+
+    for i in range(FUNCTIONS_NUMBER):
+        lines.append('def function_{}(argument):'.format(i))
+        lines.append('    value = argument + {}'.format(i))
+        lines.append('    return {}, value, len(str(value))'.format(MODULES[(index + i) % len(MODULES)]))
+        lines.append('')
+
+    # every module uses previous one, like modules of real packages use their neighbours
+    if index > 0:
+        lines.append('def neighbour():')
+        lines.append('    return module_{}'.format(index - 1))
+
+    return '\n'.join(lines)
+
+
+def create_package(directory, frozen):
+    path = os.path.join(directory, 'package')
+
+    os.makedirs(path)
+
+    with open(os.path.join(path, 'smart_imports.json'), 'w') as f:
+        json.dump({'frozen': frozen,
+                   'rules': [{'type': 'rule_local_modules'},
+                             {'type': 'rule_stdlib'},
+                             {'type': 'rule_predefined_names'}]}, f)
+
+    with open(os.path.join(path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    for i in range(MODULES_NUMBER):
+        with open(os.path.join(path, 'module_{}.py'.format(i)), 'w') as f:
+            f.write(create_source(i))
+
+    with open(os.path.join(path, 'everything.py'), 'w') as f:
+        f.write(''.join('from . import module_{}\n'.format(i) for i in range(MODULES_NUMBER)))
+
+
+def run(directory, arguments):
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([directory, REPOSITORY_PATH]))
+
+    # bytecode of modules and sidecars is cached like in production
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    subprocess.run([sys.executable] + arguments, env=environment, cwd=directory, check=True, stdout=subprocess.DEVNULL)
+
+
+def measure(directory):
+    started_at = time.perf_counter()
+    run(directory, ['-c', 'import package.everything'])
+    return time.perf_counter() - started_at
+
+
+def main():
+    with tempfile.TemporaryDirectory() as dynamic_directory, tempfile.TemporaryDirectory() as frozen_directory:
+        create_package(dynamic_directory, frozen=False)
+        create_package(frozen_directory, frozen=True)
+
+        run(frozen_directory, ['-m', 'smart_imports', 'freeze', 'package'])
+
+        # bytecode is written by the first runs
+        measure(dynamic_directory)
+        measure(frozen_directory)
+
+        dynamic_times = []
+        frozen_times = []
+
+        for i in range(REPEATS):
+            dynamic_times.append(measure(dynamic_directory))
+            frozen_times.append(measure(frozen_directory))
+
+        print('modules: {}'.format(MODULES_NUMBER))
+        print('dynamic: {:7.1f} ms'.format(min(dynamic_times) * 1000))
+        print('frozen:  {:7.1f} ms'.format(min(frozen_times) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+
+# compares import of a synthetic project, compiled from sources, with and without import hook
+#
+# without hook, source of every module is parsed twice: by CPython and by smart_imports.all()
+# with hook, AST is built once and used both for analysis and compilation
+#
+# bytecode cache is disabled, since hook has effect only when modules are compiled from sources
+#
+# run from the repository root:
+#
+#     python benchmarks/import_hook.py
+
+import os
+import sys
+import tempfile
+import subprocess
+
+
+MODULES_NUMBER = 50
+
+FUNCTIONS_NUMBER = 50
+
+
+def create_project(directory):
+    package_path = os.path.join(directory, 'project')
+
+    os.makedirs(package_path)
+
+    with open(os.path.join(package_path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    for i in range(MODULES_NUMBER):
+        with open(os.path.join(package_path, 'module_{}.py'.format(i)), 'w') as f:
+            f.write('import smart_imports\n')
+            f.write('smart_imports.all()\n\n')
+
+            for j in range(FUNCTIONS_NUMBER):
+                f.write('def function_{}(x, y):\n'.format(j))
+                f.write('    z = [math.sqrt(v) for v in range(x) if v % 2]\n')
+                f.write('    if y:\n')
+                f.write('        return json.dumps({"z": z, "y": os.path.join(str(y), "x")})\n')
+                f.write('    return collections.Counter(z)\n\n')
+
+    with open(os.path.join(package_path, 'main.py'), 'w') as f:
+        for i in range(MODULES_NUMBER):
+            f.write('from . import module_{}\n'.format(i))
+
+
+def run(directory, use_hook):
+    code = ('import time; started_at = time.perf_counter(); '
+            '{}'
+            'import project.main; '
+            'print(time.perf_counter() - started_at)').format('import smart_imports.hooks; smart_imports.hooks.install(); '
+                                                              if use_hook else '')
+
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([directory, os.getcwd()])
+    environment['PYTHONDONTWRITEBYTECODE'] = '1'
+
+    return float(subprocess.check_output([sys.executable, '-c', code], env=environment, cwd=directory))
+
+
+def main(repeats=15):
+    times = {False: [], True: []}
+
+    with tempfile.TemporaryDirectory() as directory:
+        create_project(directory)
+
+        # alternate runs, so both variants are equally affected by machine load
+        for _ in range(repeats):
+            for use_hook in (False, True):
+                times[use_hook].append(run(directory, use_hook))
+
+    without_hook = min(times[False])
+    with_hook = min(times[True])
+
+    sys.stdout.write('{} modules from sources: double parse {:.1f} ms, import hook {:.1f} ms, x{:.2f}\n'.format(MODULES_NUMBER,
+                                                                                                         without_hook * 1000,
+                                                                                                         with_hook * 1000,
+                                                                                                         without_hook / with_hook))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+
+# compares startup time of a synthetic project in eager and lazy import modes
+#
+# project's main module references many heavy modules, but uses only one of them
+#
+# run from the repository root:
+#
+#     python benchmarks/lazy_imports.py
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+
+HEAVY_MODULES_NUMBER = 30
+
+
+HEAVY_MODULE = '''
+DATA = [str(i) * 3 for i in range(100000)]
+
+def value():
+    return len(DATA)
+'''
+
+
+def create_project(directory, import_mode):
+    package_path = os.path.join(directory, 'project')
+
+    os.makedirs(package_path)
+
+    with open(os.path.join(package_path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    with open(os.path.join(package_path, 'smart_imports.json'), 'w') as f:
+        json.dump({'import_mode': import_mode,
+                   'rules': [{'type': 'rule_local_modules'},
+                             {'type': 'rule_stdlib'},
+                             {'type': 'rule_predefined_names'}]}, f)
+
+    for i in range(HEAVY_MODULES_NUMBER):
+        with open(os.path.join(package_path, 'heavy_{}.py'.format(i)), 'w') as f:
+            f.write(HEAVY_MODULE)
+
+    with open(os.path.join(package_path, 'main.py'), 'w') as f:
+        f.write('import smart_imports\n')
+        f.write('smart_imports.all()\n\n')
+        f.write('def unused():\n')
+
+        for i in range(HEAVY_MODULES_NUMBER):
+            f.write('    heavy_{}.value()\n'.format(i))
+
+        f.write('\ndef run():\n')
+        f.write('    return heavy_0.value()\n')
+
+
+def measure(directory, repeats=5):
+    code = ('import time; started_at = time.perf_counter(); '
+            'import project.main; project.main.run(); '
+            'print(time.perf_counter() - started_at)')
+
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([directory, os.getcwd()])
+
+    times = []
+
+    for _ in range(repeats):
+        output = subprocess.check_output([sys.executable, '-c', code], env=environment, cwd=directory)
+        times.append(float(output))
+
+    return min(times)
+
+
+def main():
+    results = {}
+
+    for import_mode in ('eager', 'lazy'):
+        with tempfile.TemporaryDirectory() as directory:
+            create_project(directory, import_mode)
+            results[import_mode] = measure(directory)
+
+    sys.stdout.write('{} heavy modules, one used: eager {:.1f} ms, lazy {:.1f} ms, x{:.1f}\n'.format(HEAVY_MODULES_NUMBER,
+                                                                                                 results['eager'] * 1000,
+                                                                                                 results['lazy'] * 1000,
+                                                                                                 results['eager'] / results['lazy']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+
+# measures time of import of a package of modules, using smart_imports.all(), in a new process
+# (used standard library modules are imported before measurement)
+#
+# "cached": imports are found at runtime by rules, variables of modules are read from parser cache
+# "manifest": imports are read from resolution manifest, written by "python -m smart_imports build-manifest"
+#
+# run from the repository root:
+#
+#     python benchmarks/manifest.py
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+
+MODULES_NUMBER = 100
+
+FUNCTIONS_NUMBER = 50
+
+REPEATS = 10
+
+MODULES = ['argparse', 'ast', 'base64', 'calendar', 'collections', 'copy', 'csv', 'datetime', 'decimal', 'enum',
+           'fnmatch', 'fractions', 'functools', 'hashlib', 'heapq', 'inspect', 'itertools', 'json', 'logging', 'math',
+           'operator', 'os', 'pathlib', 'pickle', 'pprint', 'queue', 'random', 're', 'shlex', 'shutil', 'statistics',
+           'string', 'struct', 'tempfile', 'textwrap', 'threading', 'time', 'types', 'typing', 'uuid']
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_source(index):
+    lines = ['import smart_imports', 'smart_imports.all()', '']
+
+    for i in range(FUNCTIONS_NUMBER):
+        lines.append('def function_{}(argument):'.format(i))
+        lines.append('    value = argument + {}'.format(i))
+        lines.append('    return {}, value, len(str(value))'.format(MODULES[(index + i) % len(MODULES)]))
+        lines.append('')
+
+    # every module uses previous one, like modules of real packages use their neighbours
+    if index > 0:
+        lines.append('def neighbour():')
+        lines.append('    return module_{}'.format(index - 1))
+
+    return '\n'.join(lines)
+
+
+def create_package(directory):
+    path = os.path.join(directory, 'package')
+
+    os.makedirs(path)
+
+    with open(os.path.join(path, 'smart_imports.json'), 'w') as f:
+        json.dump({'cache_dir': os.path.join(directory, 'cache'),
+                   'rules': [{'type': 'rule_local_modules'},
+                             {'type': 'rule_stdlib'},
+                             {'type': 'rule_predefined_names'}]}, f)
+
+    with open(os.path.join(path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    for i in range(MODULES_NUMBER):
+        with open(os.path.join(path, 'module_{}.py'.format(i)), 'w') as f:
+            f.write(create_source(i))
+
+    with open(os.path.join(path, 'everything.py'), 'w') as f:
+        f.write(''.join('from . import module_{}\n'.format(i) for i in range(MODULES_NUMBER)))
+
+
+def run(directory, arguments, manifest_path=None):
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([directory, REPOSITORY_PATH]))
+
+    environment.pop('SMART_IMPORTS_MANIFEST', None)
+
+    if manifest_path is not None:
+        environment['SMART_IMPORTS_MANIFEST'] = manifest_path
+
+    # bytecode of modules and sidecars is cached like in production
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    return subprocess.run([sys.executable] + arguments,
+                          env=environment,
+                          cwd=directory,
+                          check=True,
+                          stdout=subprocess.PIPE).stdout
+
+
+def measure(directory, manifest_path=None):
+    code = ('import time, smart_imports, {}\n'
+            'started_at = time.perf_counter()\n'
+            'import package.everything\n'
+            'print(time.perf_counter() - started_at)').format(', '.join(MODULES))
+
+    return float(run(directory, ['-c', code], manifest_path=manifest_path))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        create_package(directory)
+
+        manifest_path = os.path.join(directory, 'manifest.bin')
+
+        run(directory, ['-m', 'smart_imports', 'build-manifest', '-o', manifest_path, 'package'])
+
+        # bytecode and parser cache are written by the first run
+        measure(directory)
+
+        cached_times = []
+        manifest_times = []
+
+        for i in range(REPEATS):
+            cached_times.append(measure(directory))
+            manifest_times.append(measure(directory, manifest_path=manifest_path))
+
+        print('modules: {}, manifest size: {} bytes'.format(MODULES_NUMBER, os.path.getsize(manifest_path)))
+        print('cached:   {:7.1f} ms'.format(min(cached_times) * 1000))
+        print('manifest: {:7.1f} ms'.format(min(manifest_times) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+
+# compares startup time of a synthetic project with and without background prefetching of modules files
+#
+# before every run files of the project are evicted from OS page cache with posix_fadvise(POSIX_FADV_DONTNEED),
+# which emulates cold start of a container; results depend heavily on the storage
+#
+# run from the repository root:
+#
+#     python benchmarks/prefetch.py
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import compileall
+
+
+MODULES_NUMBER = 200
+
+
+MODULE = '''
+DATA = {data!r}
+
+def value():
+    return len(DATA)
+'''
+
+
+def create_project(directory, prefetch):
+    package_path = os.path.join(directory, 'project')
+
+    os.makedirs(package_path)
+
+    with open(os.path.join(package_path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    with open(os.path.join(package_path, 'smart_imports.json'), 'w') as f:
+        json.dump({'prefetch': prefetch,
+                   'rules': [{'type': 'rule_local_modules'},
+                             {'type': 'rule_stdlib'},
+                             {'type': 'rule_predefined_names'}]}, f)
+
+    for i in range(MODULES_NUMBER):
+        with open(os.path.join(package_path, 'module_{}.py'.format(i)), 'w') as f:
+            f.write(MODULE.format(data=['value_{}_{}'.format(i, j) for j in range(2000)]))
+
+    with open(os.path.join(package_path, 'main.py'), 'w') as f:
+        f.write('import smart_imports\n')
+        f.write('smart_imports.all()\n\n')
+        f.write('def run():\n')
+
+        for i in range(MODULES_NUMBER):
+            f.write('    module_{}.value()\n'.format(i))
+
+    compileall.compile_dir(package_path, quiet=1)
+
+
+def evict_from_page_cache(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            with open(os.path.join(root, name), 'rb') as f:
+                # dirty pages can not be evicted
+                os.fsync(f.fileno())
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def measure(directory, repeats=9):
+    code = ('import time; started_at = time.perf_counter(); '
+            'import project.main; project.main.run(); '
+            'print(time.perf_counter() - started_at)')
+
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([directory, os.getcwd()])
+
+    times = []
+
+    for _ in range(repeats):
+        evict_from_page_cache(directory)
+
+        output = subprocess.check_output([sys.executable, '-c', code], env=environment, cwd=directory)
+        times.append(float(output))
+
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    results = {}
+
+    for prefetch in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            create_project(directory, prefetch)
+            results[prefetch] = measure(directory)
+
+    sys.stdout.write('{} modules, cold page cache: sequential {:.1f} ms, prefetch {:.1f} ms, x{:.2f}\n'.format(MODULES_NUMBER,
+                                                                                                        results[False] * 1000,
+                                                                                                        results[True] * 1000,
+                                                                                                        results[False] / results[True]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+
+# measures, how long the event loop is blocked by the first access to lazy modules
+#
+# "first access": handler touches not loaded modules in the loop thread
+# "preload": modules are loaded by smart_imports.preload() in a thread before the handler
+#
+# run from the repository root:
+#
+#     PYTHONPATH=. python benchmarks/preload.py
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import importlib
+
+import smart_imports
+
+from smart_imports import preloading
+
+
+HEAVY_MODULES_NUMBER = 10
+
+
+HEAVY_MODULE = '''
+DATA = [str(i) * 3 for i in range(200000)]
+
+def value():
+    return len(DATA)
+'''
+
+
+def create_project(directory, package_name):
+    package_path = os.path.join(directory, package_name)
+
+    os.makedirs(package_path)
+
+    with open(os.path.join(package_path, '__init__.py'), 'w') as f:
+        f.write('')
+
+    with open(os.path.join(package_path, 'smart_imports.json'), 'w') as f:
+        json.dump({'import_mode': 'lazy',
+                   'rules': [{'type': 'rule_local_modules'},
+                             {'type': 'rule_stdlib'},
+                             {'type': 'rule_predefined_names'}]}, f)
+
+    for i in range(HEAVY_MODULES_NUMBER):
+        with open(os.path.join(package_path, 'heavy_{}.py'.format(i)), 'w') as f:
+            f.write(HEAVY_MODULE)
+
+    with open(os.path.join(package_path, 'main.py'), 'w') as f:
+        f.write('import smart_imports\n')
+        f.write('smart_imports.all()\n\n')
+        f.write('def handle():\n')
+        f.write('    return [{}]\n'.format(', '.join('heavy_{}.value()'.format(i) for i in range(HEAVY_MODULES_NUMBER))))
+
+
+async def ticker(gaps, stop):
+    last_tick = time.perf_counter()
+
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+
+        now = time.perf_counter()
+        gaps.append(now - last_tick)
+        last_tick = now
+
+
+async def scenario(module, use_preload):
+    gaps = []
+    stop = asyncio.Event()
+
+    ticker_task = asyncio.ensure_future(ticker(gaps, stop))
+
+    await asyncio.sleep(0.01)
+
+    started_at = time.perf_counter()
+
+    if use_preload:
+        await smart_imports.preload(module)
+
+    module.handle()
+
+    duration = time.perf_counter() - started_at
+
+    stop.set()
+
+    await ticker_task
+
+    return duration, max(gaps)
+
+
+def main():
+    loop = asyncio.new_event_loop()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sys.path.append(directory)
+
+        for i, use_preload in enumerate((False, True)):
+            package_name = 'preload_project_{}'.format(i)
+
+            create_project(directory, package_name)
+
+            module = importlib.import_module(package_name + '.main')
+
+            duration, max_gap = loop.run_until_complete(scenario(module, use_preload))
+
+            print('{:<12} handler ready after {:7.1f} ms, max event loop stall {:7.1f} ms'.format('preload' if use_preload else 'first access',
+                                                                                               duration * 1000,
+                                                                                               max_gap * 1000))
+
+        sys.path.remove(directory)
+
+    preloading.reset()
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+
+# measures latency of importlib.reload for a large module, which uses smart_imports.all()
+#
+# "unchanged": module is reloaded without changes in source
+# "one name added": module source is changed by a new function, which uses one more module
+#
+# run from the repository root:
+#
+#     PYTHONPATH=. python benchmarks/reload.py
+
+import os
+import sys
+import time
+import tempfile
+import importlib
+
+
+FUNCTIONS_NUMBER = 2000
+
+REPEATS = 10
+
+MODULES = ['abc', 'argparse', 'array', 'ast', 'base64', 'bisect', 'calendar', 'codecs', 'collections', 'contextlib',
+           'copy', 'csv', 'datetime', 'decimal', 'difflib', 'enum', 'errno', 'fnmatch', 'fractions', 'functools',
+           'gc', 'glob', 'hashlib', 'heapq', 'hmac', 'inspect', 'io', 'itertools', 'json', 'keyword',
+           'locale', 'logging', 'math', 'numbers', 'operator', 'os', 'pathlib', 'pickle', 'platform', 'pprint',
+           'queue', 'random', 're', 'shlex', 'shutil', 'signal', 'socket', 'statistics', 'string', 'struct',
+           'subprocess', 'tempfile', 'textwrap', 'threading', 'time', 'tokenize', 'traceback', 'types', 'typing', 'uuid',
+           'warnings', 'weakref', 'zlib']
+
+
+def create_source(extra_name=None):
+    lines = ['import smart_imports', 'smart_imports.all()', '']
+
+    for i in range(FUNCTIONS_NUMBER):
+        lines.append('def function_{}(argument):'.format(i))
+        lines.append('    value = argument + {}'.format(i))
+        lines.append('    return {}, value'.format(MODULES[i % len(MODULES)]))
+        lines.append('')
+
+    if extra_name is not None:
+        lines.append('def extra():')
+        lines.append('    return {}'.format(extra_name))
+
+    return '\n'.join(lines)
+
+
+def write(path, source):
+    with open(path, 'w') as f:
+        f.write(source)
+
+    importlib.invalidate_caches()
+
+
+def measure(module, path, sources):
+    times = []
+
+    for i in range(REPEATS):
+        write(path, sources[i % len(sources)])
+
+        started_at = time.perf_counter()
+        importlib.reload(module)
+        times.append(time.perf_counter() - started_at)
+
+    return min(times)
+
+
+def main():
+    sys.dont_write_bytecode = True
+
+    with tempfile.TemporaryDirectory() as directory:
+        sys.path.append(directory)
+
+        path = os.path.join(directory, 'large_module.py')
+
+        write(path, create_source())
+
+        started_at = time.perf_counter()
+        module = importlib.import_module('large_module')
+        print('first import:   {:7.1f} ms'.format((time.perf_counter() - started_at) * 1000))
+
+        unchanged = measure(module, path, [create_source()])
+        print('unchanged:      {:7.1f} ms'.format(unchanged * 1000))
+
+        # alternate two versions, so every reload sees changed source
+        changed = measure(module, path, [create_source('bz2'), create_source('lzma')])
+        print('one name added: {:7.1f} ms'.format(changed * 1000))
+
+        sys.path.remove(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+
+# emulates monorepo with many identical configs: every config resolves one name
+#
+# rules chains are shared between configs with the same rules,
+# so heavy rules structures (like standard library modules table) are built once
+#
+# run from the repository root:
+#
+#     python benchmarks/shared_rules.py
+
+import os
+import sys
+import json
+import time
+import types
+import tempfile
+
+from smart_imports import rules
+from smart_imports import config
+from smart_imports import importer
+
+
+CONFIGS_NUMBER = 300
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+
+        for i in range(CONFIGS_NUMBER):
+            project_path = os.path.join(directory, 'project_{}'.format(i))
+
+            os.makedirs(project_path)
+
+            with open(os.path.join(project_path, 'smart_imports.json'), 'w') as f:
+                json.dump({'rules': [{'type': 'rule_predefined_names'},
+                                     {'type': 'rule_stdlib'},
+                                     {'type': 'rule_global_modules'}]}, f)
+
+            paths.append(os.path.join(project_path, 'module.py'))
+
+        module = types.ModuleType('benchmark_module')
+
+        started_at = time.perf_counter()
+
+        for path in paths:
+            importer.apply_rules_many(config.get(path), module, ['json', 'print'])
+
+        duration = time.perf_counter() - started_at
+
+    chains_number, configs_number = rules.get_chains_statistics()
+
+    sys.stdout.write('{} configs: {} rules chains built, {:.1f} ms\n'.format(configs_number,
+                                                                            chains_number,
+                                                                            duration * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,28 @@
 
-from .importer import all
+from .importer import all, lazy
 
 
-__all__ = (all,)
+# optional features are imported on the first call
+
+
+def activate(package_name):
+    from . import hooks
+    return hooks.activate(package_name)
+
+
+def preload(module_or_names=None, executor=None):
+    from . import preloading
+    return preloading.preload(module_or_names, executor=executor)
+
+
+def idle_preload(executor=None, delay=None):
+    from . import preloading
+    return preloading.idle_preload(executor=executor, delay=delay)
+
+
+def prepare_for_fork():
+    from . import forking
+    return forking.prepare_for_fork()
+
+
+__all__ = (all, lazy, activate, preload, idle_preload, prepare_for_fork)
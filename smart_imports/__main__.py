@@ -0,0 +1,105 @@
+
+import sys
+import argparse
+
+from . import frozen
+from . import symbols
+from . import manifest
+from . import artifacts
+from . import exceptions
+
+
+def build_artifact(arguments):
+    data = artifacts.build(arguments.modules, all_modules=arguments.all_modules)
+
+    artifacts.write(arguments.output, data)
+
+    print('analysis of {} modules written to {}'.format(len(data['modules']), arguments.output))
+
+
+def build_manifest(arguments):
+    manifest.write(arguments.output, manifest.build(arguments.modules))
+
+    print('resolution manifest written to {}'.format(arguments.output))
+
+
+def build_symbols_index(arguments):
+    data = symbols.build(arguments.packages, cache_dir=arguments.cache_dir)
+
+    symbols.write(arguments.output, data)
+
+    if data['ambiguous']:
+        print('{}: {}'.format(symbols.AMBIGUOUS_SYMBOLS_WARNING, symbols.describe_ambiguous_symbols(data['ambiguous'])),
+              file=sys.stderr)
+
+    print('index of {} exported symbols written to {}'.format(len(data['symbols']), arguments.output))
+
+
+def freeze(arguments):
+    wrong_sidecars = frozen.freeze(arguments.modules, check=arguments.check)
+
+    if not arguments.check:
+        print('explicit imports written for modules of {}'.format(', '.join(arguments.modules)))
+        return 0
+
+    for path in wrong_sidecars:
+        print('outdated: {}'.format(path), file=sys.stderr)
+
+    return 1 if wrong_sidecars else 0
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog='python -m smart_imports',
+                                     description='Smart Imports tools')
+
+    subparsers = parser.add_subparsers(dest='command')
+
+    build_parser = subparsers.add_parser('build-artifact',
+                                         help='analyze modules sources and write analysis artifact for runtime without sources')
+    build_parser.add_argument('modules', nargs='+', help='modules or packages (with all submodules) to analyze')
+    build_parser.add_argument('-o', '--output', required=True, help='path to artifact file')
+    build_parser.add_argument('--all-modules', action='store_true',
+                              help='analyze all modules, not only modules, which mention smart_imports')
+    build_parser.set_defaults(handler=build_artifact)
+
+    manifest_parser = subparsers.add_parser('build-manifest',
+                                            help='resolve imports of modules and write them to binary resolution manifest')
+    manifest_parser.add_argument('modules', nargs='+', help='modules or packages (with all submodules) to resolve')
+    manifest_parser.add_argument('-o', '--output', required=True, help='path to manifest file')
+    manifest_parser.set_defaults(handler=build_manifest)
+
+    symbols_parser = subparsers.add_parser('build-symbols-index',
+                                           help='parse modules of packages and write index of exported symbols for rule_exported_symbols')
+    symbols_parser.add_argument('packages', nargs='+', help='packages, as in config of the rule')
+    symbols_parser.add_argument('-o', '--output', required=True, help='path to index file')
+    symbols_parser.add_argument('--cache-dir', default=None, help='directory to cache parsed modules between builds')
+    symbols_parser.set_defaults(handler=build_symbols_index)
+
+    freeze_parser = subparsers.add_parser('freeze',
+                                          help='write explicit imports of modules to sidecar files for frozen configs')
+    freeze_parser.add_argument('modules', nargs='+', help='modules or packages (with all submodules) to freeze')
+    freeze_parser.add_argument('--check', action='store_true',
+                               help='do not write files, fail if sidecars differ from runtime resolution')
+    freeze_parser.set_defaults(handler=freeze)
+
+    return parser
+
+
+def main(argv=None):
+    parser = create_parser()
+
+    arguments = parser.parse_args(argv)
+
+    if getattr(arguments, 'handler', None) is None:
+        parser.print_help()
+        return 2
+
+    try:
+        return arguments.handler(arguments) or 0
+    except exceptions.SmartImportsError as e:
+        print('error: {}'.format(e), file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
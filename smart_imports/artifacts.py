@@ -0,0 +1,271 @@
+
+import os
+import sys
+import json
+import types
+import hashlib
+import marshal
+
+from . import config
+from . import symbols
+from . import constants
+from . import exceptions
+
+
+# analysis artifact allows to process modules without their sources (bytecode-only deployments, zipapps):
+# variables of modules are found at packaging time and are looked up at runtime by module name,
+# after checking fingerprint of module's code object
+
+ENVIRONMENT_VARIABLE = constants.ANALYSIS_ENVIRONMENT_VARIABLE
+
+PROTOCOL_VERSION = '2'
+
+# modules without this marker do not call smart_imports
+MARKER = 'smart_imports'
+
+# path to artifact, which will be loaded on the first use
+_PATH = None
+
+ARTIFACT = None
+
+
+class Artifact:
+    __slots__ = ('path', 'configs', 'modules')
+
+    def __init__(self, path, configs, modules):
+        self.path = path
+        self.configs = configs
+
+        # module name -> (fingerprint, config index, variables)
+        self.modules = modules
+
+    def get(self, module_name, code):
+        # returns (config, variables) for module
+
+        if module_name not in self.modules:
+            raise exceptions.ModuleNotInArtifact(module=module_name, path=self.path)
+
+        fingerprint, config_index, variables = self.modules[module_name]
+
+        if code is None or fingerprint != get_code_fingerprint(code):
+            raise exceptions.ModuleChangedAfterArtifactBuild(module=module_name, path=self.path)
+
+        return self.configs[config_index], list(variables)
+
+
+def get_const_repr(value):
+    # frozensets are compiled from literals like "x in {'a', 'b'}", their order depends on hash seed
+    if isinstance(value, frozenset):
+        return 'frozenset([{}])'.format(', '.join(sorted(get_const_repr(item) for item in value)))
+
+    if isinstance(value, tuple):
+        return '({})'.format(', '.join(get_const_repr(item) for item in value))
+
+    return repr(value)
+
+
+def update_code_hash(hasher, code):
+    # file names and lines numbers are not used, since they differ between build and runtime
+    consts = []
+
+    for const in code.co_consts:
+        const_type = type(const)
+
+        if const_type is types.CodeType:
+            update_code_hash(hasher, const)
+            consts.append(())
+        elif const_type is frozenset or const_type is tuple:
+            consts.append((Ellipsis, get_const_repr(const)))
+        else:
+            consts.append(const)
+
+    hasher.update(code.co_code)
+
+    # marshal version 2 does not write references, so its output does not depend on objects' reference counts
+    hasher.update(marshal.dumps((code.co_name,
+                                 code.co_names,
+                                 code.co_varnames,
+                                 code.co_freevars,
+                                 code.co_cellvars,
+                                 code.co_argcount,
+                                 code.co_kwonlyargcount,
+                                 code.co_flags,
+                                 consts), 2))
+
+
+def get_code_digest(code):
+    hasher = hashlib.sha256()
+    update_code_hash(hasher, code)
+    return hasher.digest()
+
+
+def get_code_fingerprint(code):
+    return get_code_digest(code).hex()
+
+
+def get_cache_tag():
+    return sys.implementation.cache_tag
+
+
+def clear_rules_cache_dirs(rules_configs):
+    # cache directories are absolute paths of the build machine
+
+    cleared_configs = []
+
+    for rule_config in rules_configs:
+        rule_config = dict(rule_config)
+        rule_config.pop('cache_dir', None)
+
+        if isinstance(rule_config.get('rules'), list):
+            rule_config['rules'] = clear_rules_cache_dirs(rule_config['rules'])
+
+        cleared_configs.append(rule_config)
+
+    return cleared_configs
+
+
+def build(modules_names, all_modules=False):
+    # returns artifact data for modules and packages with all their submodules
+
+    # imported here, since importer uses this module
+    from . import importer
+
+    configs = []
+    configs_indexes = {}
+
+    modules = {}
+
+    for module_name in modules_names:
+        files = symbols.find_source_files(module_name, include_private=True)
+
+        if not files:
+            raise exceptions.ModuleSourcesNotFound(module=module_name)
+
+        for file_module_name, path in files:
+            with open(path, 'rb') as f:
+                source = f.read().decode('utf-8')
+
+            if not all_modules and MARKER not in source:
+                continue
+
+            variables, _ = importer.extract_variables(source)
+
+            module_config = config.get(path)
+
+            # parser cache is not used with artifact, indexes of rules are built in memory
+            config_data = module_config.serialize()
+            config_data['cache_dir'] = None
+            config_data['rules'] = clear_rules_cache_dirs(config_data['rules'])
+
+            config_key = json.dumps(config_data, sort_keys=True)
+
+            if config_key not in configs_indexes:
+                configs_indexes[config_key] = len(configs)
+                configs.append(config_data)
+
+            code = compile(source, path, 'exec', dont_inherit=True)
+
+            modules[file_module_name] = [get_code_fingerprint(code),
+                                         configs_indexes[config_key],
+                                         sorted(variables)]
+
+    return {'protocol_version': PROTOCOL_VERSION,
+            'cache_tag': get_cache_tag(),
+            'configs': configs,
+            'modules': modules}
+
+
+def write(path, data):
+    temp_path = '{}.{}'.format(path, os.getpid())
+
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, sort_keys=True)
+
+    os.replace(temp_path, path)
+
+
+def create_config(data):
+    module_config = config.Config()
+    module_config.initialize(data['path'], data)
+    return module_config
+
+
+def load(path, data=None):
+    # data can be passed directly, for example, when artifact is read from zip archive by pkgutil.get_data
+
+    if data is None:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise exceptions.ArtifactHasWrongFormat(path=path, message=str(e))
+
+    try:
+        data = json.loads(data.decode('utf-8'))
+    except ValueError as e:
+        raise exceptions.ArtifactHasWrongFormat(path=path, message=str(e))
+
+    if data.get('protocol_version') != PROTOCOL_VERSION:
+        raise exceptions.ArtifactHasWrongFormat(path=path, message='unsupported protocol version')
+
+    # bytecode differs between python versions, so fingerprints will not match
+    if data.get('cache_tag') != get_cache_tag():
+        raise exceptions.ArtifactHasWrongFormat(path=path,
+                                                message='built for "{}", but used with "{}"'.format(data.get('cache_tag'),
+                                                                                                   get_cache_tag()))
+
+    return Artifact(path=path,
+                    configs=[create_config(config_data) for config_data in data['configs']],
+                    modules=data['modules'])
+
+
+def enable(path, data=None):
+    global _PATH, ARTIFACT
+
+    if data is None:
+        _PATH = path
+        ARTIFACT = None
+    else:
+        _PATH = None
+        ARTIFACT = load(path, data=data)
+
+
+def disable():
+    global _PATH, ARTIFACT
+    _PATH = None
+    ARTIFACT = None
+
+
+def is_enabled():
+    return ARTIFACT is not None or _PATH is not None
+
+
+def get_artifact():
+    global ARTIFACT
+
+    if ARTIFACT is None and _PATH is not None:
+        ARTIFACT = load(_PATH)
+
+    return ARTIFACT
+
+
+def find_module_code(module):
+    # code object of module, that is executed now, is taken from its frame, so bytecode is not read again
+    frame = sys._getframe(1)
+
+    while frame:
+        if frame.f_code.co_name == '<module>' and frame.f_globals is module.__dict__:
+            return frame.f_code
+
+        frame = frame.f_back
+
+    loader = getattr(module, '__loader__', None)
+
+    if loader is None or not hasattr(loader, 'get_code'):
+        return None
+
+    return loader.get_code(module.__name__)
+
+
+if os.environ.get(ENVIRONMENT_VARIABLE):
+    enable(os.environ[ENVIRONMENT_VARIABLE])
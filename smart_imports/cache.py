@@ -1,5 +1,6 @@
 
 import os
+import json
 import pathlib
 import hashlib
 import warnings
@@ -19,6 +20,10 @@ def get_cache_path(cache_dir, module_name):
     return os.path.join(cache_dir, module_name + '.cache')
 
 
+def get_index_path(cache_dir, index_name):
+    return os.path.join(cache_dir, index_name + '.index')
+
+
 def ignore_errors(function):
 
     @functools.wraps(function)
@@ -74,6 +79,43 @@ def set(cache_dir, module_name, checksum, variables):
             f.write('\n')
 
 
+@ignore_errors
+def get_index(cache_dir, index_name, fingerprint):
+
+    index_path = get_index_path(cache_dir, index_name)
+
+    if not os.path.isfile(index_path):
+        return None
+
+    with open(index_path) as f:
+        data = json.load(f)
+
+    if data.get('protocol_version') != constants.CACHE_PROTOCOL_VERSION:
+        return None
+
+    if data.get('fingerprint') != fingerprint:
+        return None
+
+    return data['index']
+
+
+@ignore_errors
+def set_index(cache_dir, index_name, fingerprint, index):
+    pathlib.Path(cache_dir).mkdir(parents=True, exist_ok=True)
+
+    index_path = get_index_path(cache_dir, index_name)
+
+    # write to temporary file first, since indexes can be shared between processes
+    temp_path = '{}.{}'.format(index_path, os.getpid())
+
+    with open(temp_path, 'w') as f:
+        json.dump({'protocol_version': constants.CACHE_PROTOCOL_VERSION,
+                   'fingerprint': fingerprint,
+                   'index': index}, f)
+
+    os.replace(temp_path, index_path)
+
+
 class Cache:
     __slots__ = ('cache_dir', 'module_name', 'checksum',)
 
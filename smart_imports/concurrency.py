@@ -0,0 +1,77 @@
+
+import threading
+import contextlib
+
+
+# caches of smart_imports are filled on the first use, concurrently from different threads,
+# so every key is computed once, while other threads wait for result
+#
+# values, which are computed by import machinery, are not protected by keys locks:
+# import machinery takes modules locks, so thread, which imports module and waits for key lock,
+# deadlocks with thread, which holds key lock and waits for module lock
+#
+# reads of already filled keys do not take locks
+
+# protects registry of keys locks
+_LOCK = threading.Lock()
+
+# key -> [lock, number of threads, which use lock]
+_KEYS_LOCKS = {}
+
+
+@contextlib.contextmanager
+def key_lock(key):
+    # reentrant, since computing of value can trigger imports, which require the same key
+
+    with _LOCK:
+        record = _KEYS_LOCKS.get(key)
+
+        if record is None:
+            record = [threading.RLock(), 0]
+            _KEYS_LOCKS[key] = record
+
+        record[1] += 1
+
+    try:
+        with record[0]:
+            yield
+
+    finally:
+        with _LOCK:
+            record[1] -= 1
+
+            if record[1] == 0:
+                del _KEYS_LOCKS[key]
+
+
+def get_or_create(cache, key, constructor):
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+
+    with key_lock((id(cache), key)):
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+
+        value = constructor()
+
+        cache[key] = value
+
+        return value
+
+
+def get_or_publish(cache, key, constructor):
+    # for constructors, which can import modules: value can be computed by several threads,
+    # but all of them receive the first published one
+
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+
+    value = constructor()
+
+    return cache.setdefault(key, value)
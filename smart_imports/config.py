@@ -2,14 +2,24 @@
 import os
 import json
 import copy
+import hashlib
 import pathlib
 
 from . import constants
+from . import concurrency
 from . import exceptions
 
 
+# directory -> config
 CONFIGS_CACHE = {}
 
+# config path -> (mtime of file, loaded config)
+LOADED_CONFIGS = {}
+
+# directory without config file -> its mtime, when it was checked
+# creation of config file changes mtime of directory, so cached configs of its subdirectories are found again
+CHECKED_DIRECTORIES = {}
+
 
 def expand_cache_dir_path(config_path, cache_dir):
 
@@ -27,36 +37,99 @@ def expand_cache_dir_path(config_path, cache_dir):
     return str(pathlib.Path(config_path).parent / cache_dir)
 
 
+IMPORT_MODES = frozenset(mode.value for mode in constants.IMPORT_MODE)
+
+
 class Config:
-    __slots__ = ('path', 'cache_dir', 'rules')
+    FIELDS = ('path', 'cache_dir', 'import_mode', 'prefetch', 'frozen', 'rules')
+
+    __slots__ = FIELDS + ('_rules_uid',)
 
     def __init__(self):
         self.path = None
         self.cache_dir = None
+        self.import_mode = constants.IMPORT_MODE.EAGER.value
+        self.prefetch = False
+        self.frozen = False
         self.rules = []
+        self._rules_uid = None
 
     @property
     def uid(self):
         return self.path
 
+    # configs with the same rules share rules chain
+    @property
+    def rules_uid(self):
+        if self._rules_uid is None:
+            self._rules_uid = hashlib.sha256(json.dumps(self.rules, sort_keys=True).encode('utf-8')).hexdigest()
+
+        return self._rules_uid
+
     def initialize(self, path, data):
         self.path = path
 
         self.cache_dir = expand_cache_dir_path(config_path=path,
                                                cache_dir=data.get('cache_dir', self.cache_dir))
 
+        self.import_mode = data.get('import_mode', self.import_mode)
+
+        if self.import_mode not in IMPORT_MODES:
+            raise exceptions.ConfigHasWrongFormat(path=path, message='unknown import mode "{}"'.format(self.import_mode))
+
+        self.prefetch = data.get('prefetch', self.prefetch)
+
+        if not isinstance(self.prefetch, bool):
+            raise exceptions.ConfigHasWrongFormat(path=path, message='"prefetch" MUST be boolean')
+
+        self.frozen = data.get('frozen', self.frozen)
+
+        if not isinstance(self.frozen, bool):
+            raise exceptions.ConfigHasWrongFormat(path=path, message='"frozen" MUST be boolean')
+
         if 'rules' not in data:
             raise exceptions.ConfigHasWrongFormat(path=path, message='"rules" MUST be defined')
 
         self.rules = data['rules']
 
-        for rule_config in self.rules:
-            if 'type' not in rule_config:
+        self.initialize_rules(path, self.rules, in_group=False)
+
+    def initialize_rules(self, path, rules_configs, in_group):
+
+        for rule_config in rules_configs:
+            if not isinstance(rule_config, dict) or 'type' not in rule_config:
                 raise exceptions.ConfigHasWrongFormat(path=path, message='rule type does not specified for every rule')
 
+            # import mode is applied to commands, returned by rule of config, so rules of group use mode of group
+            if in_group and 'import_mode' in rule_config:
+                raise exceptions.ConfigHasWrongFormat(path=path, message='import mode MUST be specified for the whole rules group')
+
+            if rule_config.get('import_mode', self.import_mode) not in IMPORT_MODES:
+                raise exceptions.ConfigHasWrongFormat(path=path,
+                                                      message='unknown import mode "{}"'.format(rule_config['import_mode']))
+
+            # some rules persist their indexes
+            if rule_config.get('cache_dir') is not None:
+                rule_config['cache_dir'] = expand_cache_dir_path(config_path=path,
+                                                                 cache_dir=rule_config['cache_dir'])
+
+            # prebuilt index of rule_exported_symbols, its path is expanded in the same way as cache directory
+            if isinstance(rule_config.get('index'), str):
+                rule_config['index'] = expand_cache_dir_path(config_path=path,
+                                                             cache_dir=rule_config['index'])
+
+            if rule_config['type'] == 'rule_group':
+                if not isinstance(rule_config.get('rules', []), list):
+                    raise exceptions.ConfigHasWrongFormat(path=path, message='rules of group MUST be a list')
+
+                self.initialize_rules(path, rule_config.get('rules', []), in_group=True)
+
     def serialize(self):
         return {'path': self.path,
                 'cache_dir': self.cache_dir,
+                'import_mode': self.import_mode,
+                'prefetch': self.prefetch,
+                'frozen': self.frozen,
                 'rules': self.rules}
 
     def clone(self, **kwargs):
@@ -65,11 +138,25 @@ class Config:
         for field, value in kwargs.items():
             setattr(clone, field, value)
 
+        clone._rules_uid = None
+
+        return clone
+
+    # clone, that shares rules with original config, rules MUST NOT be modified
+    def shallow_clone(self, **kwargs):
+        clone = copy.copy(self)
+
+        for field, value in kwargs.items():
+            setattr(clone, field, value)
+
+        if 'rules' in kwargs:
+            clone._rules_uid = None
+
         return clone
 
     def __eq__(self, other):
         return (self.__class__ == other.__class__ and
-                all(getattr(self, field) == getattr(other, field) for field in self.__slots__))
+                all(getattr(self, field) == getattr(other, field) for field in self.FIELDS))
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -89,27 +176,74 @@ def get(path, config_name=constants.CONFIG_FILE_NAME):
     if not os.path.isdir(path):
         path = os.path.dirname(path)
 
+    if path in CONFIGS_CACHE:
+        config = CONFIGS_CACHE[path]
+
+        changed_directory = find_changed_directory(path, config)
+
+        if changed_directory is None:
+            return refresh(config)
+
+        forget_directory(changed_directory)
+
+    return concurrency.get_or_create(CONFIGS_CACHE, path, lambda: find(path, config_name))
+
+
+def find_changed_directory(path, config):
+    # returns directory between path and config, which was changed after config was found for it
+    # removed directories are not checked, since cached config is used for them
+
+    config_directory = os.path.dirname(config.path)
+
+    while path not in ('', '/') and path != config_directory:
+        mtime = get_mtime(path)
+
+        if mtime is not None and mtime != CHECKED_DIRECTORIES.get(path):
+            return path
+
+        path = os.path.dirname(path)
+
+    return None
+
+
+def forget_directory(directory):
+    prefix = os.path.join(directory, '')
+
+    CHECKED_DIRECTORIES.pop(directory, None)
+
+    for path in list(CONFIGS_CACHE):
+        if path == directory or path.startswith(prefix):
+            CONFIGS_CACHE.pop(path, None)
+
+
+def find(path, config_name):
+
     config = None
     checked_paths = []
 
     while path not in ('', '/'):
 
         if path in CONFIGS_CACHE:
-            config = CONFIGS_CACHE[path]
+            config = refresh(CONFIGS_CACHE[path])
             break
 
         checked_paths.append(path)
 
+        # mtime is taken before check of file, so config, created right after check, changes it
+        mtime = get_mtime(path)
+
         config_path = os.path.join(path, config_name)
 
         if os.path.isfile(config_path):
             config = load(config_path)
             break
 
+        CHECKED_DIRECTORIES[path] = mtime
+
         path = os.path.dirname(path)
 
     if config is None:
-        config = DEFAULT_CONFIG.clone(path=path)
+        config = DEFAULT_CONFIG.shallow_clone(path=path)
 
     for path in checked_paths:
         CONFIGS_CACHE[path] = config
@@ -132,4 +266,67 @@ def load(path):
 
     config.initialize(path, data)
 
+    LOADED_CONFIGS[path] = (get_mtime(path), config)
+
     return config
+
+
+def get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def refresh(config):
+    # reload config, if its file changed
+    # if file removed, cached config is used
+
+    if config.path not in LOADED_CONFIGS:
+        return config
+
+    mtime = get_mtime(config.path)
+
+    loaded_mtime, loaded_config = LOADED_CONFIGS[config.path]
+
+    if mtime is None or mtime == loaded_mtime:
+        return loaded_config
+
+    with concurrency.key_lock(config.path):
+        loaded_mtime, loaded_config = LOADED_CONFIGS[config.path]
+
+        # config can be reloaded by other thread
+        if mtime == loaded_mtime:
+            return loaded_config
+
+        new_config = load(config.path)
+
+        for path, cached_config in list(CONFIGS_CACHE.items()):
+            if cached_config.path == config.path:
+                CONFIGS_CACHE[path] = new_config
+
+    return new_config
+
+
+def forget(config_path):
+    # config file changed, added or removed: drop configs, loaded from it, and configs of directories,
+    # which it can affect; returns dropped configs
+    directory = os.path.dirname(config_path)
+    prefix = os.path.join(directory, '')
+
+    LOADED_CONFIGS.pop(config_path, None)
+    CHECKED_DIRECTORIES.pop(directory, None)
+
+    dropped_configs = []
+
+    for path, cached_config in list(CONFIGS_CACHE.items()):
+        if cached_config.path == config_path or path == directory or path.startswith(prefix):
+            dropped_configs.append(CONFIGS_CACHE.pop(path))
+
+    return dropped_configs
+
+
+def reset_cache():
+    CONFIGS_CACHE.clear()
+    LOADED_CONFIGS.clear()
+    CHECKED_DIRECTORIES.clear()
@@ -19,7 +19,26 @@ class VARIABLE_USAGE_TYPE(enum.Enum):
     FULLY_UNDEFINED = 2
 
 
+class IMPORT_MODE(enum.Enum):
+    EAGER = 'eager'
+    LAZY = 'lazy'
+
+
+class WATCH_EVENT(enum.Enum):
+    CREATED = 'created'
+    DELETED = 'deleted'
+    MODIFIED = 'modified'
+    # watcher lost events, all caches must be reset
+    OVERFLOW = 'overflow'
+
+
 CONFIG_FILE_NAME = 'smart_imports.json'
 
 
+# optional features, enabled by environment variables, are imported with smart_imports
+PROFILING_ENVIRONMENT_VARIABLE = 'SMART_IMPORTS_PROFILE'
+ANALYSIS_ENVIRONMENT_VARIABLE = 'SMART_IMPORTS_ANALYSIS'
+MANIFEST_ENVIRONMENT_VARIABLE = 'SMART_IMPORTS_MANIFEST'
+
+
 CACHE_PROTOCOL_VERSION = '1'
@@ -1,7 +1,16 @@
 
+import os
 import sys
+import json
+import hashlib
 import inspect
+import pkgutil
 import importlib
+import importlib.util
+import importlib.machinery
+
+from . import cache
+from . import concurrency
 
 
 def find_target_module():
@@ -16,27 +25,576 @@ def find_target_module():
 
     while frame:
         if frame.f_code.co_name == '<module>':
-            # faster than inspect.getmodule(frame)
-            for module in sys.modules.values():
-                if getattr(module, '__file__', None) == frame.f_code.co_filename:
-                    return module
+            module = get_frame_module(frame)
+
+            if module is not None:
+                return module
 
             return sys.modules[inspect.getmodulename(frame.f_code.co_filename)]
 
         frame = frame.f_back
 
 
+def get_frame_module(frame):
+    # module, which is executed, is already in sys.modules under the name from its globals
+    module = sys.modules.get(frame.f_globals.get('__name__'))
+
+    if module is not None and getattr(module, '__dict__', None) is frame.f_globals:
+        return module
+
+    return get_module_by_file(frame.f_code.co_filename)
+
+
+# file path -> module
+MODULES_BY_FILE = {}
+
+
+def get_module_by_file(path):
+    module = MODULES_BY_FILE.get(path)
+
+    if module is not None and sys.modules.get(module.__name__) is module:
+        return module
+
+    # index is rebuilt only on misses, which are rare, since modules are usually found by name
+    MODULES_BY_FILE.clear()
+
+    for module in list(sys.modules.values()):
+        module_path = getattr(module, '__file__', None)
+
+        if module_path is not None and module_path not in MODULES_BY_FILE:
+            MODULES_BY_FILE[module_path] = module
+
+    return MODULES_BY_FILE.get(path)
+
+
 SPEC_CACHE = {}
 
 
 def find_spec(module_name):
-    if module_name not in SPEC_CACHE:
-        spec = importlib.util.find_spec(module_name)
+    if module_name in SPEC_CACHE:
+        return SPEC_CACHE[module_name]
+
+    return concurrency.get_or_publish(SPEC_CACHE, module_name, lambda: _find_spec(module_name))
+
+
+def _find_spec(module_name):
+    spec = importlib.util.find_spec(module_name)
+
+    # prevent python from determining empty directories ('fixtures' directory, 'jinja2' templates for django) as namespace packages
+    if spec is not None and spec.origin is None:
+        spec = None
+
+    return spec
+
+
+# directory path -> DirectoryInfo
+MODULES_INDEX = {}
+
+
+class DirectoryInfo:
+    __slots__ = ('mtime', 'modules', 'packages')
+
+    def __init__(self, mtime, modules, packages):
+        self.mtime = mtime
+        self.modules = modules
+        self.packages = packages
+
+    def __contains__(self, name):
+        return name in self.modules or name in self.packages
+
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _module_name(filename, suffixes):
+    for suffix in suffixes:
+        if filename.endswith(suffix):
+            name = filename[:-len(suffix)]
+
+            if name and '.' not in name:
+                return name
+
+    return None
+
+
+def _has_init(path, suffixes):
+    # fast path for the most common case
+    if os.path.isfile(os.path.join(path, '__init__.py')):
+        return True
+
+    # iterator of os.scandir is not a context manager before python 3.6
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return False
+
+    for entry in entries:
+        if entry.name.startswith('__init__.') and _module_name(entry.name, suffixes) == '__init__':
+            return True
+
+    return False
+
+
+def scan_directory(path):
+    # same semantic as pkgutil.iter_modules: modules and regular packages only,
+    # directories without __init__ are not treated as (namespace) packages
+    suffixes = importlib.machinery.all_suffixes()
+
+    modules = set()
+    packages = set()
+
+    try:
+        entries = list(os.scandir(path))
+    except NotADirectoryError:
+        # zip archives and other paths, supported by custom path hooks
+        for module_finder, name, ispkg in pkgutil.iter_modules(path=[path]):
+            (packages if ispkg else modules).add(name)
+
+        return DirectoryInfo(mtime=_get_mtime(path), modules=frozenset(modules), packages=frozenset(packages))
+    except OSError:
+        return DirectoryInfo(mtime=None, modules=frozenset(), packages=frozenset())
+
+    mtime = _get_mtime(path)
+
+    for entry in entries:
+        if entry.is_dir():
+            if '.' not in entry.name and _has_init(entry.path, suffixes):
+                packages.add(entry.name)
+            continue
+
+        name = _module_name(entry.name, suffixes)
+
+        if name is not None and name != '__init__':
+            modules.add(name)
+
+    modules -= packages
+
+    return DirectoryInfo(mtime=mtime, modules=frozenset(modules), packages=frozenset(packages))
+
+
+def get_directory_info(path):
+    if path in MODULES_INDEX:
+        return MODULES_INDEX[path]
+
+    return concurrency.get_or_create(MODULES_INDEX, path, lambda: scan_directory(path))
+
+
+def get_actual_directory_info(path):
+    # rescans directory, if it has been changed after it was indexed
+    info = get_directory_info(path)
+
+    if info.mtime is not None and info.mtime == _get_mtime(path):
+        return info
+
+    new_info = scan_directory(path)
+
+    MODULES_INDEX[path] = new_info
+
+    return new_info
+
+
+def find_package_modules(paths):
+    if len(paths) == 1:
+        info = get_actual_directory_info(paths[0])
+        return info.modules | info.packages
+
+    names = set()
+
+    for path in paths:
+        info = get_actual_directory_info(path)
+        names |= info.modules
+        names |= info.packages
+
+    return frozenset(names)
+
+
+def has_module(paths, name):
+    for path in paths:
+        if name in get_directory_info(path):
+            return True
+
+    # modification times are checked only on misses, since found modules are imported by python machinery,
+    # which reports removed modules itself
+    for path in paths:
+        if name in get_actual_directory_info(path):
+            return True
+
+    return False
+
+
+def find_package_paths(package_name):
+    package = sys.modules.get(package_name)
+
+    if package is not None:
+        return getattr(package, '__path__', None)
+
+    spec = find_spec(package_name)
+
+    if spec is None:
+        return None
+
+    return spec.submodule_search_locations
+
+
+def find_namespace_directories(path):
+    # directories without __init__, which can be portions of namespace packages (PEP 420)
+    suffixes = importlib.machinery.all_suffixes()
+
+    names = set()
+
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return names
+
+    for entry in entries:
+        if entry.name.isidentifier() and entry.is_dir() and not _has_init(entry.path, suffixes):
+            names.add(entry.name)
+
+    return names
+
+
+def walk_package_modules(path, package_name, names, namespaces=False):
+    # collect names of public submodules of package, without caching directories info
+    # with namespaces, directories without __init__ are walked too and are counted, if they contain modules
+    info = scan_directory(path)
+
+    for name in info.modules | info.packages:
+        if name.startswith('_'):
+            continue
+
+        names.add('{}.{}'.format(package_name, name))
+
+    for name in info.packages:
+        if name.startswith('_'):
+            continue
+
+        walk_package_modules(os.path.join(path, name), '{}.{}'.format(package_name, name), names, namespaces=namespaces)
+
+    if not namespaces:
+        return names
+
+    for name in find_namespace_directories(path):
+        if name.startswith('_'):
+            continue
+
+        full_name = '{}.{}'.format(package_name, name)
+
+        namespace_names = walk_package_modules(os.path.join(path, name), full_name, set(), namespaces=True)
+
+        if namespace_names:
+            names.add(full_name)
+            names |= namespace_names
+
+    return names
+
+
+def forget_specs(package_name, names):
+    # drops cached specs of package's modules, which were added or removed
+    for name in names:
+        SPEC_CACHE.pop('{}.{}'.format(package_name, name), None)
+
+
+def get_directory_packages(path):
+    # names of imported packages, which modules are in directory ('' for top-level modules from sys.path)
+    packages_names = []
+
+    if path in (_normalize_sys_path_entry(entry) for entry in sys.path if isinstance(entry, str)):
+        packages_names.append('')
+
+    for module_name, module in list(sys.modules.items()):
+        module_paths = getattr(module, '__path__', None)
+
+        if module_paths is not None and isinstance(module_paths, list) and path in module_paths:
+            packages_names.append(module_name)
+
+    return packages_names
+
+
+def get_full_name(package_name, name):
+    if not package_name:
+        return name
+
+    return '{}.{}'.format(package_name, name)
+
+
+def invalidate_directory(path):
+    # drops cached info about modules of changed directory
+    # returns names of added and removed modules, if they can be determined
+
+    global TOP_LEVEL_INDEX
+
+    packages_names = get_directory_packages(path)
+
+    info = MODULES_INDEX.pop(path, None)
+
+    if '' in packages_names:
+        TOP_LEVEL_INDEX = None
+        DISTRIBUTIONS_TOP_LEVEL_NAMES.pop(path, None)
+
+    if info is None:
+        # listing was not cached, so only specs can be stale: missing modules and modules from removed files
+        for package_name in packages_names:
+            for name, spec in list(SPEC_CACHE.items()):
+                if name.rpartition('.')[0] != package_name:
+                    continue
+
+                if spec is None or (spec.origin is not None and not os.path.exists(spec.origin)):
+                    SPEC_CACHE.pop(name, None)
+
+        return None
+
+    new_info = get_directory_info(path)
+
+    changed_names = (info.modules ^ new_info.modules) | (info.packages ^ new_info.packages)
+
+    for package_name in packages_names:
+        for name in changed_names:
+            SPEC_CACHE.pop(get_full_name(package_name, name), None)
+
+    return changed_names
+
+
+def forget_directory(path):
+    # directory removed, drop it and its subdirectories
+    prefix = os.path.join(path, '')
+
+    for directory in list(MODULES_INDEX):
+        if directory == path or directory.startswith(prefix):
+            MODULES_INDEX.pop(directory, None)
+
+
+def reset_modules_index():
+    MODULES_INDEX.clear()
+
+
+TOP_LEVEL_INDEX_NAME = 'top_level_modules'
+
+_STANDARD_FINDERS = (importlib.machinery.BuiltinImporter,
+                     importlib.machinery.FrozenImporter,
+                     importlib.machinery.PathFinder)
+
+
+def is_standard_finder(finder):
+    # subclasses (for example, import hook of smart_imports) find the same modules as standard finders
+    return isinstance(finder, type) and issubclass(finder, _STANDARD_FINDERS)
+
+
+def _get_entries_mtimes(entries):
+    return [_get_mtime(_normalize_sys_path_entry(entry)) for entry in entries]
+
+
+class TopLevelModulesIndex:
+    __slots__ = ('sys_path', 'names', 'entries', 'mtimes')
+
+    def __init__(self, sys_path, names, entries, mtimes):
+        self.sys_path = sys_path
+        self.names = names
+        self.entries = entries
+        self.mtimes = mtimes
+
+    def is_actual(self):
+        return self.sys_path == sys.path
+
+    def refresh(self):
+        # installation or removal of top-level module changes modification time of its sys.path entry
+        # returns True, if index has been rebuilt
+        mtimes = _get_entries_mtimes(self.entries)
+
+        if mtimes == self.mtimes:
+            return False
+
+        for entry, old_mtime, new_mtime in zip(self.entries, self.mtimes, mtimes):
+            if old_mtime != new_mtime:
+                DISTRIBUTIONS_TOP_LEVEL_NAMES.pop(_normalize_sys_path_entry(entry), None)
+
+        self.names = frozenset(collect_top_level_modules(self.entries))
+        self.mtimes = mtimes
+
+        return True
+
+    def has_module(self, name):
+        if name in self.names:
+            return True
+
+        if name in sys.modules:
+            spec = getattr(sys.modules[name], '__spec__', None)
+            return spec is not None and spec.origin is not None
+
+        # modules, provided by custom finders, can not be indexed
+        for finder in sys.meta_path:
+            if is_standard_finder(finder) or not hasattr(finder, 'find_spec'):
+                continue
+
+            try:
+                spec = finder.find_spec(name, None)
+            except Exception:
+                continue
+
+            if spec is not None and spec.origin is not None:
+                return True
+
+        return False
+
+
+TOP_LEVEL_INDEX = None
+
+
+def _normalize_sys_path_entry(entry):
+    return entry if entry else os.getcwd()
+
+
+def get_sys_path_fingerprint(sys_path):
+    data = [(entry, _get_mtime(_normalize_sys_path_entry(entry))) for entry in sys_path]
+    return hashlib.sha256(json.dumps(data).encode('utf-8')).hexdigest()
+
+
+# sys.path entry -> names from top_level.txt of distributions, installed into it
+DISTRIBUTIONS_TOP_LEVEL_NAMES = {}
+
+
+def _collect_distributions_top_level_names(entry):
+    # importlib.metadata is heavy, import it only when required
+    try:
+        import importlib.metadata as importlib_metadata
+    except ImportError:
+        # python < 3.8
+        return frozenset()
+
+    if entry not in DISTRIBUTIONS_TOP_LEVEL_NAMES:
+        names = set()
+
+        for distribution in importlib_metadata.distributions(path=[entry]):
+            top_level = distribution.read_text('top_level.txt')
+
+            if not top_level:
+                continue
+
+            names.update(name.strip() for name in top_level.splitlines() if name.strip().isidentifier())
+
+        DISTRIBUTIONS_TOP_LEVEL_NAMES[entry] = frozenset(names)
+
+    return DISTRIBUTIONS_TOP_LEVEL_NAMES[entry]
+
+
+def collect_top_level_modules(sys_path):
+    names = set(sys.builtin_module_names)
+
+    entries = [_normalize_sys_path_entry(entry) for entry in sys_path]
+
+    for entry in entries:
+        names.update(find_package_modules([entry]))
+
+    # top_level.txt lists roots of namespace packages and can be outdated,
+    # so only names, which are not found in directories, are checked by import machinery
+    for entry in entries:
+        for name in _collect_distributions_top_level_names(entry):
+            if name not in names and _find_spec(name) is not None:
+                names.add(name)
+
+    return names
+
+
+def get_top_level_index(cache_dir=None):
+    global TOP_LEVEL_INDEX
+
+    if TOP_LEVEL_INDEX is not None and TOP_LEVEL_INDEX.is_actual():
+        return TOP_LEVEL_INDEX
+
+    with concurrency.key_lock(TOP_LEVEL_INDEX_NAME):
+        if TOP_LEVEL_INDEX is not None and TOP_LEVEL_INDEX.is_actual():
+            return TOP_LEVEL_INDEX
+
+        TOP_LEVEL_INDEX = build_top_level_index(cache_dir)
+
+    return TOP_LEVEL_INDEX
+
+
+def build_top_level_index(cache_dir):
+    sys_path = [entry for entry in sys.path if isinstance(entry, str)]
+
+    mtimes = _get_entries_mtimes(sys_path)
+
+    names = None
+
+    if cache_dir is not None:
+        fingerprint = get_sys_path_fingerprint(sys_path)
+        names = cache.get_index(cache_dir=cache_dir,
+                                index_name=TOP_LEVEL_INDEX_NAME,
+                                fingerprint=fingerprint)
+
+    if names is None:
+        names = sorted(collect_top_level_modules(sys_path))
+
+        if cache_dir is not None:
+            cache.set_index(cache_dir=cache_dir,
+                            index_name=TOP_LEVEL_INDEX_NAME,
+                            fingerprint=fingerprint,
+                            index=names)
+
+    return TopLevelModulesIndex(sys_path=list(sys.path),
+                                names=frozenset(names),
+                                entries=sys_path,
+                                mtimes=mtimes)
+
+
+def reset_top_level_index():
+    global TOP_LEVEL_INDEX
+    TOP_LEVEL_INDEX = None
+    DISTRIBUTIONS_TOP_LEVEL_NAMES.clear()
+
+
+def get_distributions_fingerprint(sys_path):
+    # names of distributions metadata directories contain versions, so it is enough to list them
+    distributions = []
+
+    for entry in sys_path:
+        try:
+            names = os.listdir(_normalize_sys_path_entry(entry))
+        except OSError:
+            continue
+
+        distributions.extend(name for name in names if name.endswith(('.dist-info', '.egg-info')))
+
+    data = [sys_path, sorted(distributions)]
+
+    return hashlib.sha256(json.dumps(data).encode('utf-8')).hexdigest()
+
+
+def _get_not_stdlib_sys_path(sys_path):
+    stdlib_directory = os.path.dirname(os.__file__)
+
+    stdlib_paths = {stdlib_directory,
+                    os.path.join(stdlib_directory, 'lib-dynload')}
+
+    return [entry for entry in sys_path if _normalize_sys_path_entry(entry) not in stdlib_paths]
+
+
+def collect_submodules(packages=None, sys_path=None):
+    # returns {"package_submodule": "package.submodule"}
+    if sys_path is None:
+        sys_path = [entry for entry in sys.path if isinstance(entry, str)]
+
+    submodules = {}
+
+    for entry in _get_not_stdlib_sys_path(sys_path):
+        entry = _normalize_sys_path_entry(entry)
+
+        # namespace packages (like "google") can be split between several entries
+        packages_names = scan_directory(entry).packages | find_namespace_directories(entry)
 
-        # prevent python from determining empty directories ('fixtures' directory, 'jinja2' templates for django) as namespace packages
-        if spec is not None and spec.origin is None:
-            spec = None
+        for package_name in sorted(packages_names):
+            if packages is not None and package_name not in packages:
+                continue
 
-        SPEC_CACHE[module_name] = spec
+            for module_name in sorted(walk_package_modules(os.path.join(entry, package_name),
+                                                           package_name,
+                                                           set(),
+                                                           namespaces=True)):
+                submodules.setdefault(module_name.replace('.', '_'), module_name)
 
-    return SPEC_CACHE[module_name]
+    return submodules
@@ -31,6 +31,24 @@ class NoImportFound(ImporterError):
               'lines: {lines}'
 
 
+# raised from module's __getattr__, installed by smart_imports.lazy()
+# derived from AttributeError to not break hasattr, getattr with default and "from module import name"
+# lines are not searched, since attributes are probed often (hasattr, getattr with default)
+class NoLazyImportFound(NoImportFound, AttributeError):
+    MESSAGE = 'can not find import rule for variable "{variable}"\n\n' \
+              'module: "{module}"\n' \
+              'file: {path}'
+
+
+class LazyImportsNotSupported(ImporterError):
+    MESSAGE = 'smart_imports.lazy() requires module __getattr__ (PEP 562), which is available from Python 3.7, ' \
+              'current version: {version}'
+
+
+class NoModuleSource(ImporterError):
+    MESSAGE = 'source of module "{module}" is not available, use analysis artifact to process modules without sources'
+
+
 class RulesError(ImporterError):
     MESSAGE = None
 
@@ -41,3 +59,43 @@ class RuleAlreadyRegistered(RulesError):
 
 class RuleNotRegistered(RulesError):
     MESSAGE = 'rule "{rule}" has not registered'
+
+
+class RuleCanNotBeLoaded(RulesError):
+    MESSAGE = 'rule "{rule}" can not be loaded from "{path}": {error}'
+
+
+class RuleGroupHasOverlaps(RulesError):
+    MESSAGE = 'rules {rules} of unordered group found imports for the same variable "{variable}"'
+
+
+class ArtifactError(SmartImportsError):
+    MESSAGE = None
+
+
+class ArtifactHasWrongFormat(ArtifactError):
+    MESSAGE = 'analysis artifact "{path}" has wrong format: {message}'
+
+
+class ModuleSourcesNotFound(ArtifactError):
+    MESSAGE = 'sources of module "{module}" are not found'
+
+
+class ModuleNotInArtifact(ArtifactError):
+    MESSAGE = 'module "{module}" is not found in analysis artifact "{path}", rebuild artifact with its package'
+
+
+class ModuleChangedAfterArtifactBuild(ArtifactError):
+    MESSAGE = 'code of module "{module}" does not match analysis artifact "{path}", rebuild artifact'
+
+
+class ManifestHasWrongFormat(ArtifactError):
+    MESSAGE = 'resolution manifest "{path}" has wrong format: {message}'
+
+
+class SymbolsIndexHasWrongFormat(ArtifactError):
+    MESSAGE = 'exported symbols index "{path}" has wrong format: {message}'
+
+
+class ModuleCanNotBeFrozen(ArtifactError):
+    MESSAGE = 'module "{module}" can not be frozen, variables {variables} are imported by custom rules'
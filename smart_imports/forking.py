@@ -0,0 +1,59 @@
+
+import gc
+
+from . import rules
+from . import config
+from . import discovering
+from . import prefetching
+
+
+# servers with preloading of application (gunicorn --preload, uWSGI) fork workers from master process.
+# Pages of master's memory are shared by workers, until they are written: caches, filled in a worker,
+# and objects, visited by garbage collector of a worker, are copied into worker's private memory.
+
+
+def prepare_rules():
+    for chain in list(rules._RULES.values()):
+        for rule in chain:
+            rule.prepare()
+
+
+def compact(cache):
+    # dict after many insertions and deletions has sparse table, copy of dict is sized by number of items
+    # caches are updated in place, since other modules reference them
+    items = dict(cache)
+    cache.clear()
+    cache.update(items)
+
+
+def compact_caches():
+    # names of distributions are required only while top-level index is built
+    discovering.DISTRIBUTIONS_TOP_LEVEL_NAMES.clear()
+
+    for cache in (discovering.SPEC_CACHE,
+                  discovering.MODULES_INDEX,
+                  discovering.MODULES_BY_FILE,
+                  config.CONFIGS_CACHE,
+                  config.LOADED_CONFIGS,
+                  config.CHECKED_DIRECTORIES,
+                  rules._RULES,
+                  rules._CONFIGS_CHAINS):
+        compact(cache)
+
+
+def prepare_for_fork():
+    # call in master process after import of application, right before workers are forked
+
+    prepare_rules()
+
+    # threads are not copied into forked process, executor will be created again in worker
+    prefetching.shutdown()
+
+    compact_caches()
+
+    gc.collect()
+
+    # objects of master are moved to permanent generation, so collections in workers do not touch them
+    # python >= 3.7
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
@@ -0,0 +1,199 @@
+
+import os
+import sys
+import hashlib
+import importlib
+import importlib.machinery
+
+from . import rules
+from . import symbols
+from . import artifacts
+from . import exceptions
+
+
+# frozen modules do not analyze sources and do not apply rules at runtime:
+# explicit imports, found for module by "python -m smart_imports freeze", are stored in sidecar file near module
+# and smart_imports.all() executes sidecar in module namespace, if config has "frozen": true
+# sidecar stores checksum of module source, so imports of module, changed after freezing, are resolved as usual
+
+SIDECAR_SUFFIX = '.smart_imports.py'
+
+HEADER = '# generated by "python -m smart_imports freeze", do not edit\n'
+
+CHECKSUM_LINE = '# source: {}\n'
+
+# sidecars are not used, while modules are resolved for freezing
+ENABLED = True
+
+
+def get_sidecar_path(module_path):
+    # name with dot can not be imported and is not treated as local module by rules
+    return os.path.splitext(module_path)[0] + SIDECAR_SUFFIX
+
+
+def get_checksum_line(module_path):
+    # checksum of source, not of code object, so sidecars do not depend on python version
+    try:
+        with open(module_path, 'rb') as f:
+            return CHECKSUM_LINE.format(hashlib.sha256(f.read()).hexdigest())
+    except OSError:
+        return None
+
+
+def execute(module):
+    # returns False, if module has no sidecar or has been changed after freezing
+
+    if not ENABLED:
+        return False
+
+    path = get_sidecar_path(module.__file__)
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            f.readline()
+            checksum_line = f.readline()
+    except OSError:
+        return False
+
+    if checksum_line != get_checksum_line(module.__file__):
+        return False
+
+    # loader caches bytecode of sidecar like for usual module
+    name = module.__name__ + SIDECAR_SUFFIX[:-3]
+
+    code = importlib.machinery.SourceFileLoader(name, path).get_code(name)
+
+    exec(code, module.__dict__)
+
+    return True
+
+
+def import_lazily(module_name, target_attribute, source_module, source_attribute):
+    rules.LazyImportCommand(target_module=sys.modules[module_name],
+                            target_attribute=target_attribute,
+                            source_module=source_module,
+                            source_attribute=source_attribute)()
+
+
+def get_import_statement(variable, source_module, source_attribute):
+    if source_attribute is not None:
+        if variable == source_attribute:
+            return 'from {} import {}'.format(source_module, source_attribute)
+
+        return 'from {} import {} as {}'.format(source_module, source_attribute, variable)
+
+    if variable == source_module:
+        return 'import {}'.format(source_module)
+
+    return 'import {} as {}'.format(source_module, variable)
+
+
+def create_sidecar(plan, checksum_line):
+    lines = [HEADER, checksum_line]
+
+    lazy_lines = []
+
+    for variable in sorted(plan.imports):
+        command_class, source_module, source_attribute = plan.imports[variable]
+
+        if command_class is rules.NoImportCommand:
+            continue
+
+        if command_class is rules.LazyImportCommand:
+            lazy_lines.append('smart_imports.frozen.import_lazily(__name__, {!r}, {!r}, {!r})\n'.format(variable,
+                                                                                                        source_module,
+                                                                                                        source_attribute))
+            continue
+
+        lines.append(get_import_statement(variable, source_module, source_attribute) + '\n')
+
+    if lazy_lines:
+        lines.append('\nimport smart_imports.frozen\n\n')
+        lines.extend(lazy_lines)
+
+    return ''.join(lines)
+
+
+def find_modules(modules_names):
+    # returns [(module name, path to source)] of modules, which use smart_imports
+
+    files = []
+
+    for module_name in modules_names:
+        module_files = symbols.find_source_files(module_name, include_private=True)
+
+        if not module_files:
+            raise exceptions.ModuleSourcesNotFound(module=module_name)
+
+        for file_module_name, path in module_files:
+            with open(path, 'rb') as f:
+                if artifacts.MARKER.encode('utf-8') in f.read():
+                    files.append((file_module_name, path))
+
+    return files
+
+
+def resolve_plan(module_name):
+    # module is imported, so its imports are found by the same logic, as at runtime
+    global ENABLED
+
+    # imported here, since importer uses this module
+    from . import importer
+
+    ENABLED = False
+
+    try:
+        importlib.import_module(module_name)
+    finally:
+        ENABLED = True
+
+    plan = importer.APPLIED_PLANS.get(module_name)
+
+    if plan is None:
+        return None
+
+    not_frozen_variables = [variable for variable in plan.variables if variable not in plan.imports]
+
+    if not_frozen_variables:
+        raise exceptions.ModuleCanNotBeFrozen(module=module_name, variables=', '.join(not_frozen_variables))
+
+    return plan
+
+
+def resolve(module_name, module_path):
+    plan = resolve_plan(module_name)
+
+    if plan is None:
+        return None
+
+    return create_sidecar(plan, get_checksum_line(module_path))
+
+
+def freeze(modules_names, check=False):
+    # writes sidecars or, with check, returns paths of sidecars, which differ from runtime resolution
+
+    wrong_sidecars = []
+
+    for module_name, path in find_modules(modules_names):
+        sidecar = resolve(module_name, path)
+
+        if sidecar is None:
+            continue
+
+        sidecar_path = get_sidecar_path(path)
+
+        if check:
+            try:
+                with open(sidecar_path) as f:
+                    if f.read() == sidecar:
+                        continue
+            except OSError:
+                pass
+
+            wrong_sidecars.append(sidecar_path)
+            continue
+
+        with open(sidecar_path, 'w') as f:
+            f.write(sidecar)
+
+    return wrong_sidecars
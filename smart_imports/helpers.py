@@ -14,6 +14,8 @@ def unload_test_packages():
                 del sys.modules[key]
 
     discovering.SPEC_CACHE.clear()
+    discovering.reset_modules_index()
+    discovering.reset_top_level_index()
 
 
 @contextlib.contextmanager
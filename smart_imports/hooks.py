@@ -0,0 +1,191 @@
+
+import sys
+import ast
+import importlib.machinery
+
+from . import config
+from . import importer
+from . import exceptions
+
+
+# import hook allows to parse module source only once:
+# loader builds AST, analyzes it and compiles the same AST,
+# analysis is attached to module spec and imports are found by rules before module execution,
+# so smart_imports.all() only executes them
+#
+# also hook processes all modules of activated packages, without calls of smart_imports.all()
+
+MARKER = b'smart_imports'
+
+# modules of activated packages with this comment are not processed
+OPT_OUT_MARKER = '# smart_imports: off'
+
+# package name -> config (found on the first loaded module of the package)
+ACTIVATED_PACKAGES = {}
+
+
+def get_activated_package(module_name):
+    if not ACTIVATED_PACKAGES:
+        return None
+
+    while module_name:
+        if module_name in ACTIVATED_PACKAGES:
+            return module_name
+
+        module_name = module_name.rpartition('.')[0]
+
+    return None
+
+
+def calls_all(tree):
+    # imports are found before module execution only for modules, which call smart_imports.all() on the top level
+    for node in tree.body:
+        if not isinstance(node, ast.Expr) or not isinstance(node.value, ast.Call):
+            continue
+
+        call = node.value
+
+        if (isinstance(call.func, ast.Attribute) and
+                call.func.attr == 'all' and
+                isinstance(call.func.value, ast.Name) and
+                call.func.value.id == 'smart_imports' and
+                not call.args and
+                not call.keywords):
+            return True
+
+    return False
+
+
+class SmartImportsLoader(importlib.machinery.SourceFileLoader):
+
+    def __init__(self, fullname, path):
+        super().__init__(fullname, path)
+        self.analysis = None
+        self.calls_all = False
+
+    def source_to_code(self, data, path, *, _optimize=-1):
+        # process only modules, which use smart_imports
+        if MARKER not in data and get_activated_package(self.name) is None:
+            return super().source_to_code(data, path, _optimize=_optimize)
+
+        if OPT_OUT_MARKER.encode('utf-8') in data:
+            return super().source_to_code(data, path, _optimize=_optimize)
+
+        tree = ast.parse(data, filename=path)
+
+        variables, variables_scopes = importer.extract_tree_variables(tree)
+
+        self.analysis = importer.ModuleAnalysis(variables=variables,
+                                                variables_scopes=variables_scopes)
+
+        self.calls_all = calls_all(tree)
+
+        return compile(tree, path, 'exec', dont_inherit=True, optimize=_optimize)
+
+    def exec_module(self, module):
+        code = self.get_code(module.__name__)
+
+        if code is None:
+            raise ImportError('cannot load module {!r} when get_code() returns None'.format(module.__name__))
+
+        analysis = self.analysis
+
+        # analysis exists only if module compiled from source, not loaded from bytecode cache
+        if analysis is not None:
+            module.__spec__.loader_state = analysis
+            self.analysis = None
+
+        package_name = get_activated_package(module.__name__)
+
+        if package_name is not None:
+            self.import_names(package_name, module)
+
+        elif analysis is not None and self.calls_all:
+            self.resolve_names(module, analysis)
+
+        exec(code, module.__dict__)
+
+    def resolve_names(self, module, analysis):
+        try:
+            importer.resolve_names(module, analysis)
+        except exceptions.SmartImportsError:
+            # errors are raised by smart_imports.all(), as without hook
+            analysis.commands = None
+
+    def import_names(self, package_name, module):
+        source = None
+
+        if not isinstance(module.__spec__.loader_state, importer.ModuleAnalysis):
+            source = self.get_source(module.__name__)
+
+            if OPT_OUT_MARKER in source:
+                return
+
+        # all modules of package share single config
+        if ACTIVATED_PACKAGES[package_name] is None:
+            ACTIVATED_PACKAGES[package_name] = config.get(module.__file__)
+
+        importer.import_names(module_config=ACTIVATED_PACKAGES[package_name],
+                              module=module,
+                              source=source)
+
+        module.__spec__.loader_state = importer.MODULE_PROCESSED
+
+
+class SmartImportsFinder(importlib.machinery.PathFinder):
+    # finder replaces PathFinder in sys.meta_path, so modules are not searched twice,
+    # other methods (invalidate_caches, find_distributions) are inherited from it
+
+    @classmethod
+    def find_spec(cls, fullname, path=None, target=None):
+        spec = super().find_spec(fullname, path, target)
+
+        if spec is None or type(spec.loader) is not importlib.machinery.SourceFileLoader:
+            return spec
+
+        spec.loader = SmartImportsLoader(fullname, spec.origin)
+
+        return spec
+
+
+# True, if PathFinder was replaced by hook and must be restored
+PATH_FINDER_REPLACED = False
+
+
+def is_installed():
+    return SmartImportsFinder in sys.meta_path
+
+
+def install():
+    global PATH_FINDER_REPLACED
+
+    if is_installed():
+        return
+
+    # builtin and frozen modules are found by other finders
+    if importlib.machinery.PathFinder in sys.meta_path:
+        sys.meta_path[sys.meta_path.index(importlib.machinery.PathFinder)] = SmartImportsFinder
+        PATH_FINDER_REPLACED = True
+    else:
+        sys.meta_path.append(SmartImportsFinder)
+        PATH_FINDER_REPLACED = False
+
+
+def uninstall():
+    if not is_installed():
+        return
+
+    if PATH_FINDER_REPLACED:
+        sys.meta_path[sys.meta_path.index(SmartImportsFinder)] = importlib.machinery.PathFinder
+    else:
+        sys.meta_path.remove(SmartImportsFinder)
+
+
+def activate(package_name):
+    # process all modules of package on import, they do not need to call smart_imports.all()
+    ACTIVATED_PACKAGES.setdefault(package_name, None)
+    install()
+
+
+def deactivate(package_name):
+    ACTIVATED_PACKAGES.pop(package_name, None)
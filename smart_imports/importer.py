@@ -1,29 +1,111 @@
 
+import os
 import ast
+import sys
+import weakref
+import importlib
+import collections
 
 from . import cache
 from . import rules
 from . import config
+from . import constants
+from . import lazy_modules
 from . import ast_parser
 from . import exceptions
 from . import scopes_tree
 from . import discovering
 
 
+# optional features are not imported with smart_imports, until they are enabled:
+# by environment variables or by user, who imports and enables them
+PROFILING_MODULE = __package__ + '.profiling'
+ARTIFACTS_MODULE = __package__ + '.artifacts'
+MANIFEST_MODULE = __package__ + '.manifest'
+
+OPTIONAL_FEATURES = ((PROFILING_MODULE, constants.PROFILING_ENVIRONMENT_VARIABLE),
+                     (ARTIFACTS_MODULE, constants.ANALYSIS_ENVIRONMENT_VARIABLE),
+                     (MANIFEST_MODULE, constants.MANIFEST_ENVIRONMENT_VARIABLE))
+
+
+def get_enabled_feature(module_name):
+    # returns module of optional feature, if it is imported and enabled
+    feature = sys.modules.get(module_name)
+
+    if feature is None or not feature.is_enabled():
+        return None
+
+    return feature
+
+
+def import_enabled_features():
+    for module_name, environment_variable in OPTIONAL_FEATURES:
+        if os.environ.get(environment_variable):
+            importlib.import_module(module_name)
+
+
+def get_import_mode(module_config, rule):
+    return rule.config.get('import_mode', module_config.import_mode)
+
+
+def apply_import_mode(module_config, rule, command):
+    if get_import_mode(module_config, rule) != constants.IMPORT_MODE.LAZY.value:
+        return command
+
+    if isinstance(command, rules.NoImportCommand):
+        return command
+
+    return rules.LazyImportCommand(target_module=command.target_module,
+                                   target_attribute=command.target_attribute,
+                                   source_module=command.source_module,
+                                   source_attribute=command.source_attribute)
+
+
 def apply_rules(module_config, module, variable):
 
+    profiling = get_enabled_feature(PROFILING_MODULE)
+
     for rule in rules.get_for_config(module_config):
-        command = rule.apply(module, variable)
+        if profiling is not None:
+            command = profiling.apply_rule(module_config.uid, rule, module, variable)
+        else:
+            command = rule.apply(module, variable)
 
         if command:
-            return command
+            return apply_import_mode(module_config, rule, command)
 
     return None
 
 
+# returns {variable: command} for all found variables
+def apply_rules_many(module_config, module, variables):
+
+    commands = {}
+
+    profiling = get_enabled_feature(PROFILING_MODULE)
+
+    for rule in rules.get_for_config(module_config):
+        if not variables:
+            break
+
+        if profiling is not None:
+            found_commands = profiling.apply_rule_many(module_config.uid, rule, module, variables)
+        else:
+            found_commands = rule.apply_many(module, variables)
+
+        for variable, command in found_commands.items():
+            commands[variable] = apply_import_mode(module_config, rule, command)
+
+        variables = [variable for variable in variables if variable not in found_commands]
+
+    return commands
+
+
 def get_module_scopes_tree(source):
-    tree = ast.parse(source)
+    return get_tree_scopes(ast.parse(source))
 
+
+def get_tree_scopes(tree):
     analyzer = ast_parser.Analyzer()
 
     analyzer.visit(tree)
@@ -36,8 +118,12 @@ def variables_processor(variables):
 
 
 def extract_variables(source):
+    return extract_tree_variables(ast.parse(source))
+
 
-    root_scope = get_module_scopes_tree(source)
+def extract_tree_variables(tree):
+
+    root_scope = get_tree_scopes(tree)
 
     variables = scopes_tree.search_candidates_to_import(root_scope)
 
@@ -49,34 +135,261 @@ def extract_variables(source):
     return variables, variables_scopes
 
 
-def process_module(module_config, module, variables_processor=variables_processor):
+class ModuleAnalysis:
+    # results of module analysis, prepared by import hook while module compiling
+    # commands are found by hook before module execution, if module calls smart_imports.all()
+    __slots__ = ('variables', 'variables_scopes', 'module_config', 'commands')
 
-    source = module.__loader__.get_source(module.__name__)
+    def __init__(self, variables, variables_scopes, module_config=None, commands=None):
+        self.variables = variables
+        self.variables_scopes = variables_scopes
+        self.module_config = module_config
+        self.commands = commands
+
+
+def pop_module_analysis(module, resolved=False):
+    # with resolved, analysis is returned only if its commands are found
+    spec = getattr(module, '__spec__', None)
+
+    analysis = getattr(spec, 'loader_state', None)
+
+    if not isinstance(analysis, ModuleAnalysis):
+        return None
+
+    if resolved and analysis.commands is None:
+        return None
+
+    # analysis is required only once, do not keep it in memory
+    spec.loader_state = None
+
+    return analysis
+
+
+class ModulePlan:
+    # imports, applied to module by its last processing
+    # on module reload only changed names are resolved again
+    __slots__ = ('module', 'config_key', 'checksum', 'variables', 'imports', 'bindings', 'package_modules')
+
+    def __init__(self, module, config_key, checksum, variables, imports, package_modules):
+        # weak reference, since module can be unloaded and imported again as a new object
+        self.module = weakref.ref(module)
+        self.config_key = config_key
+        self.checksum = checksum
+        self.variables = variables
+
+        # variable -> (command class, source module, source attribute)
+        self.imports = imports
+
+        # variable -> value, bound to module by import
+        self.bindings = {}
+
+        # names of modules in module's package, when imports were resolved
+        self.package_modules = package_modules
+
+    def record_bindings(self, module, commands):
+        self.bindings = {command.target_attribute: module.__dict__[command.target_attribute]
+                         for command in commands
+                         if command.target_attribute in self.imports and command.target_attribute in module.__dict__}
+
+    def is_bound(self, module, variable):
+        # module's value still is the value, imported by plan (or value, to which deferred handle was resolved)
+        if variable not in self.bindings or variable not in module.__dict__:
+            return False
+
+        value = module.__dict__[variable]
+        bound_value = self.bindings[variable]
+
+        if value is bound_value:
+            return True
+
+        return (type(bound_value) is lazy_modules.DeferredAttribute and
+                value is lazy_modules.get_resolved_value(bound_value, default=bound_value))
+
+    def is_actual(self, module, config_key):
+        return self.module() is module and self.config_key == config_key
 
-    parser_cache = cache.Cache(cache_dir=module_config.cache_dir,
-                               module_name=module.__name__,
-                               source=source)
+    def create_command(self, module, variable):
+        command_class, source_module, source_attribute = self.imports[variable]
 
-    variables = parser_cache.get()
+        if command_class is rules.NoImportCommand:
+            return rules.NoImportCommand()
 
-    variables_scopes = None
+        return command_class(target_module=module,
+                             target_attribute=variable,
+                             source_module=source_module,
+                             source_attribute=source_attribute)
 
-    if variables is None:
-        variables, variables_scopes = extract_variables(source=source)
 
-        parser_cache.set(variables)
+# module name -> ModulePlan
+APPLIED_PLANS = {}
+
+# commands of other types (from custom rules) can have own state, so they are always resolved again
+PLANNED_COMMANDS = (rules.ImportCommand, rules.LazyImportCommand, rules.NoImportCommand)
+
+
+def get_config_key(module_config):
+    return (module_config.rules_uid, module_config.import_mode)
+
+
+def get_applied_plan(module_config, module):
+    plan = APPLIED_PLANS.get(module.__name__)
+
+    if plan is None or not plan.is_actual(module, get_config_key(module_config)):
+        return None
+
+    return plan
+
+
+def save_applied_plan(module_config, module, checksum, variables, found_commands, package_modules):
+    imports = {variable: (type(command), command.source_module, command.source_attribute)
+               for variable, command in found_commands.items()
+               if type(command) in PLANNED_COMMANDS}
+
+    APPLIED_PLANS[module.__name__] = ModulePlan(module=module,
+                                                config_key=get_config_key(module_config),
+                                                checksum=checksum,
+                                                variables=tuple(variables),
+                                                imports=imports,
+                                                package_modules=package_modules)
+
+
+def get_package_modules(module):
+    # names of modules in module's package
+    package_name = getattr(module, '__package__', None)
+
+    if not package_name or package_name not in sys.modules:
+        return frozenset()
+
+    paths = getattr(sys.modules[package_name], '__path__', None)
+
+    if not paths:
+        return frozenset()
+
+    return frozenset(discovering.find_package_modules(list(paths)))
+
+
+def get_changed_local_modules(module, plan, package_modules):
+    # names of modules, added to or removed from module's package after previous processing
+    #
+    # listing is compared with the one, stored in plan, since directories index can be refreshed
+    # by processing of other modules
+    changed_names = plan.package_modules ^ package_modules
+
+    if changed_names:
+        discovering.forget_specs(module.__package__, changed_names)
+
+    return changed_names
+
+
+def get_module_level_names(module):
+    # names, which are used or bound by top-level code of module (and attributes names)
+
+    # imported here, since it is required only on reload
+    from . import artifacts
+
+    code = artifacts.find_module_code(module)
+
+    if code is None:
+        return None
+
+    return frozenset(code.co_names)
+
+
+def drop_removed_bindings(module, plan, variables):
+    # module is reloaded in place, so names, imported for the old version of module, are still in it
+    #
+    # name is not dropped, if new version of module binds it by itself (for example, implicit import is replaced by explicit one):
+    # that is checked by value, since module body can bind the same object before smart_imports.all(),
+    # and by names of module's code
+    removed_variables = [variable
+                         for variable in plan.imports.keys() - set(variables)
+                         if plan.imports[variable][0] is not rules.NoImportCommand and plan.is_bound(module, variable)]
+
+    if not removed_variables:
+        return
+
+    module_level_names = get_module_level_names(module)
+
+    if module_level_names is None:
+        return
+
+    for variable in removed_variables:
+        if variable not in module_level_names:
+            del module.__dict__[variable]
+
+
+def process_module(module_config, module, variables_processor=variables_processor, source=None, analysis=None):
+
+    plan = get_applied_plan(module_config, module)
+
+    if analysis is None:
+        analysis = pop_module_analysis(module)
+
+    checksum = None
+
+    if analysis is not None:
+        variables = list(analysis.variables)
+        variables_scopes = analysis.variables_scopes
+
+    else:
+        if source is None:
+            source = module.__loader__.get_source(module.__name__)
+
+        # bytecode-only module
+        if source is None:
+            raise exceptions.NoModuleSource(module=module.__name__)
+
+        parser_cache = cache.Cache(cache_dir=module_config.cache_dir,
+                                   module_name=module.__name__,
+                                   source=source)
+
+        checksum = parser_cache.checksum
+
+        variables_scopes = None
+
+        # module is reloaded without changes
+        if plan is not None and plan.checksum == checksum:
+            variables = list(plan.variables)
+        else:
+            variables = parser_cache.get()
+
+        if variables is None:
+            variables, variables_scopes = extract_variables(source=source)
+
+            parser_cache.set(variables)
 
     # sort variables to fixate import order
     variables.sort()
 
-    variables = variables_processor(variables)
+    raw_variables = variables
+
+    variables = variables_processor(list(variables))
+
+    package_modules = get_package_modules(module)
+
+    if plan is None:
+        found_commands = apply_rules_many(module_config=module_config,
+                                          module=module,
+                                          variables=variables)
+    else:
+        changed_names = get_changed_local_modules(module, plan, package_modules)
+
+        found_commands = apply_rules_many(module_config=module_config,
+                                          module=module,
+                                          variables=[variable
+                                                     for variable in variables
+                                                     if variable not in plan.imports or variable in changed_names])
+
+        for variable in variables:
+            if variable not in found_commands and variable in plan.imports and variable not in changed_names:
+                found_commands[variable] = plan.create_command(module, variable)
+
+        drop_removed_bindings(module, plan, variables)
 
     commands = []
 
     for variable in variables:
-        command = apply_rules(module_config=module_config,
-                              module=module,
-                              variable=variable)
+        command = found_commands.get(variable)
 
         if isinstance(command, rules.NoImportCommand):
             continue
@@ -86,29 +399,288 @@ def process_module(module_config, module, variables_processor=variables_processo
             continue
 
         # process import error
-        if variables_scopes is None:
-            _, variables_scopes = extract_variables(source=source)
+        if variables_scopes is None and source is None:
+            source = module.__loader__.get_source(module.__name__)
 
-        undefined_lines = scopes_tree.search_undefined_variable_lines(variable, variables_scopes[variable])
+        # module without source (analysis artifact is used)
+        if variables_scopes is None and source is None:
+            undefined_lines = []
+        else:
+            if variables_scopes is None:
+                _, variables_scopes = extract_variables(source=source)
+
+            undefined_lines = scopes_tree.search_undefined_variable_lines(variable, variables_scopes[variable])
 
         raise exceptions.NoImportFound(variable=variable,
                                        module=module.__name__,
                                        path=module.__file__,
                                        lines=undefined_lines)
 
+    save_applied_plan(module_config=module_config,
+                      module=module,
+                      checksum=checksum,
+                      variables=raw_variables,
+                      found_commands=found_commands,
+                      package_modules=package_modules)
+
     return commands
 
 
+# marks modules, processed by import hook of activated packages
+MODULE_PROCESSED = 'smart_imports:processed'
+
+
+def is_processed(module):
+    return getattr(getattr(module, '__spec__', None), 'loader_state', None) == MODULE_PROCESSED
+
+
 def all(target_module=None, variables_processor=variables_processor):
 
     if target_module is None:
         target_module = discovering.find_target_module()
 
+    # module already processed by import hook
+    if is_processed(target_module):
+        return
+
+    # imports are found by import hook before module execution
+    analysis = pop_module_analysis(target_module, resolved=True)
+
+    if analysis is not None:
+        apply_commands(module_config=analysis.module_config,
+                       module=target_module,
+                       commands=analysis.commands)
+        return
+
+    manifest = get_enabled_feature(MANIFEST_MODULE)
+
+    if manifest is not None:
+        from .artifacts import find_module_code
+
+        commands = manifest.get_commands(target_module, find_module_code(target_module))
+
+        # module is not changed after manifest build
+        if commands is not None:
+            execute_commands(commands)
+            return
+
+    artifacts = get_enabled_feature(ARTIFACTS_MODULE)
+
+    if artifacts is not None:
+        module_config, variables = artifacts.get_artifact().get(target_module.__name__,
+                                                                artifacts.find_module_code(target_module))
+
+        import_names(module_config=module_config,
+                     module=target_module,
+                     variables_processor=variables_processor,
+                     analysis=ModuleAnalysis(variables=variables, variables_scopes=None))
+        return
+
     module_config = config.get(target_module.__file__)
 
+    if module_config.frozen:
+        from . import frozen
+
+        if frozen.execute(target_module):
+            return
+
+    import_names(module_config=module_config,
+                 module=target_module,
+                 variables_processor=variables_processor)
+
+
+def resolve_names(module, analysis):
+    # called by import hook before module execution, so smart_imports.all() only executes found commands
+    # modules, which imports are taken from manifest, artifact or sidecar, are processed by smart_imports.all() as usual
+
+    if get_enabled_feature(MANIFEST_MODULE) is not None or get_enabled_feature(ARTIFACTS_MODULE) is not None:
+        return
+
+    module_config = config.get(module.__file__)
+
+    if module_config.frozen:
+        return
+
+    analysis.commands = process_module(module_config=module_config,
+                                       module=module,
+                                       analysis=analysis)
+
+    analysis.module_config = module_config
+
+
+def import_names(module_config, module, variables_processor=variables_processor, source=None, analysis=None):
+
     commands = process_module(module_config=module_config,
-                              module=target_module,
-                              variables_processor=variables_processor)
+                              module=module,
+                              variables_processor=variables_processor,
+                              source=source,
+                              analysis=analysis)
+
+    apply_commands(module_config=module_config,
+                   module=module,
+                   commands=commands)
+
+
+def apply_commands(module_config, module, commands):
+
+    # read files of modules in background, while previous modules are imported
+    if module_config.prefetch:
+        from . import prefetching
+
+        prefetching.prefetch(command.source_module
+                             for command in commands
+                             if not isinstance(command, rules.LazyImportCommand))
+
+    execute_commands(commands)
+
+    plan = APPLIED_PLANS.get(module.__name__)
+
+    if plan is not None and plan.module() is module:
+        plan.record_bindings(module, commands)
+
+
+def group_commands(commands):
+    # groups ImportCommand by source module, keeping order of first usage of modules
+    # commands of other types are kept in place
+
+    groups = collections.OrderedDict()
+
+    for position, command in enumerate(commands):
+        if type(command) is rules.ImportCommand:
+            key = command.source_module
+        else:
+            key = position
+
+        if key not in groups:
+            groups[key] = []
+
+        groups[key].append(command)
+
+    return list(groups.values())
+
+
+def get_imported_module(modules, module_name):
+    # returns module, which is completely imported, or None
+
+    module = modules.get(module_name)
+
+    if module is None:
+        return None
+
+    # access to __spec__ would execute lazy module
+    if lazy_modules.is_lazy(module):
+        return module
+
+    # module is imported by other thread right now, importlib.import_module waits for it
+    if getattr(getattr(module, '__spec__', None), '_initializing', False):
+        return None
+
+    return module
+
+
+def execute_commands(commands):
+    # values are bound to target modules in bulk
+    # pending values are flushed before every real import, since imported module can use them (circular imports)
+
+    modules = sys.modules
+
+    pending_module = None
+    pending = {}
+
+    for group in group_commands(commands):
+        first_command = group[0]
+
+        if type(first_command) is not rules.ImportCommand:
+            if pending:
+                pending_module.__dict__.update(pending)
+                pending.clear()
+
+            first_command()
+            continue
+
+        source_module = get_imported_module(modules, first_command.source_module)
+
+        if source_module is None:
+            if pending:
+                pending_module.__dict__.update(pending)
+                pending.clear()
+
+            source_module = importlib.import_module(first_command.source_module)
+
+        for command in group:
+            if command.target_module is not pending_module:
+                if pending:
+                    pending_module.__dict__.update(pending)
+                    pending.clear()
+
+                pending_module = command.target_module
+
+            if command.source_attribute is None:
+                pending[command.target_attribute] = source_module
+            else:
+                pending[command.target_attribute] = getattr(source_module, command.source_attribute)
+
+    if pending:
+        pending_module.__dict__.update(pending)
+
+
+def get_undefined_variable_lines(module, variable):
+    source = module.__loader__.get_source(module.__name__)
+
+    _, variables_scopes = extract_variables(source=source)
+
+    if variable not in variables_scopes:
+        return []
+
+    return scopes_tree.search_undefined_variable_lines(variable, variables_scopes[variable])
+
+
+def create_module_getattr(module_config, module, original_getattr=None):
+
+    def __getattr__(name):
+        # do not resolve special names, since they are requested by import machinery and introspection tools
+        if name.startswith('__') and name.endswith('__'):
+            if original_getattr is not None:
+                return original_getattr(name)
+
+            raise AttributeError('module {!r} has no attribute {!r}'.format(module.__name__, name))
+
+        command = apply_rules(module_config=module_config,
+                              module=module,
+                              variable=name)
+
+        if command is not None and not isinstance(command, rules.NoImportCommand):
+            command()
+            return module.__dict__[name]
+
+        if original_getattr is not None:
+            return original_getattr(name)
+
+        if isinstance(command, rules.NoImportCommand):
+            raise AttributeError('module {!r} has no attribute {!r}'.format(module.__name__, name))
+
+        raise exceptions.NoLazyImportFound(variable=name,
+                                           module=module.__name__,
+                                           path=module.__file__)
+
+    return __getattr__
+
+
+def lazy(target_module=None):
+    # resolve module's attributes on the first access through module's __getattr__ (PEP 562)
+    # module source is not analyzed, so only attributes, requested from outside, are imported
+
+    if sys.version_info < (3, 7):
+        raise exceptions.LazyImportsNotSupported(version='{}.{}'.format(*sys.version_info[:2]))
+
+    if target_module is None:
+        target_module = discovering.find_target_module()
+
+    module_config = config.get(target_module.__file__)
+
+    target_module.__getattr__ = create_module_getattr(module_config=module_config,
+                                                      module=target_module,
+                                                      original_getattr=target_module.__dict__.get('__getattr__'))
+
 
-    for command in commands:
-        command()
+import_enabled_features()
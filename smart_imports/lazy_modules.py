@@ -0,0 +1,162 @@
+
+import sys
+import types
+import threading
+import importlib
+import importlib.util
+
+
+# target module name -> names of modules, imported into it lazily
+PENDING = {}
+
+
+def register_pending(target_module, source_module):
+    if target_module.__name__ not in PENDING:
+        PENDING[target_module.__name__] = set()
+
+    PENDING[target_module.__name__].add(source_module)
+
+
+def is_lazy(module):
+    # type() does not trigger loading of lazy module
+    return type(module) in (importlib.util._LazyModule, LockedLazyModule)
+
+
+class LockedLazyModule(importlib.util._LazyModule):
+    # before python 3.12.3 lazy module resets its class before execution,
+    # so other threads get attributes of partially executed module (while it is preloaded in thread, for example)
+    #
+    # this class keeps itself until module is executed and makes other threads wait for that, like newer pythons do
+
+    def __getattribute__(self, attr):
+        spec = object.__getattribute__(self, '__spec__')
+        loader_state = spec.loader_state
+
+        with loader_state['lock']:
+            if object.__getattribute__(self, '__class__') is LockedLazyModule:
+
+                # reentrant calls from the executed module itself (exec_module, imports of own package)
+                if loader_state['is_loading']:
+                    return types.ModuleType.__getattribute__(self, attr)
+
+                loader_state['is_loading'] = True
+
+                attrs_then = loader_state['__dict__']
+                attrs_now = types.ModuleType.__getattribute__(self, '__dict__')
+
+                # attributes, set before loading, are restored after it, like with eager loading
+                attrs_updated = {key: value
+                                 for key, value in attrs_now.items()
+                                 if key not in attrs_then or attrs_then[key] is not value}
+
+                spec.loader.exec_module(self)
+
+                if spec.name in sys.modules and sys.modules[spec.name] is not self:
+                    raise ValueError('module object for {!r} substituted in sys.modules during a lazy load'.format(spec.name))
+
+                attrs_now.update(attrs_updated)
+
+                object.__setattr__(self, '__class__', types.ModuleType)
+
+        return getattr(self, attr)
+
+
+def import_module(module_name):
+    # import module with importlib.util.LazyLoader: module will be executed on the first access to its attributes
+    # errors of missing modules are raised immediately, since spec is searched now
+
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    parent_name, _, child_name = module_name.rpartition('.')
+
+    parent = importlib.import_module(parent_name) if parent_name else None
+
+    # do not use discovering.find_spec here, since its specs are cached and spec will be modified
+    spec = importlib.util.find_spec(module_name)
+
+    if spec is None:
+        raise ImportError('No module named {!r}'.format(module_name), name=module_name)
+
+    if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+        return importlib.import_module(module_name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+
+    spec.loader = loader
+
+    module = importlib.util.module_from_spec(spec)
+
+    sys.modules[module_name] = module
+
+    loader.exec_module(module)
+
+    loader_state = object.__getattribute__(module, '__spec__').loader_state
+
+    if 'lock' not in loader_state:
+        loader_state['lock'] = threading.RLock()
+        loader_state['is_loading'] = False
+        object.__setattr__(module, '__class__', LockedLazyModule)
+
+    if parent is not None:
+        setattr(parent, child_name, module)
+
+    return module
+
+
+def load(module):
+    # any attribute access triggers execution of lazy module
+    getattr(module, '__name__')
+    return module
+
+
+def get_resolved_value(handle, default=None):
+    # does not resolve handle
+    try:
+        return object.__getattribute__(handle, '_value')
+    except AttributeError:
+        return default
+
+
+class DeferredAttribute:
+    # handle of module's attribute, that will be resolved on the first use
+    #
+    # after resolving, handle replaces itself in the target module by real value,
+    # so only first usages go through the handle
+
+    __slots__ = ('_target_module', '_target_attribute', '_source_module', '_source_attribute', '_value')
+
+    def __init__(self, target_module, target_attribute, source_module, source_attribute):
+        object.__setattr__(self, '_target_module', target_module)
+        object.__setattr__(self, '_target_attribute', target_attribute)
+        object.__setattr__(self, '_source_module', source_module)
+        object.__setattr__(self, '_source_attribute', source_attribute)
+
+    def _resolve(self):
+        try:
+            return object.__getattribute__(self, '_value')
+        except AttributeError:
+            pass
+
+        value = getattr(importlib.import_module(self._source_module), self._source_attribute)
+
+        object.__setattr__(self, '_value', value)
+
+        target_module = self._target_module
+
+        if getattr(target_module, self._target_attribute, None) is self:
+            setattr(target_module, self._target_attribute, value)
+
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __call__(self, *argv, **kwargs):
+        return self._resolve()(*argv, **kwargs)
+
+    def __repr__(self):
+        return 'DeferredAttribute({}.{})'.format(self._source_module, self._source_attribute)
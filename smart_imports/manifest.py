@@ -0,0 +1,329 @@
+
+import os
+import mmap
+import struct
+import hashlib
+
+from . import rules
+from . import artifacts
+from . import constants
+from . import exceptions
+
+
+# resolution manifest stores imports of modules, found at build time, in a single binary file:
+# smart_imports.all() finds module by on-disk hash index of memory-mapped file, without reading the whole file,
+# so processes share its pages in OS page cache.
+# Module is checked by fingerprint of its code object; if it differs, imports are resolved as usual.
+#
+# format (little-endian):
+#
+#   header: magic, protocol version, slots number, length of cache tag; cache tag
+#   index:  slots of open addressing hash table: (hash of module name, offset of entry), offset 0 marks empty slot
+#   entry:  length of module name, fingerprint, imports number; module name;
+#           imports: (command kind, lengths of variable, source module, source attribute); strings
+
+ENVIRONMENT_VARIABLE = constants.MANIFEST_ENVIRONMENT_VARIABLE
+
+MAGIC = b'SIMANIF\0'
+
+PROTOCOL_VERSION = 2
+
+HEADER = struct.Struct('<8sIII')
+
+SLOT = struct.Struct('<QI')
+
+ENTRY = struct.Struct('<H32sH')
+
+IMPORT = struct.Struct('<BHHH')
+
+# length of absent source attribute
+NO_ATTRIBUTE = 0xFFFF
+
+COMMANDS_KINDS = {rules.ImportCommand: 0,
+                  rules.LazyImportCommand: 1}
+
+COMMANDS_CLASSES = {kind: command_class for command_class, kind in COMMANDS_KINDS.items()}
+
+# path to manifest, which will be loaded on the first use
+_PATH = None
+
+MANIFEST = None
+
+
+def get_name_hash(module_name):
+    # builtin hash of strings is randomized between processes
+    # sha256 is used instead of blake2b, which requires Python 3.6+
+    return int.from_bytes(hashlib.sha256(module_name.encode('utf-8')).digest()[:8], 'little')
+
+
+class Manifest:
+    __slots__ = ('path', 'data', 'slots_number', 'index_offset')
+
+    def __init__(self, path, data, slots_number, index_offset):
+        self.path = path
+        self.data = data
+        self.slots_number = slots_number
+        self.index_offset = index_offset
+
+    def find_entry(self, module_name):
+        # returns offset of module entry or None
+
+        name_hash = get_name_hash(module_name)
+        encoded_name = module_name.encode('utf-8')
+
+        data = self.data
+        slot_index = name_hash % self.slots_number
+
+        while True:
+            slot_hash, offset = SLOT.unpack_from(data, self.index_offset + slot_index * SLOT.size)
+
+            if offset == 0:
+                return None
+
+            if slot_hash == name_hash:
+                name_length = ENTRY.unpack_from(data, offset)[0]
+                name_offset = offset + ENTRY.size
+
+                if data[name_offset:name_offset + name_length] == encoded_name:
+                    return offset
+
+            slot_index = (slot_index + 1) % self.slots_number
+
+    def get(self, module_name):
+        # returns (fingerprint, [(command class, variable, source module, source attribute)]) or None
+
+        offset = self.find_entry(module_name)
+
+        if offset is None:
+            return None
+
+        data = self.data
+
+        name_length, fingerprint, imports_number = ENTRY.unpack_from(data, offset)
+
+        offset += ENTRY.size + name_length
+
+        imports = []
+
+        for i in range(imports_number):
+            kind, variable_length, module_length, attribute_length = IMPORT.unpack_from(data, offset)
+            offset += IMPORT.size
+
+            variable = data[offset:offset + variable_length].decode('utf-8')
+            offset += variable_length
+
+            source_module = data[offset:offset + module_length].decode('utf-8')
+            offset += module_length
+
+            source_attribute = None
+
+            if attribute_length != NO_ATTRIBUTE:
+                source_attribute = data[offset:offset + attribute_length].decode('utf-8')
+                offset += attribute_length
+
+            imports.append((COMMANDS_CLASSES[kind], variable, source_module, source_attribute))
+
+        return fingerprint, imports
+
+    def close(self):
+        self.data.close()
+
+
+def encode_entry(module_name, fingerprint, imports):
+    encoded_name = module_name.encode('utf-8')
+
+    parts = [ENTRY.pack(len(encoded_name), fingerprint, len(imports)), encoded_name]
+
+    for command_class, variable, source_module, source_attribute in imports:
+        variable = variable.encode('utf-8')
+        source_module = source_module.encode('utf-8')
+
+        if source_attribute is None:
+            parts.append(IMPORT.pack(COMMANDS_KINDS[command_class], len(variable), len(source_module), NO_ATTRIBUTE))
+            parts.extend((variable, source_module))
+            continue
+
+        source_attribute = source_attribute.encode('utf-8')
+
+        parts.append(IMPORT.pack(COMMANDS_KINDS[command_class], len(variable), len(source_module), len(source_attribute)))
+        parts.extend((variable, source_module, source_attribute))
+
+    return b''.join(parts)
+
+
+def serialize(modules):
+    # modules: module name -> (fingerprint, [(command class, variable, source module, source attribute)])
+
+    # half of slots are empty, so search stops fast
+    slots_number = max(8, 2 * len(modules))
+
+    cache_tag = artifacts.get_cache_tag().encode('utf-8')
+
+    header = HEADER.pack(MAGIC, PROTOCOL_VERSION, slots_number, len(cache_tag)) + cache_tag
+
+    index_offset = len(header)
+
+    offset = index_offset + slots_number * SLOT.size
+
+    slots = [(0, 0)] * slots_number
+
+    entries = []
+
+    for module_name in sorted(modules):
+        fingerprint, imports = modules[module_name]
+
+        name_hash = get_name_hash(module_name)
+
+        slot_index = name_hash % slots_number
+
+        while slots[slot_index][1] != 0:
+            slot_index = (slot_index + 1) % slots_number
+
+        slots[slot_index] = (name_hash, offset)
+
+        entry = encode_entry(module_name, fingerprint, imports)
+
+        entries.append(entry)
+
+        offset += len(entry)
+
+    return b''.join([header] + [SLOT.pack(*slot) for slot in slots] + entries)
+
+
+def build(modules_names):
+    # returns manifest data for modules and packages with all their submodules
+
+    # imported here, since importer uses this module
+    from . import frozen
+
+    global _PATH, MANIFEST
+
+    path, manifest = _PATH, MANIFEST
+
+    # modules are resolved without the current manifest
+    _PATH, MANIFEST = None, None
+
+    modules = {}
+
+    try:
+        for module_name, module_path in frozen.find_modules(modules_names):
+            plan = frozen.resolve_plan(module_name)
+
+            if plan is None:
+                continue
+
+            with open(module_path, 'rb') as f:
+                code = compile(f.read(), module_path, 'exec', dont_inherit=True)
+
+            imports = []
+
+            for variable in sorted(plan.imports):
+                command_class, source_module, source_attribute = plan.imports[variable]
+
+                if command_class is rules.NoImportCommand:
+                    continue
+
+                imports.append((command_class, variable, source_module, source_attribute))
+
+            modules[module_name] = (artifacts.get_code_digest(code), imports)
+    finally:
+        _PATH, MANIFEST = path, manifest
+
+    return serialize(modules)
+
+
+def write(path, data):
+    temp_path = '{}.{}'.format(path, os.getpid())
+
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+
+    # file is replaced atomically, so processes, which mapped the old file, continue to use it
+    os.replace(temp_path, path)
+
+
+def load(path):
+    try:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise exceptions.ManifestHasWrongFormat(path=path, message=str(e))
+
+    if len(data) < HEADER.size:
+        data.close()
+        raise exceptions.ManifestHasWrongFormat(path=path, message='file is truncated')
+
+    magic, protocol_version, slots_number, cache_tag_length = HEADER.unpack_from(data, 0)
+
+    if magic != MAGIC or protocol_version != PROTOCOL_VERSION:
+        data.close()
+        raise exceptions.ManifestHasWrongFormat(path=path, message='unsupported protocol version')
+
+    cache_tag = data[HEADER.size:HEADER.size + cache_tag_length].decode('utf-8')
+
+    # bytecode differs between python versions, so fingerprints will not match
+    if cache_tag != artifacts.get_cache_tag():
+        data.close()
+        raise exceptions.ManifestHasWrongFormat(path=path,
+                                                message='built for "{}", but used with "{}"'.format(cache_tag,
+                                                                                                   artifacts.get_cache_tag()))
+
+    return Manifest(path=path,
+                    data=data,
+                    slots_number=slots_number,
+                    index_offset=HEADER.size + cache_tag_length)
+
+
+def enable(path):
+    global _PATH, MANIFEST
+
+    disable()
+
+    _PATH = path
+
+
+def disable():
+    global _PATH, MANIFEST
+
+    if MANIFEST is not None:
+        MANIFEST.close()
+
+    _PATH = None
+    MANIFEST = None
+
+
+def is_enabled():
+    return MANIFEST is not None or _PATH is not None
+
+
+def get_manifest():
+    global MANIFEST
+
+    if MANIFEST is None and _PATH is not None:
+        MANIFEST = load(_PATH)
+
+    return MANIFEST
+
+
+def get_commands(module, code):
+    # returns commands for module or None, if module is not in manifest or has been changed after build
+
+    entry = get_manifest().get(module.__name__)
+
+    if entry is None or code is None:
+        return None
+
+    fingerprint, imports = entry
+
+    if fingerprint != artifacts.get_code_digest(code):
+        return None
+
+    return [command_class(target_module=module,
+                          target_attribute=variable,
+                          source_module=source_module,
+                          source_attribute=source_attribute)
+            for command_class, variable, source_module, source_attribute in imports]
+
+
+if os.environ.get(ENVIRONMENT_VARIABLE):
+    enable(os.environ[ENVIRONMENT_VARIABLE])
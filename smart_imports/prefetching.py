@@ -0,0 +1,106 @@
+
+import os
+import sys
+import importlib.util
+
+
+WORKERS_NUMBER = 4
+
+READ_BUFFER_SIZE = 64 * 1024
+
+_EXECUTOR = None
+
+# names of modules, which files were already requested
+PREFETCHED = set()
+
+
+def get_executor():
+    global _EXECUTOR
+
+    if _EXECUTOR is None:
+        # imported here, since concurrent.futures is not cheap to import and prefetching is optional
+        import concurrent.futures
+
+        _EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=WORKERS_NUMBER)
+
+    return _EXECUTOR
+
+
+def can_be_prefetched(module_name):
+    if module_name in sys.modules or module_name in PREFETCHED:
+        return False
+
+    # searching of submodule spec imports its parent, so prefetch only submodules of already imported packages
+    parent_name = module_name.rpartition('.')[0]
+
+    return not parent_name or parent_name in sys.modules
+
+
+def get_module_files(module_name):
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return []
+
+    if spec is None or not spec.has_location or spec.origin is None:
+        return []
+
+    files = [spec.origin]
+
+    if spec.origin.endswith('.py'):
+        try:
+            files.append(importlib.util.cache_from_source(spec.origin))
+        except NotImplementedError:
+            pass
+
+    return files
+
+
+def read_file(path):
+    # bring file into OS page cache, so import will not wait for disk
+
+    try:
+        with open(path, 'rb') as f:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                return
+
+            while f.read(READ_BUFFER_SIZE):
+                pass
+
+    except OSError:
+        pass
+
+
+def prefetch_module(module_name):
+    for path in get_module_files(module_name):
+        read_file(path)
+
+
+def prefetch(modules_names):
+    # returns futures of prefetching tasks
+
+    futures = []
+
+    for module_name in modules_names:
+        if not can_be_prefetched(module_name):
+            continue
+
+        PREFETCHED.add(module_name)
+
+        futures.append(get_executor().submit(prefetch_module, module_name))
+
+    return futures
+
+
+def shutdown():
+    # waits for started reads, executor will be created again on the next prefetch
+    global _EXECUTOR
+
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=True)
+        _EXECUTOR = None
+
+
+def reset():
+    PREFETCHED.clear()
@@ -0,0 +1,132 @@
+
+import sys
+import types
+import importlib
+
+from . import concurrency
+from . import lazy_modules
+
+
+# delay between modules in idle_preload, gives the event loop time to serve other tasks
+IDLE_DELAY = 0.01
+
+# names of modules, which were already preloaded
+PRELOADED = set()
+
+
+def get_modules_names(module_or_names):
+    # module -> names of modules, lazily imported into it
+    # string -> single module name
+
+    if module_or_names is None:
+        return sorted(set().union(*list(lazy_modules.PENDING.values())))
+
+    if isinstance(module_or_names, str):
+        return [module_or_names]
+
+    if isinstance(module_or_names, types.ModuleType):
+        return sorted(lazy_modules.PENDING.get(module_or_names.__name__, ()))
+
+    return list(module_or_names)
+
+
+def preload_module(module_name):
+    if module_name in PRELOADED:
+        return
+
+    with concurrency.key_lock(('preload', module_name)):
+        if module_name in PRELOADED:
+            return
+
+        module = sys.modules.get(module_name)
+
+        if module is None:
+            importlib.import_module(module_name)
+
+        elif lazy_modules.is_lazy(module):
+            lazy_modules.load(module)
+
+        PRELOADED.add(module_name)
+
+
+def resolve_deferred_attributes(modules_names):
+    # replace handles by real values, so modules will not pay for the first access through handles
+
+    modules_names = set(modules_names)
+
+    for target_module_name in list(lazy_modules.PENDING):
+        target_module = sys.modules.get(target_module_name)
+
+        if target_module is None:
+            continue
+
+        for value in list(vars(target_module).values()):
+            # type() does not trigger loading of lazy modules, unlike isinstance
+            if (type(value) is lazy_modules.DeferredAttribute and
+                    object.__getattribute__(value, '_source_module') in modules_names):
+                value._resolve()
+
+
+def forget_pending(modules_names):
+    for target_module_name, pending in list(lazy_modules.PENDING.items()):
+        pending.difference_update(modules_names)
+
+        if not pending:
+            lazy_modules.PENDING.pop(target_module_name, None)
+
+
+def preload_sync(modules_names):
+    for module_name in modules_names:
+        preload_module(module_name)
+
+    resolve_deferred_attributes(modules_names)
+
+    forget_pending(modules_names)
+
+
+def get_pending_names():
+    return [module_name
+            for module_name in get_modules_names(None)
+            if module_name not in PRELOADED]
+
+
+async def preload(module_or_names=None, executor=None):
+    # imported here, since asyncio is heavy and not required for other functionality
+    import asyncio
+
+    modules_names = get_modules_names(module_or_names)
+
+    if not modules_names:
+        return
+
+    await asyncio.get_event_loop().run_in_executor(executor, preload_sync, modules_names)
+
+
+async def idle_preload(executor=None, delay=None):
+    # preload lazily imported modules one by one, until nothing left
+    import asyncio
+
+    if delay is None:
+        delay = IDLE_DELAY
+
+    # broken modules are skipped here, their errors will be raised on the first access, as without preloading
+    failed = set()
+
+    while True:
+        modules_names = [module_name for module_name in get_pending_names() if module_name not in failed]
+
+        if not modules_names:
+            forget_pending(PRELOADED)
+            return
+
+        try:
+            await preload([modules_names[0]], executor=executor)
+        except Exception:
+            failed.add(modules_names[0])
+
+        await asyncio.sleep(delay)
+
+
+def reset():
+    PRELOADED.clear()
+    lazy_modules.PENDING.clear()
@@ -0,0 +1,196 @@
+
+import os
+import sys
+import time
+import atexit
+
+from . import rules
+from . import constants
+
+
+ENVIRONMENT_VARIABLE = constants.PROFILING_ENVIRONMENT_VARIABLE
+
+
+ENABLED = False
+
+# (config uid, rule type) -> RuleStatistics
+STATISTICS = {}
+
+_AT_EXIT_REGISTERED = False
+
+
+class RuleStatistics:
+    __slots__ = ('config_uid', 'rule_type', 'calls', 'hits', 'misses', 'no_imports', 'times', 'misses_time')
+
+    def __init__(self, config_uid, rule_type):
+        self.config_uid = config_uid
+        self.rule_type = rule_type
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+        self.no_imports = 0
+        self.times = []
+        self.misses_time = 0.0
+
+    @property
+    def total_time(self):
+        return sum(self.times)
+
+    def percentile(self, percent):
+        if not self.times:
+            return 0.0
+
+        times = sorted(self.times)
+
+        index = min(len(times) - 1, int(round(percent / 100 * (len(times) - 1))))
+
+        return times[index]
+
+    def register(self, command, duration):
+        self.calls += 1
+        self.times.append(duration)
+
+        if command is None:
+            self.misses += 1
+            self.misses_time += duration
+            return
+
+        self.hits += 1
+
+        if isinstance(command, rules.NoImportCommand):
+            self.no_imports += 1
+
+    def register_many(self, variables_number, commands, duration):
+        self.calls += variables_number
+        self.hits += len(commands)
+        self.misses += variables_number - len(commands)
+        self.no_imports += sum(1 for command in commands.values() if isinstance(command, rules.NoImportCommand))
+        self.times.append(duration)
+
+        if variables_number > len(commands):
+            self.misses_time += duration * (variables_number - len(commands)) / variables_number
+
+
+def get_rule_type(rule):
+    return rule.config.get('type', rule.__class__.__name__)
+
+
+def get_statistics(config_uid, rule):
+    key = (config_uid, get_rule_type(rule))
+
+    if key not in STATISTICS:
+        STATISTICS[key] = RuleStatistics(config_uid=key[0], rule_type=key[1])
+
+    return STATISTICS[key]
+
+
+def record(config_uid, rule, command, duration):
+    get_statistics(config_uid, rule).register(command, duration)
+
+
+def record_many(config_uid, rule, variables_number, commands, duration):
+    get_statistics(config_uid, rule).register_many(variables_number, commands, duration)
+
+
+def apply_rule(config_uid, rule, module, variable):
+    started_at = time.perf_counter()
+
+    command = rule.apply(module, variable)
+
+    record(config_uid, rule, command, time.perf_counter() - started_at)
+
+    return command
+
+
+def apply_rule_many(config_uid, rule, module, variables):
+    started_at = time.perf_counter()
+
+    commands = rule.apply_many(module, variables)
+
+    record_many(config_uid, rule, len(variables), commands, time.perf_counter() - started_at)
+
+    return commands
+
+
+def enable(print_at_exit=False):
+    global ENABLED, _AT_EXIT_REGISTERED
+
+    ENABLED = True
+
+    if print_at_exit and not _AT_EXIT_REGISTERED:
+        atexit.register(print_report)
+        _AT_EXIT_REGISTERED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def is_enabled():
+    return ENABLED
+
+
+def reset():
+    STATISTICS.clear()
+
+
+def report():
+    return sorted(STATISTICS.values(),
+                  key=lambda statistics: statistics.total_time,
+                  reverse=True)
+
+
+def format_report(statistics=None):
+    if statistics is None:
+        statistics = report()
+
+    header = ('config', 'rule', 'calls', 'hits', 'misses', 'no import',
+              'total ms', 'p50 us', 'p95 us', 'p99 us', 'misses ms', 'notes')
+
+    rows = [header]
+
+    for rule_statistics in statistics:
+        notes = []
+
+        if rule_statistics.hits == 0:
+            notes.append('never hit')
+
+        elif rule_statistics.misses_time > rule_statistics.total_time / 2:
+            notes.append('expensive misses')
+
+        rows.append((str(rule_statistics.config_uid),
+                     rule_statistics.rule_type,
+                     str(rule_statistics.calls),
+                     str(rule_statistics.hits),
+                     str(rule_statistics.misses),
+                     str(rule_statistics.no_imports),
+                     '{:.3f}'.format(rule_statistics.total_time * 1000),
+                     '{:.1f}'.format(rule_statistics.percentile(50) * 1000000),
+                     '{:.1f}'.format(rule_statistics.percentile(95) * 1000000),
+                     '{:.1f}'.format(rule_statistics.percentile(99) * 1000000),
+                     '{:.3f}'.format(rule_statistics.misses_time * 1000),
+                     ', '.join(notes)))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+
+    lines = ['smart_imports rules profile (sorted by total time):']
+
+    for row in rows:
+        lines.append('  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+    lines.append('rules chains: {} built for {} configs'.format(*rules.get_chains_statistics()))
+
+    return '\n'.join(lines)
+
+
+def print_report(stream=None):
+    if stream is None:
+        stream = sys.stderr
+
+    stream.write(format_report())
+    stream.write('\n')
+
+
+if os.environ.get(ENVIRONMENT_VARIABLE):
+    enable(print_at_exit=True)
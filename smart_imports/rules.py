@@ -1,17 +1,35 @@
 
 import os
 import sys
-import pkgutil
+import json
+import time
+import hashlib
 import importlib
 import importlib.util
 
+from . import lazy_modules
+from . import cache
+from . import constants
+from . import concurrency
 from . import exceptions
 from . import discovering
 
 
+ENTRY_POINTS_GROUP = 'smart_imports.rules'
+
+
+# rule name -> rule class or path to it ("package.module:RuleClass"), which will be imported on the first use
 _FABRICS = {}
+
+# rules uid (hash of rules configs) -> rules chain
 _RULES = {}
 
+# config uid -> rules uid
+_CONFIGS_CHAINS = {}
+
+# rule name -> path to rule class, from entry points of installed distributions
+_ENTRY_POINTS = None
+
 
 def register(name, rule):
     if name in _FABRICS:
@@ -25,43 +43,154 @@ def remove(name):
         del _FABRICS[name]
 
 
+def get_entry_points():
+    global _ENTRY_POINTS
+
+    if _ENTRY_POINTS is None:
+        _ENTRY_POINTS = {}
+
+        try:
+            import importlib.metadata as importlib_metadata
+        except ImportError:
+            # python < 3.8
+            return _ENTRY_POINTS
+
+        entry_points = importlib_metadata.entry_points()
+
+        if hasattr(entry_points, 'select'):
+            group = entry_points.select(group=ENTRY_POINTS_GROUP)
+        else:
+            # python < 3.10
+            group = entry_points.get(ENTRY_POINTS_GROUP, ())
+
+        for entry_point in group:
+            _ENTRY_POINTS[entry_point.name] = entry_point.value
+
+    return _ENTRY_POINTS
+
+
+def reset_entry_points_cache():
+    global _ENTRY_POINTS
+    _ENTRY_POINTS = None
+
+
+def import_fabric(name, path):
+    if ':' in path:
+        module_name, attributes = path.split(':', 1)
+    else:
+        module_name, _, attributes = path.rpartition('.')
+
+    try:
+        fabric = importlib.import_module(module_name)
+
+        for attribute in attributes.split('.'):
+            fabric = getattr(fabric, attribute)
+
+    except (ImportError, AttributeError, ValueError) as e:
+        raise exceptions.RuleCanNotBeLoaded(rule=name, path=path, error=e)
+
+    return fabric
+
+
+def get_fabric(fabric_type):
+    fabric = _FABRICS.get(fabric_type)
+
+    if fabric is None:
+        fabric = get_entry_points().get(fabric_type)
+
+    if fabric is None and ':' in fabric_type:
+        fabric = fabric_type
+
+    if fabric is None:
+        raise exceptions.RuleNotRegistered(rule=fabric_type)
+
+    if isinstance(fabric, str):
+        fabric = import_fabric(fabric_type, fabric)
+        _FABRICS[fabric_type] = fabric
+
+    return fabric
+
+
+def construct_rule(rule_config):
+    return get_fabric(rule_config['type'])(config=rule_config)
+
+
+def create_rule(rule_config, path):
+    rule = construct_rule(rule_config)
+
+    if not rule.verify_config():
+        raise exceptions.ConfigHasWrongFormat(path=path,
+                                              message='wrong format of rule {}'.format(rule_config['type']))
+
+    return rule
+
+
 def get_for_config(config):
-    uid = config.uid
+    uid = config.rules_uid
 
-    if uid not in _RULES:
-        rules = []
+    _CONFIGS_CHAINS[config.uid] = uid
 
-        for rule_config in config.rules:
-            fabric_type = rule_config['type']
+    if uid in _RULES:
+        return _RULES[uid]
 
-            if fabric_type not in _FABRICS:
-                raise exceptions.RuleNotRegistered(rule=fabric_type)
+    # custom rules are imported on construction
+    return concurrency.get_or_publish(_RULES, uid, lambda: [create_rule(rule_config, path=config.path)
+                                                            for rule_config in config.rules])
 
-            rule = _FABRICS[fabric_type](config=rule_config)
 
-            if not rule.verify_config():
-                raise exceptions.ConfigHasWrongFormat(path=config.path,
-                                                      message='wrong format of rule {}'.format(fabric_type))
+# returns (number of built rules chains, number of configs, which use them)
+def get_chains_statistics():
+    return len(_RULES), len(_CONFIGS_CHAINS)
 
-            rules.append(rule)
 
-        _RULES[uid] = rules
+def forget_config(config_uid):
+    # rules chain is dropped, when no other config uses it
+    uid = _CONFIGS_CHAINS.pop(config_uid, None)
 
-    return _RULES[uid]
+    if uid is not None and uid not in _CONFIGS_CHAINS.values():
+        _RULES.pop(uid, None)
 
 
 def reset_rules_cache():
     _RULES.clear()
+    _CONFIGS_CHAINS.clear()
+
+
+def invalidate(event):
+    # called by watching for every change of files
+    for chain in list(_RULES.values()):
+        for rule in chain:
+            rule.invalidate(event)
+
+
+def is_source_event(event):
+    # changes of bytecode caches and other files do not affect indexes of rules
+    if '__pycache__' in event.path.split(os.sep):
+        return False
+
+    return event.is_directory or event.path.endswith('.py')
+
+
+def is_inside(path, directory):
+    return path.startswith(os.path.join(directory, ''))
 
 
 class ImportCommand:
     __slots__ = ('target_module', 'target_attribute', 'source_module', 'source_attribute')
 
+    # commands are immutable, since they are shared between rules results, groups and plans
+
     def __init__(self, target_module, target_attribute, source_module, source_attribute):
-        self.target_module = target_module
-        self.target_attribute = target_attribute
-        self.source_module = source_module
-        self.source_attribute = source_attribute
+        object.__setattr__(self, 'target_module', target_module)
+        object.__setattr__(self, 'target_attribute', target_attribute)
+        object.__setattr__(self, 'source_module', source_module)
+        object.__setattr__(self, 'source_attribute', source_attribute)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable'.format(self.__class__.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('{} is immutable'.format(self.__class__.__name__))
 
     def __call__(self):
         imported_module = importlib.import_module(self.source_module)
@@ -89,15 +218,55 @@ class ImportCommand:
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        return hash((self.__class__,
+                     self.target_module,
+                     self.target_attribute,
+                     self.source_module,
+                     self.source_attribute))
+
+
+class LazyImportCommand(ImportCommand):
+    __slots__ = ()
+
+    def __call__(self):
+        imported_module = lazy_modules.import_module(self.source_module)
+
+        if self.source_attribute is None:
+            value = imported_module
+        else:
+            value = lazy_modules.DeferredAttribute(target_module=self.target_module,
+                                                   target_attribute=self.target_attribute,
+                                                   source_module=self.source_module,
+                                                   source_attribute=self.source_attribute)
+
+        setattr(self.target_module, self.target_attribute, value)
+
+        lazy_modules.register_pending(self.target_module, self.source_module)
+
 
 class NoImportCommand(ImportCommand):
     __slots__ = ()
 
+    # command has no state, so all rules share single instance
+    _INSTANCE = None
+
+    def __new__(cls):
+        if cls._INSTANCE is None:
+            instance = super().__new__(cls)
+
+            ImportCommand.__init__(instance,
+                                   target_module=None,
+                                   target_attribute=None,
+                                   source_module=None,
+                                   source_attribute=None)
+
+            cls._INSTANCE = instance
+
+        return cls._INSTANCE
+
     def __init__(self):
-        super().__init__(target_module=None,
-                         target_attribute=None,
-                         source_module=None,
-                         source_attribute=None)
+        pass
 
     def __call__(self):
         pass
@@ -112,9 +281,29 @@ class BaseRule:
     def verify_config(self):
         return True
 
+    # builds indexes of rule, which are usually built on the first use (see smart_imports.prepare_for_fork)
+    def prepare(self):
+        pass
+
+    # drops indexes of rule, which depend on changed file (see smart_imports.watching)
+    def invalidate(self, event):
+        pass
+
     def apply(self, module, variable):
         raise NotImplementedError
 
+    # returns {variable: command} for variables, found by rule
+    def apply_many(self, module, variables):
+        commands = {}
+
+        for variable in variables:
+            command = self.apply(module, variable)
+
+            if command:
+                commands[variable] = command
+
+        return commands
+
 
 class CustomRule(BaseRule):
     __slots__ = ()
@@ -134,12 +323,14 @@ class CustomRule(BaseRule):
         attribute = self.config['variables'][variable].get('attribute')
         return ImportCommand(module, variable, module_name, attribute)
 
+    def apply_many(self, module, variables):
+        return {variable: self.apply(module, variable)
+                for variable in self.config['variables'].keys() & variables}
+
 
 class LocalModulesRule(BaseRule):
     __slots__ = ()
 
-    _LOCAL_MODULES_CACHE = {}
-
     def verify_config(self):
         return super().verify_config()
 
@@ -150,18 +341,9 @@ class LocalModulesRule(BaseRule):
         if not package_name:
             return None
 
-        if package_name not in self._LOCAL_MODULES_CACHE:
-
-            parent = sys.modules[package_name]
-
-            local_modules = set()
-
-            for module_finder, name, ispkg in pkgutil.iter_modules(path=parent.__path__):
-                local_modules.add(name)
-
-            self._LOCAL_MODULES_CACHE[package_name] = frozenset(local_modules)
+        parent = sys.modules[package_name]
 
-        if variable not in self._LOCAL_MODULES_CACHE[package_name]:
+        if not discovering.has_module(parent.__path__, variable):
             return None
 
         return ImportCommand(target_module=module,
@@ -169,6 +351,21 @@ class LocalModulesRule(BaseRule):
                              source_module='{}.{}'.format(package_name, variable),
                              source_attribute=None)
 
+    def apply_many(self, module, variables):
+
+        package_name = getattr(module, '__package__', None)
+
+        if not package_name:
+            return {}
+
+        local_modules = discovering.find_package_modules(sys.modules[package_name].__path__)
+
+        return {variable: ImportCommand(target_module=module,
+                                        target_attribute=variable,
+                                        source_module='{}.{}'.format(package_name, variable),
+                                        source_attribute=None)
+                for variable in local_modules & set(variables)}
+
 
 class GlobalModulesRule(BaseRule):
     __slots__ = ()
@@ -176,11 +373,15 @@ class GlobalModulesRule(BaseRule):
     def verify_config(self):
         return super().verify_config()
 
+    def prepare(self):
+        discovering.get_top_level_index(cache_dir=self.config.get('cache_dir'))
+
     def apply(self, module, variable):
 
-        spec = discovering.find_spec(variable)
+        index = discovering.get_top_level_index(cache_dir=self.config.get('cache_dir'))
 
-        if spec is None:
+        # index is checked for changes of sys.path entries only on misses
+        if not index.has_module(variable) and not (index.refresh() and index.has_module(variable)):
             return None
 
         return ImportCommand(target_module=module,
@@ -188,43 +389,310 @@ class GlobalModulesRule(BaseRule):
                              source_module=variable,
                              source_attribute=None)
 
+    def apply_many(self, module, variables):
 
-# packages lists for every python version can be found here:
-# https://github.com/jackmaney/python-stdlib-list
-def _collect_stdlib_modules():
-    variables = {}
+        index = discovering.get_top_level_index(cache_dir=self.config.get('cache_dir'))
+
+        # check not indexed names one by one, since they can be provided by custom finders
+        found_variables = [variable for variable in variables if index.has_module(variable)]
+
+        if len(found_variables) < len(variables) and index.refresh():
+            found_variables = [variable for variable in variables if index.has_module(variable)]
 
-    for compiled_module_name in sys.builtin_module_names:
-        variables[compiled_module_name] = {'module': compiled_module_name}
+        return {variable: ImportCommand(target_module=module,
+                                        target_attribute=variable,
+                                        source_module=variable,
+                                        source_attribute=None)
+                for variable in found_variables}
 
+
+# packages lists for python versions without sys.stdlib_module_names can be found here:
+# https://github.com/jackmaney/python-stdlib-list
+def _load_stdlib_fixture():
     with open(os.path.join(os.path.dirname(__file__),
                            'fixtures',
                            'python_{}_{}_packages.txt'.format(sys.version_info.major, sys.version_info.minor))) as f:
-        for line in f.readlines():
-            names = line.strip().split('.')
-            for i in range(len(names)):
-                variables['_'.join(names[:i+1])] = {'module': '.'.join(names[:i+1])}
+        return {line.strip() for line in f if line.strip()}
+
+
+# big packages, which submodules are useless outside of them
+_NOT_WALKED_STDLIB_PACKAGES = frozenset({'test', 'idlelib', 'turtledemo'})
+
+# subpackages of not walked packages, which are used outside of them
+_WALKED_STDLIB_SUBPACKAGES = ('test.support',)
+
+# modules, which do not exist on file system (set by their parent modules)
+_NOT_FILE_STDLIB_MODULES = frozenset({'os.path',
+                                      'xml.parsers.expat.errors',
+                                      'xml.parsers.expat.model'})
+
+
+def _find_stdlib_modules():
+    top_level_names = frozenset(sys.stdlib_module_names)
+
+    names = set(top_level_names)
+
+    stdlib_directory = os.path.dirname(os.__file__)
+
+    for name in discovering.scan_directory(stdlib_directory).packages & top_level_names:
+        if name in _NOT_WALKED_STDLIB_PACKAGES:
+            continue
+
+        discovering.walk_package_modules(os.path.join(stdlib_directory, name), name, names)
+
+    for name in _WALKED_STDLIB_SUBPACKAGES:
+        path = os.path.join(stdlib_directory, *name.split('.'))
+
+        # test package can be not installed
+        if os.path.isdir(path):
+            names.add(name)
+            discovering.walk_package_modules(path, name, names)
+
+    # list does not depend on imported modules, so names are resolved the same way in every process
+    names.update(_NOT_FILE_STDLIB_MODULES)
+
+    return names
+
+
+def _collect_stdlib_modules():
+    if hasattr(sys, 'stdlib_module_names'):
+        # python >= 3.10
+        names = _find_stdlib_modules()
+    else:
+        names = _load_stdlib_fixture()
+
+    names.update(sys.builtin_module_names)
+
+    variables = {}
+
+    for name in names:
+        parts = name.split('.')
+
+        for i in range(len(parts)):
+            variables[sys.intern('_'.join(parts[:i+1]))] = sys.intern('.'.join(parts[:i+1]))
 
     return variables
 
 
 class StdLibRule(BaseRule):
-    __slots__ = ('_stdlib_modules',)
+    __slots__ = ()
 
-    _STDLIB_MODULES = _collect_stdlib_modules()
+    # variable name -> module name, built on first use
+    _STDLIB_MODULES = None
 
     def verify_config(self):
         return super().verify_config()
 
+    @classmethod
+    def get_stdlib_modules(cls):
+        if StdLibRule._STDLIB_MODULES is None:
+            with concurrency.key_lock('stdlib_modules'):
+                if StdLibRule._STDLIB_MODULES is None:
+                    StdLibRule._STDLIB_MODULES = _collect_stdlib_modules()
+
+        return StdLibRule._STDLIB_MODULES
+
+    def prepare(self):
+        self.get_stdlib_modules()
+
     def apply(self, module, variable):
 
-        if variable not in self._STDLIB_MODULES:
+        module_name = self.get_stdlib_modules().get(variable)
+
+        if module_name is None:
             return None
 
-        module_name = self._STDLIB_MODULES[variable]['module']
-        attribute = self._STDLIB_MODULES[variable].get('attribute')
+        return ImportCommand(module, variable, module_name, None)
 
-        return ImportCommand(module, variable, module_name, attribute)
+    def apply_many(self, module, variables):
+        stdlib_modules = self.get_stdlib_modules()
+
+        return {variable: ImportCommand(module, variable, stdlib_modules[variable], None)
+                for variable in stdlib_modules.keys() & variables}
+
+
+class GlobalSubmodulesRule(BaseRule):
+    __slots__ = ('_submodules', '_persisted_index_is_stale')
+
+    INDEX_NAME = 'global_submodules'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self._submodules = None
+        self._persisted_index_is_stale = False
+
+    def verify_config(self):
+        if not isinstance(self.config.get('packages', []), list):
+            return False
+
+        return super().verify_config()
+
+    def get_submodules(self):
+        if self._submodules is not None:
+            return self._submodules
+
+        cache_dir = self.config.get('cache_dir')
+        packages = self.config.get('packages')
+
+        sys_path = [entry for entry in sys.path if isinstance(entry, str)]
+
+        submodules = None
+
+        if cache_dir is not None:
+            fingerprint = hashlib.sha256('{}|{}'.format(discovering.get_distributions_fingerprint(sys_path),
+                                                        json.dumps(packages)).encode('utf-8')).hexdigest()
+
+        # persisted index does not track changes of packages' directories
+        if cache_dir is not None and not self._persisted_index_is_stale:
+            submodules = cache.get_index(cache_dir=cache_dir,
+                                         index_name=self.INDEX_NAME,
+                                         fingerprint=fingerprint)
+
+        if submodules is None:
+            submodules = discovering.collect_submodules(packages=frozenset(packages) if packages is not None else None,
+                                                        sys_path=sys_path)
+
+            if cache_dir is not None:
+                cache.set_index(cache_dir=cache_dir,
+                                index_name=self.INDEX_NAME,
+                                fingerprint=fingerprint,
+                                index=submodules)
+
+        self._submodules = {sys.intern(variable): sys.intern(module_name)
+                            for variable, module_name in submodules.items()}
+
+        self._persisted_index_is_stale = False
+
+        return self._submodules
+
+    def prepare(self):
+        self.get_submodules()
+
+    def is_indexed_path(self, path):
+        packages = self.config.get('packages')
+
+        sys_path = [entry for entry in sys.path if isinstance(entry, str)]
+
+        for entry in discovering._get_not_stdlib_sys_path(sys_path):
+            entry = discovering._normalize_sys_path_entry(entry)
+
+            if not is_inside(path, entry):
+                continue
+
+            package_name = os.path.relpath(path, entry).split(os.sep)[0]
+
+            # top-level modules are not indexed
+            if '.' in package_name:
+                continue
+
+            if packages is None or package_name in packages:
+                return True
+
+        return False
+
+    def invalidate(self, event):
+        # index depends only on layout of packages' directories, not on content of modules
+        if self._submodules is None or event.kind == constants.WATCH_EVENT.MODIFIED:
+            return
+
+        if is_source_event(event) and self.is_indexed_path(event.path):
+            self._submodules = None
+            self._persisted_index_is_stale = True
+
+    def apply(self, module, variable):
+
+        module_name = self.get_submodules().get(variable)
+
+        if module_name is None:
+            return None
+
+        return ImportCommand(module, variable, module_name, None)
+
+    def apply_many(self, module, variables):
+        submodules = self.get_submodules()
+
+        return {variable: ImportCommand(module, variable, submodules[variable], None)
+                for variable in submodules.keys() & variables}
+
+
+class ExportedSymbolsRule(BaseRule):
+    __slots__ = ('_symbols',)
+
+    def __init__(self, config):
+        super().__init__(config)
+        self._symbols = None
+
+    def verify_config(self):
+        if not isinstance(self.config.get('packages'), list):
+            return False
+
+        if not isinstance(self.config.get('index', ''), str):
+            return False
+
+        return super().verify_config()
+
+    def get_symbols(self):
+        if self._symbols is not None:
+            return self._symbols
+
+        # imported here, since rule is optional
+        from . import symbols
+
+        # index, built by "python -m smart_imports build-symbols-index", is only loaded
+        if self.config.get('index') is not None:
+            self._symbols = symbols.load(self.config['index'], packages=self.config['packages'])
+        else:
+            self._symbols = symbols.get_symbols_index(packages=self.config['packages'],
+                                                      cache_dir=self.config.get('cache_dir'))
+
+        return self._symbols
+
+    def prepare(self):
+        self.get_symbols()
+
+    def is_indexed_path(self, path):
+        from . import symbols
+
+        for package_name in self.config['packages']:
+            paths, module_path = symbols.find_module_location(package_name)
+
+            if path == module_path:
+                return True
+
+            if paths is not None and any(path == package_path or is_inside(path, package_path) for package_path in paths):
+                return True
+
+        return False
+
+    def invalidate(self, event):
+        # index depends on content of modules
+        if self._symbols is None:
+            return
+
+        index_path = self.config.get('index')
+
+        if index_path is not None:
+            if os.path.abspath(event.path) == os.path.abspath(index_path):
+                self._symbols = None
+            return
+
+        if is_source_event(event) and self.is_indexed_path(event.path):
+            self._symbols = None
+
+    def apply(self, module, variable):
+
+        module_name = self.get_symbols().get(variable)
+
+        if module_name is None:
+            return None
+
+        return ImportCommand(module, variable, module_name, variable)
+
+    def apply_many(self, module, variables):
+        exported_symbols = self.get_symbols()
+
+        return {variable: ImportCommand(module, variable, exported_symbols[variable], variable)
+                for variable in exported_symbols.keys() & variables}
 
 
 class PredefinedNamesRule(BaseRule):
@@ -245,6 +713,11 @@ class PredefinedNamesRule(BaseRule):
 
         return None
 
+    def apply_many(self, module, variables):
+        return {variable: NoImportCommand()
+                for variable in variables
+                if variable in self.PREDEFINED_NAMES or variable in __builtins__}
+
 
 class PrefixRule(BaseRule):
     __slots__ = ()
@@ -292,11 +765,13 @@ class LocalModulesFromParentRule(BaseRule):
 
             base_package_name = package_name[:-len(suffix)]
 
-            source_module = '{}.{}'.format(base_package_name, variable)
+            base_package_paths = discovering.find_package_paths(base_package_name)
 
-            if discovering.find_spec(source_module) is None:
+            if base_package_paths is None or not discovering.has_module(base_package_paths, variable):
                 continue
 
+            source_module = '{}.{}'.format(base_package_name, variable)
+
             return ImportCommand(target_module=module,
                                  target_attribute=variable,
                                  source_module=source_module,
@@ -329,22 +804,206 @@ class LocalModulesFromNamespaceRule(BaseRule):
 
                 namespace_package = spec.parent
 
-                source_module = '{}.{}'.format(namespace_package, variable)
+                if not namespace_package:
+                    continue
 
-                if discovering.find_spec(source_module) is None:
+                namespace_paths = discovering.find_package_paths(namespace_package)
+
+                if namespace_paths is None or not discovering.has_module(namespace_paths, variable):
                     continue
 
+                source_module = '{}.{}'.format(namespace_package, variable)
+
                 return ImportCommand(target_module=module,
                                      target_attribute=variable,
                                      source_module=source_module,
                                      source_attribute=None)
 
 
+class RuleGroup(BaseRule):
+    __slots__ = ('rules', 'order', 'hits', 'times', 'calls', 'uid')
+
+    # number of calls between reorderings of unordered group
+    REORDER_PERIOD = 1000
+
+    def __init__(self, config):
+        super().__init__(config)
+
+        self.rules = [construct_rule(rule_config) for rule_config in config.get('rules', ())]
+
+        self.order = list(range(len(self.rules)))
+        self.hits = [0] * len(self.rules)
+        self.times = [0.0] * len(self.rules)
+        self.calls = 0
+
+        self.uid = hashlib.sha256(json.dumps(config.get('rules', ()), sort_keys=True).encode('utf-8')).hexdigest()
+
+        if self.is_unordered():
+            self.load_order()
+
+    def verify_config(self):
+        if 'rules' not in self.config:
+            return False
+
+        if not all(rule.verify_config() for rule in self.rules):
+            return False
+
+        return super().verify_config()
+
+    def prepare(self):
+        for rule in self.rules:
+            rule.prepare()
+
+    def invalidate(self, event):
+        for rule in self.rules:
+            rule.invalidate(event)
+
+    def is_unordered(self):
+        return self.config.get('unordered', False)
+
+    def index_name(self):
+        return 'rule_group_{}'.format(self.uid[:16])
+
+    def load_order(self):
+        cache_dir = self.config.get('cache_dir')
+
+        if cache_dir is None:
+            return
+
+        order = cache.get_index(cache_dir=cache_dir,
+                                index_name=self.index_name(),
+                                fingerprint=self.uid)
+
+        if order is not None and sorted(order) == self.order:
+            self.order = order
+
+    def save_order(self):
+        cache_dir = self.config.get('cache_dir')
+
+        if cache_dir is None:
+            return
+
+        cache.set_index(cache_dir=cache_dir,
+                        index_name=self.index_name(),
+                        fingerprint=self.uid,
+                        index=self.order)
+
+    def reorder(self):
+        # the most effective order for independent rules: by probability of hit divided by cost of call
+        # order of rules without statistics does not changed (sort is stable)
+        def score(index):
+            if self.times[index] == 0:
+                return 0
+
+            return self.hits[index] / self.times[index]
+
+        order = sorted(self.order, key=score, reverse=True)
+
+        if order != self.order:
+            self.order = order
+            self.save_order()
+
+    def apply_checked(self, module, variable):
+        found_commands = []
+
+        for index in self.order:
+            command = self.rules[index].apply(module, variable)
+
+            if command is not None:
+                found_commands.append((index, command))
+
+        if len(found_commands) > 1:
+            raise exceptions.RuleGroupHasOverlaps(variable=variable,
+                                                  rules=[self.config['rules'][index]['type']
+                                                         for index, command in found_commands])
+
+        if found_commands:
+            return found_commands[0][1]
+
+        return None
+
+    def apply_many(self, module, variables):
+
+        if self.is_unordered() and self.config.get('check_overlaps', False):
+            return super().apply_many(module, variables)
+
+        commands = {}
+
+        if not self.is_unordered():
+            for rule in self.rules:
+                if not variables:
+                    break
+
+                found_commands = rule.apply_many(module, variables)
+                commands.update(found_commands)
+                variables = [variable for variable in variables if variable not in found_commands]
+
+            return commands
+
+        self.calls += len(variables)
+
+        if self.calls >= self.REORDER_PERIOD:
+            self.calls = 0
+            self.reorder()
+
+        for index in self.order:
+            if not variables:
+                break
+
+            started_at = time.perf_counter()
+
+            found_commands = self.rules[index].apply_many(module, variables)
+
+            self.times[index] += time.perf_counter() - started_at
+            self.hits[index] += len(found_commands)
+
+            commands.update(found_commands)
+            variables = [variable for variable in variables if variable not in found_commands]
+
+        return commands
+
+    def apply(self, module, variable):
+
+        if not self.is_unordered():
+            for rule in self.rules:
+                command = rule.apply(module, variable)
+
+                if command:
+                    return command
+
+            return None
+
+        if self.config.get('check_overlaps', False):
+            return self.apply_checked(module, variable)
+
+        self.calls += 1
+
+        if self.calls >= self.REORDER_PERIOD:
+            self.calls = 0
+            self.reorder()
+
+        for index in self.order:
+            started_at = time.perf_counter()
+
+            command = self.rules[index].apply(module, variable)
+
+            self.times[index] += time.perf_counter() - started_at
+
+            if command:
+                self.hits[index] += 1
+                return command
+
+        return None
+
+
 register('rule_predefined_names', PredefinedNamesRule)
 register('rule_local_modules', LocalModulesRule)
 register('rule_global_modules', GlobalModulesRule)
+register('rule_global_submodules', GlobalSubmodulesRule)
+register('rule_exported_symbols', ExportedSymbolsRule)
 register('rule_custom', CustomRule)
 register('rule_stdlib', StdLibRule)
 register('rule_prefix', PrefixRule)
 register('rule_local_modules_from_parent', LocalModulesFromParentRule)
 register('rule_local_modules_from_namespace', LocalModulesFromNamespaceRule)
+register('rule_group', RuleGroup)
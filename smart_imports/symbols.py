@@ -0,0 +1,301 @@
+
+import os
+import ast
+import json
+import hashlib
+import warnings
+import importlib.util
+
+from . import cache
+from . import exceptions
+from . import discovering
+
+
+AMBIGUOUS_SYMBOLS_WARNING = 'Ambiguous exported symbols, they will not be imported automatically'
+
+NOT_PARSED_MODULE_WARNING = 'Module can not be parsed, its symbols are not exported'
+
+# version of index, written by "python -m smart_imports build-symbols-index"
+PROTOCOL_VERSION = 1
+
+
+def get_literal_names(node):
+    try:
+        names = ast.literal_eval(node)
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(names, (list, tuple)):
+        return None
+
+    if not all(isinstance(name, str) for name in names):
+        return None
+
+    return list(names)
+
+
+def extract_symbols(source):
+    # returns names from __all__ or all public names, defined on the top level of module
+
+    tree = ast.parse(source)
+
+    symbols = []
+
+    for node in tree.body:
+
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, getattr(ast, 'AnnAssign', ())) and node.value is not None:
+            targets = [node.target]
+        else:
+            targets = []
+
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id == '__all__':
+                names = get_literal_names(node.value)
+
+                if names is not None:
+                    return names
+
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            symbols.append(node.name)
+            continue
+
+        for target in targets:
+            if isinstance(target, ast.Name):
+                symbols.append(target.id)
+
+    return [symbol for symbol in symbols if not symbol.startswith('_')]
+
+
+def find_module_location(module_name):
+    # returns (package paths, path to module source), without importing of any packages
+
+    names = module_name.split('.')
+
+    spec = discovering.find_spec(names[0])
+
+    if spec is None:
+        return None, None
+
+    if spec.submodule_search_locations is None:
+        if len(names) > 1:
+            return None, None
+
+        return None, spec.origin
+
+    paths = list(spec.submodule_search_locations)
+
+    for position, name in enumerate(names[1:], start=1):
+        for path in paths:
+            info = discovering.scan_directory(path)
+
+            if name in info.packages:
+                paths = [os.path.join(path, name)]
+                break
+
+            if name in info.modules and position == len(names) - 1:
+                return None, os.path.join(path, name + '.py')
+        else:
+            return None, None
+
+    return paths, None
+
+
+def find_package_source_files(package_name, paths, include_private=False):
+    files = []
+
+    for path in paths:
+        init_path = os.path.join(path, '__init__.py')
+
+        if os.path.isfile(init_path):
+            files.append((package_name, init_path))
+
+        info = discovering.scan_directory(path)
+
+        for name in sorted(info.modules):
+            module_path = os.path.join(path, name + '.py')
+
+            if (include_private or not name.startswith('_')) and os.path.isfile(module_path):
+                files.append(('{}.{}'.format(package_name, name), module_path))
+
+        for name in sorted(info.packages):
+            if include_private or not name.startswith('_'):
+                files.extend(find_package_source_files('{}.{}'.format(package_name, name),
+                                                       [os.path.join(path, name)],
+                                                       include_private=include_private))
+
+    return files
+
+
+def find_source_files(module_name, include_private=False):
+    # returns [(module name, path to source)] for package (with its public submodules) or for single module
+
+    paths, module_path = find_module_location(module_name)
+
+    if paths is not None:
+        return find_package_source_files(module_name, paths, include_private=include_private)
+
+    if module_path is not None and module_path.endswith('.py') and os.path.isfile(module_path):
+        return [(module_name, module_path)]
+
+    return []
+
+
+def parse_symbols(path, data):
+    # broken files are skipped, like python skips them until they are imported
+    try:
+        return extract_symbols(importlib.util.decode_source(data))
+    except (SyntaxError, ValueError, LookupError) as e:
+        warnings.warn('{}: {} ({})'.format(NOT_PARSED_MODULE_WARNING, path, e), UserWarning, stacklevel=2)
+        return []
+
+
+def get_file_info(path, module_name, old_info):
+    stat = os.stat(path)
+
+    if (old_info is not None and
+            old_info['module'] == module_name and
+            old_info['mtime'] == stat.st_mtime_ns and
+            old_info['size'] == stat.st_size):
+        return old_info
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    # the same checksum, as for sources in utf-8, but does not require decoding
+    checksum = hashlib.sha256(data).hexdigest()
+
+    if old_info is not None and old_info['module'] == module_name and old_info['checksum'] == checksum:
+        symbols = old_info['symbols']
+    else:
+        symbols = parse_symbols(path, data)
+
+    return {'module': module_name,
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'checksum': checksum,
+            'symbols': symbols}
+
+
+def is_modules_chain(modules):
+    modules = sorted(modules, key=len)
+
+    return all(module == modules[0] or module.startswith(modules[0] + '.') for module in modules)
+
+
+def split_symbols(files_info):
+    # returns {symbol: module} and {ambiguous symbol: [modules]}
+
+    candidates = {}
+
+    for info in files_info.values():
+        for symbol in info['symbols']:
+            candidates.setdefault(symbol, set()).add(info['module'])
+
+    index = {}
+    ambiguous = {}
+
+    for symbol, modules in candidates.items():
+        if len(modules) == 1:
+            index[symbol] = next(iter(modules))
+
+        # package reexports symbol from own submodule
+        elif is_modules_chain(modules):
+            index[symbol] = min(modules, key=len)
+
+        else:
+            ambiguous[symbol] = sorted(modules)
+
+    return index, ambiguous
+
+
+def describe_ambiguous_symbols(ambiguous):
+    return ', '.join('{} ({})'.format(symbol, ', '.join(modules)) for symbol, modules in sorted(ambiguous.items()))
+
+
+def build_symbols_index(files_info):
+    # returns {symbol: module}, reports ambiguous symbols
+
+    index, ambiguous = split_symbols(files_info)
+
+    if ambiguous:
+        warnings.warn('{}: {}'.format(AMBIGUOUS_SYMBOLS_WARNING, describe_ambiguous_symbols(ambiguous)),
+                      UserWarning,
+                      stacklevel=2)
+
+    return index
+
+
+def get_index_name(packages):
+    return 'exported_symbols_{}'.format(hashlib.sha256(json.dumps(packages).encode('utf-8')).hexdigest()[:16])
+
+
+def collect_files_info(packages, cache_dir=None):
+    index_name = get_index_name(packages)
+
+    old_files_info = None
+
+    if cache_dir is not None:
+        old_files_info = cache.get_index(cache_dir=cache_dir,
+                                         index_name=index_name,
+                                         fingerprint=index_name)
+
+    if old_files_info is None:
+        old_files_info = {}
+
+    files_info = {}
+
+    for package_name in packages:
+        for module_name, path in find_source_files(package_name):
+            files_info[path] = get_file_info(path, module_name, old_files_info.get(path))
+
+    if cache_dir is not None and files_info != old_files_info:
+        cache.set_index(cache_dir=cache_dir,
+                        index_name=index_name,
+                        fingerprint=index_name,
+                        index=files_info)
+
+    return files_info
+
+
+def get_symbols_index(packages, cache_dir=None):
+    return build_symbols_index(collect_files_info(packages, cache_dir=cache_dir))
+
+
+def build(packages, cache_dir=None):
+    # returns data of index, which is loaded at runtime without parsing of modules
+
+    index, ambiguous = split_symbols(collect_files_info(packages, cache_dir=cache_dir))
+
+    return {'protocol_version': PROTOCOL_VERSION,
+            'packages': packages,
+            'symbols': index,
+            'ambiguous': ambiguous}
+
+
+def write(path, data):
+    temp_path = '{}.{}'.format(path, os.getpid())
+
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, sort_keys=True)
+
+    os.replace(temp_path, path)
+
+
+def load(path, packages):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise exceptions.SymbolsIndexHasWrongFormat(path=path, message=str(e))
+
+    if not isinstance(data, dict) or data.get('protocol_version') != PROTOCOL_VERSION:
+        raise exceptions.SymbolsIndexHasWrongFormat(path=path, message='unsupported protocol version')
+
+    if data.get('packages') != packages:
+        raise exceptions.SymbolsIndexHasWrongFormat(path=path,
+                                                    message='built for packages {}, but rule uses {}'.format(data.get('packages'),
+                                                                                                             packages))
+
+    return data['symbols']
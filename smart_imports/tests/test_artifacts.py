@@ -0,0 +1,252 @@
+
+import io
+import os
+import sys
+import json
+import math
+import importlib
+import py_compile
+import unittest
+
+from unittest import mock
+
+from .. import rules
+from .. import config
+from .. import helpers
+from .. import artifacts
+from .. import exceptions
+from .. import __main__ as main
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_same_code(self):
+        self.assertEqual(artifacts.get_code_fingerprint(compile('x = y + 1\ndef f(): return z', 'a.py', 'exec')),
+                         artifacts.get_code_fingerprint(compile('\n\nx = y + 1\n\ndef f(): return z', '/b/c.py', 'exec')))
+
+    def test_different_code(self):
+        self.assertNotEqual(artifacts.get_code_fingerprint(compile('def f(): return z', 'a.py', 'exec')),
+                            artifacts.get_code_fingerprint(compile('def f(): return q', 'a.py', 'exec')))
+
+    def test_const_repr(self):
+        self.assertEqual(artifacts.get_const_repr(frozenset({'b', 'a'})), "frozenset(['a', 'b'])")
+        self.assertEqual(artifacts.get_const_repr((1, frozenset({2}))), '(1, frozenset([2]))')
+
+
+class ArtifactTestsMixin:
+
+    def setUp(self):
+        super().setUp()
+        config.reset_cache()
+        rules.reset_rules_cache()
+        artifacts.disable()
+
+        # bytecode of removed sources is written explicitly
+        patcher = mock.patch('sys.dont_write_bytecode', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        super().tearDown()
+        config.reset_cache()
+        rules.reset_rules_cache()
+        artifacts.disable()
+        helpers.unload_test_packages()
+
+    def prepair_package(self, temp_directory):
+        os.makedirs(os.path.join(temp_directory, 'a'))
+
+        with open(os.path.join(temp_directory, 'a', '__init__.py'), 'w') as f:
+            f.write('')
+
+        with open(os.path.join(temp_directory, 'a', 'b.py'), 'w') as f:
+            f.write('import smart_imports\nsmart_imports.all()\nx = math.pi\ny = c.z\n')
+
+        with open(os.path.join(temp_directory, 'a', 'c.py'), 'w') as f:
+            f.write('z = 1\n')
+
+        return os.path.join(temp_directory, 'a')
+
+    def remove_sources(self, path):
+        for name in os.listdir(path):
+            if name.endswith('.py'):
+                py_compile.compile(os.path.join(path, name), cfile=os.path.join(path, name + 'c'), doraise=True)
+                os.remove(os.path.join(path, name))
+
+        importlib.invalidate_caches()
+
+
+class TestBuild(ArtifactTestsMixin, unittest.TestCase):
+
+    def test_build(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            data = artifacts.build(['a'])
+
+            self.assertEqual(data['protocol_version'], artifacts.PROTOCOL_VERSION)
+            self.assertEqual(data['cache_tag'], sys.implementation.cache_tag)
+            self.assertEqual(list(data['modules']), ['a.b'])
+
+            with open(os.path.join(path, 'b.py')) as f:
+                code = compile(f.read(), 'b.py', 'exec')
+
+            self.assertEqual(data['modules']['a.b'], [artifacts.get_code_fingerprint(code), 0, ['c', 'math']])
+            self.assertEqual(data['configs'][0]['rules'], config.DEFAULT_CONFIG.rules)
+
+    def test_build__rules_cache_dirs(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            with open(os.path.join(temp_directory, 'smart_imports.json'), 'w') as f:
+                json.dump({'rules': [{'type': 'rule_global_modules', 'cache_dir': './cache'},
+                                     {'type': 'rule_group',
+                                      'cache_dir': './cache',
+                                      'rules': [{'type': 'rule_stdlib', 'cache_dir': './cache'}]}]}, f)
+
+            data = artifacts.build(['a'])
+
+            self.assertEqual(data['configs'][0]['rules'], [{'type': 'rule_global_modules'},
+                                                           {'type': 'rule_group',
+                                                            'rules': [{'type': 'rule_stdlib'}]}])
+
+            self.assertEqual(config.get(os.path.join(temp_directory, 'a', 'b.py')).rules[0]['cache_dir'],
+                             os.path.join(temp_directory, 'cache'))
+
+    def test_build__all_modules(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            self.assertEqual(set(artifacts.build(['a'], all_modules=True)['modules']), {'a', 'a.b', 'a.c'})
+
+    def test_build__not_found(self):
+        with helpers.test_directory():
+            with self.assertRaises(exceptions.ModuleSourcesNotFound):
+                artifacts.build(['a'])
+
+    def test_cli(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            artifact_path = os.path.join(temp_directory, 'artifact.json')
+
+            with mock.patch('sys.stdout', new_callable=io.StringIO):
+                self.assertEqual(main.main(['build-artifact', '--output', artifact_path, 'a']), 0)
+
+            self.assertEqual(list(artifacts.load(artifact_path).modules), ['a.b'])
+
+    def test_cli__error(self):
+        with helpers.test_directory() as temp_directory:
+            with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                self.assertEqual(main.main(['build-artifact', '-o', os.path.join(temp_directory, 'artifact.json'), 'a']), 1)
+
+            self.assertIn('sources of module "a" are not found', stderr.getvalue())
+
+
+class TestLoad(ArtifactTestsMixin, unittest.TestCase):
+
+    def create_artifact(self, temp_directory, data):
+        artifact_path = os.path.join(temp_directory, 'artifact.json')
+        artifacts.write(artifact_path, data)
+        return artifact_path
+
+    def test_get(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            artifact = artifacts.load(self.create_artifact(temp_directory, artifacts.build(['a'])))
+
+            with open(os.path.join(path, 'b.py')) as f:
+                code = compile(f.read(), 'other_path.py', 'exec')
+
+            module_config, variables = artifact.get('a.b', code)
+
+            self.assertEqual(variables, ['c', 'math'])
+            self.assertEqual(module_config.rules, config.DEFAULT_CONFIG.rules)
+
+    def test_get__not_in_artifact(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            artifact = artifacts.load(self.create_artifact(temp_directory, artifacts.build(['a'])))
+
+            with self.assertRaises(exceptions.ModuleNotInArtifact):
+                artifact.get('a.c', compile('', 'c.py', 'exec'))
+
+    def test_get__changed(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            artifact = artifacts.load(self.create_artifact(temp_directory, artifacts.build(['a'])))
+
+            with self.assertRaises(exceptions.ModuleChangedAfterArtifactBuild):
+                artifact.get('a.b', compile('x = 1', 'b.py', 'exec'))
+
+    def test_wrong_cache_tag(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            data = artifacts.build(['a'])
+            data['cache_tag'] = 'other-python'
+
+            with self.assertRaises(exceptions.ArtifactHasWrongFormat):
+                artifacts.load(self.create_artifact(temp_directory, data))
+
+    def test_wrong_format(self):
+        with helpers.test_directory() as temp_directory:
+            with self.assertRaises(exceptions.ArtifactHasWrongFormat):
+                artifacts.load(os.path.join(temp_directory, 'artifact.json'), data=b'{')
+
+    def test_load_from_data(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            data = json.dumps(artifacts.build(['a'])).encode('utf-8')
+
+            artifacts.enable('archive.zip/artifact.json', data=data)
+
+            self.assertEqual(list(artifacts.get_artifact().modules), ['a.b'])
+
+
+class TestSourcelessModules(ArtifactTestsMixin, unittest.TestCase):
+
+    def test_import(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            artifact_path = os.path.join(temp_directory, 'artifact.json')
+
+            artifacts.write(artifact_path, artifacts.build(['a']))
+
+            self.remove_sources(path)
+
+            artifacts.enable(artifact_path)
+
+            module = importlib.import_module('a.b')
+
+            self.assertEqual(module.x, math.pi)
+            self.assertEqual(module.y, 1)
+
+    def test_import__not_in_artifact(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            artifact_path = os.path.join(temp_directory, 'artifact.json')
+
+            artifacts.write(artifact_path, artifacts.build(['a.c']))
+
+            self.remove_sources(path)
+
+            artifacts.enable(artifact_path)
+
+            with self.assertRaises(exceptions.ModuleNotInArtifact):
+                importlib.import_module('a.b')
+
+    def test_import__no_artifact(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            self.remove_sources(path)
+
+            with self.assertRaises(exceptions.NoModuleSource):
+                importlib.import_module('a.b')
@@ -180,3 +180,39 @@ class TestCache(unittest.TestCase):
             loaded_variables = module_cache.get()
 
         self.assertTrue(loaded_variables, variables)
+
+
+class TestGetSetIndex(unittest.TestCase):
+
+    def test_not_cached(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            self.assertEqual(cache.get_index(cache_dir=temp_directory,
+                                             index_name='xxx',
+                                             fingerprint='abc'),
+                             None)
+
+    def test_set_get(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            cache.set_index(cache_dir=temp_directory,
+                            index_name='xxx',
+                            fingerprint='abc',
+                            index={'x': ['y', 'z']})
+
+            self.assertTrue(os.path.isfile(os.path.join(temp_directory, 'xxx.index')))
+
+            self.assertEqual(cache.get_index(cache_dir=temp_directory,
+                                             index_name='xxx',
+                                             fingerprint='abc'),
+                             {'x': ['y', 'z']})
+
+    def test_wrong_fingerprint(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            cache.set_index(cache_dir=temp_directory,
+                            index_name='xxx',
+                            fingerprint='abc',
+                            index=['x'])
+
+            self.assertEqual(cache.get_index(cache_dir=temp_directory,
+                                             index_name='xxx',
+                                             fingerprint='abcd'),
+                             None)
@@ -0,0 +1,144 @@
+
+import time
+import threading
+import unittest
+
+from .. import concurrency
+
+
+class TestGetOrCreate(unittest.TestCase):
+
+    def run_threads(self, function, number=10):
+        threads = [threading.Thread(target=function) for _ in range(number)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    def test_single_flight(self):
+        cache = {}
+        calls = []
+        results = []
+
+        def constructor():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        self.run_threads(lambda: results.append(concurrency.get_or_create(cache, 'key', constructor)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(result is results[0] for result in results))
+
+        self.assertEqual(concurrency._KEYS_LOCKS, {})
+
+    def test_different_keys(self):
+        cache = {}
+
+        for i in range(3):
+            concurrency.get_or_create(cache, i, lambda: i * 10)
+
+        self.assertEqual(cache, {0: 0, 1: 10, 2: 20})
+
+    def test_cached_none(self):
+        cache = {}
+        calls = []
+
+        def constructor():
+            calls.append(1)
+
+        concurrency.get_or_create(cache, 'key', constructor)
+        concurrency.get_or_create(cache, 'key', constructor)
+
+        self.assertEqual(len(calls), 1)
+
+    def test_reentrant(self):
+        cache = {}
+
+        def constructor():
+            # second request of the same key in the same thread must not deadlock
+            return concurrency.get_or_create(cache, 'key', lambda: 1) + 1
+
+        self.assertEqual(concurrency.get_or_create(cache, 'key', constructor), 2)
+
+    def test_error(self):
+        cache = {}
+
+        def constructor():
+            raise ZeroDivisionError()
+
+        with self.assertRaises(ZeroDivisionError):
+            concurrency.get_or_create(cache, 'key', constructor)
+
+        self.assertEqual(cache, {})
+        self.assertEqual(concurrency._KEYS_LOCKS, {})
+
+        self.assertEqual(concurrency.get_or_create(cache, 'key', lambda: 1), 1)
+
+
+class TestGetOrPublish(unittest.TestCase):
+
+    def test_first_published_value(self):
+        cache = {}
+        results = []
+
+        def constructor():
+            time.sleep(0.05)
+            return object()
+
+        threads = [threading.Thread(target=lambda: results.append(concurrency.get_or_publish(cache, 'key', constructor)))
+                   for _ in range(10)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(result is cache['key'] for result in results))
+
+    def test_cached(self):
+        cache = {'key': 1}
+
+        self.assertEqual(concurrency.get_or_publish(cache, 'key', lambda: 2), 1)
+
+    def test_no_deadlock_with_import_lock(self):
+        # thread A computes key and waits for module lock,
+        # thread B holds module lock (imports package) and requests the same key
+        cache = {}
+        module_lock = threading.Lock()
+        inside_constructor = threading.Event()
+        module_locked = threading.Event()
+        results = []
+
+        def constructor():
+            inside_constructor.set()
+
+            with module_lock:
+                return 'value'
+
+        def thread_a():
+            module_locked.wait()
+            results.append(concurrency.get_or_publish(cache, 'key', constructor))
+
+        def thread_b():
+            with module_lock:
+                module_locked.set()
+                inside_constructor.wait()
+                results.append(concurrency.get_or_publish(cache, 'key', lambda: 'value'))
+
+        threads = [threading.Thread(target=thread_a, daemon=True),
+                   threading.Thread(target=thread_b, daemon=True)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(results, ['value', 'value'])
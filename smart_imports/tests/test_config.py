@@ -15,11 +15,11 @@ class TestGet(unittest.TestCase):
 
     def setUp(self):
         super().setUp()
-        config.CONFIGS_CACHE.clear()
+        config.reset_cache()
 
     def tearDown(self):
         super().tearDown()
-        config.CONFIGS_CACHE.clear()
+        config.reset_cache()
 
     def prepair_data(self, temp_directory,
                      parent_config=config.DEFAULT_CONFIG,
@@ -127,6 +127,92 @@ class TestGet(unittest.TestCase):
             self.assertEqual(loaded_config, config.DEFAULT_CONFIG.clone(path=loaded_config.path))
 
 
+    def test_refresh__config_changed(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            leaf_path = self.prepair_data(temp_directory)
+
+            loaded_config = config.get(leaf_path)
+
+            self.assertIs(config.get(leaf_path), loaded_config)
+
+            new_rules = [{'type': 'rule_stdlib'}]
+
+            with open(loaded_config.path, 'w') as f:
+                f.write(json.dumps(loaded_config.clone(rules=new_rules).serialize()))
+
+            # guarantee mtime change on file systems with coarse timestamps
+            os.utime(loaded_config.path, ns=(0, config.LOADED_CONFIGS[loaded_config.path][0] + 1))
+
+            new_config = config.get(leaf_path)
+
+            self.assertEqual(new_config.rules, new_rules)
+            self.assertIs(config.get(os.path.dirname(leaf_path)), new_config)
+
+    def test_default_config_shares_rules(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            loaded_config = config.get(temp_directory, config_name='not_found.json')
+
+            self.assertIs(loaded_config.rules, config.DEFAULT_CONFIG.rules)
+            self.assertEqual(loaded_config.rules_uid, config.DEFAULT_CONFIG.rules_uid)
+
+    def test_config_added(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            leaf_path = self.prepair_data(temp_directory)
+
+            loaded_config = config.get(leaf_path)
+
+            empty_dir = os.path.dirname(leaf_path)
+
+            config_path = os.path.join(empty_dir, constants.CONFIG_FILE_NAME)
+
+            with open(config_path, 'w') as f:
+                f.write(json.dumps(config.DEFAULT_CONFIG.clone(rules=[{'type': 'rule_stdlib'}]).serialize()))
+
+            # guarantee mtime change on file systems with coarse timestamps
+            os.utime(empty_dir, ns=(0, config.CHECKED_DIRECTORIES[empty_dir] + 1))
+
+            new_config = config.get(leaf_path)
+
+            self.assertEqual(new_config.path, config_path)
+            self.assertEqual(new_config.rules, [{'type': 'rule_stdlib'}])
+
+            # configs of other directories are not affected
+            self.assertIs(config.get(os.path.dirname(empty_dir)), loaded_config)
+
+    def test_checked_directory_not_changed(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            leaf_path = self.prepair_data(temp_directory)
+
+            loaded_config = config.get(leaf_path)
+
+            self.assertIn(leaf_path, config.CHECKED_DIRECTORIES)
+            self.assertIn(os.path.dirname(leaf_path), config.CHECKED_DIRECTORIES)
+            self.assertNotIn(os.path.dirname(os.path.dirname(leaf_path)), config.CHECKED_DIRECTORIES)
+
+            self.assertIs(config.get(leaf_path), loaded_config)
+
+
+class TestRulesUid(unittest.TestCase):
+
+    def test_same_rules(self):
+        config_1 = config.DEFAULT_CONFIG.clone(path='/a/smart_imports.json')
+        config_2 = config.DEFAULT_CONFIG.clone(path='/b/smart_imports.json', prefetch=True)
+
+        self.assertEqual(config_1.rules_uid, config_2.rules_uid)
+
+    def test_keys_order(self):
+        config_1 = config.DEFAULT_CONFIG.clone(rules=[{'type': 'rule_custom', 'variables': {}}])
+        config_2 = config.DEFAULT_CONFIG.clone(rules=[{'variables': {}, 'type': 'rule_custom'}])
+
+        self.assertEqual(config_1.rules_uid, config_2.rules_uid)
+
+    def test_different_rules(self):
+        rules_uid = config.DEFAULT_CONFIG.rules_uid
+
+        self.assertNotEqual(config.DEFAULT_CONFIG.clone(rules=[]).rules_uid, rules_uid)
+        self.assertNotEqual(config.DEFAULT_CONFIG.shallow_clone(rules=[]).rules_uid, rules_uid)
+
+
 class TestLoad(unittest.TestCase):
 
     def test_not_exists(self):
@@ -176,6 +262,93 @@ class TestCheck(unittest.TestCase):
     def test_success(self):
         self.check_load(config.DEFAULT_CONFIG.serialize())
 
+    def test_wrong_import_mode(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['import_mode'] = 'xxx'
+
+        with self.assertRaises(exceptions.ConfigHasWrongFormat):
+            self.check_load(data)
+
+        data = config.DEFAULT_CONFIG.serialize()
+        data['rules'] = [{'type': 'rule_stdlib', 'import_mode': 'xxx'}]
+
+        with self.assertRaises(exceptions.ConfigHasWrongFormat):
+            self.check_load(data)
+
+    def test_wrong_prefetch(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['prefetch'] = 'yes'
+
+        with self.assertRaises(exceptions.ConfigHasWrongFormat):
+            self.check_load(data)
+
+    def test_wrong_frozen(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['frozen'] = 'yes'
+
+        with self.assertRaises(exceptions.ConfigHasWrongFormat):
+            self.check_load(data)
+
+    def test_rule_cache_dir(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['rules'] = [{'type': 'rule_global_modules', 'cache_dir': './cache'}]
+
+        loaded_config = config.Config()
+        loaded_config.initialize('/tmp/x/smart_imports.json', data)
+
+        self.assertEqual(loaded_config.rules, [{'type': 'rule_global_modules', 'cache_dir': '/tmp/x/cache'}])
+
+    def test_rule_index(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['rules'] = [{'type': 'rule_exported_symbols', 'packages': ['a'], 'index': 'symbols_index.json'}]
+
+        loaded_config = config.Config()
+        loaded_config.initialize('/tmp/x/smart_imports.json', data)
+
+        self.assertEqual(loaded_config.rules, [{'type': 'rule_exported_symbols',
+                                                'packages': ['a'],
+                                                'index': '/tmp/x/symbols_index.json'}])
+
+    def test_group_rule_cache_dir(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['rules'] = [{'type': 'rule_group',
+                          'cache_dir': './cache',
+                          'rules': [{'type': 'rule_global_modules', 'cache_dir': './cache_2'}]}]
+
+        loaded_config = config.Config()
+        loaded_config.initialize('/tmp/x/smart_imports.json', data)
+
+        self.assertEqual(loaded_config.rules, [{'type': 'rule_group',
+                                                'cache_dir': '/tmp/x/cache',
+                                                'rules': [{'type': 'rule_global_modules', 'cache_dir': '/tmp/x/cache_2'}]}])
+
+    def test_group_rule_without_type(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['rules'] = [{'type': 'rule_group', 'rules': [{'variables': {}}]}]
+
+        with self.assertRaises(exceptions.ConfigHasWrongFormat):
+            self.check_load(data)
+
+    def test_group_rule_import_mode(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['rules'] = [{'type': 'rule_group', 'rules': [{'type': 'rule_stdlib', 'import_mode': 'lazy'}]}]
+
+        with self.assertRaises(exceptions.ConfigHasWrongFormat):
+            self.check_load(data)
+
+    def test_group_import_mode(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['rules'] = [{'type': 'rule_group', 'import_mode': 'lazy', 'rules': [{'type': 'rule_stdlib'}]}]
+
+        self.check_load(data)
+
+    def test_group_rules_not_list(self):
+        data = config.DEFAULT_CONFIG.serialize()
+        data['rules'] = [{'type': 'rule_group', 'rules': {'type': 'rule_stdlib'}}]
+
+        with self.assertRaises(exceptions.ConfigHasWrongFormat):
+            self.check_load(data)
+
 
 class TestExpandCacheDirPath(unittest.TestCase):
 
@@ -1,11 +1,48 @@
 
 import os
+import sys
+import json
+import tempfile
 import unittest
+import importlib
 
+from unittest import mock
+
+from .. import hooks
 from .. import helpers
 from .. import discovering
 
 
+class TestFindTargetModule(unittest.TestCase):
+
+    def execute(self, globals, filename):
+        code = compile('target_module = find_target_module()', filename, 'exec')
+
+        globals['find_target_module'] = discovering.find_target_module
+
+        exec(code, globals)
+
+        return globals['target_module']
+
+    def test_by_name(self):
+        module = type(os)('find_target_module_test')
+
+        with mock.patch.dict('sys.modules', {module.__name__: module}):
+            self.assertIs(self.execute(module.__dict__, 'not_existed.py'), module)
+
+    def test_by_file(self):
+        self.assertIs(self.execute({'__name__': 'os'}, json.__file__), json)
+
+    def test_by_file__index_refreshed(self):
+        module = type(os)('find_target_module_test')
+        module.__file__ = '/not/existed/find_target_module_test.py'
+
+        discovering.MODULES_BY_FILE[module.__file__] = type(os)('old_module')
+
+        with mock.patch.dict('sys.modules', {module.__name__: module}):
+            self.assertIs(self.execute({}, module.__file__), module)
+
+
 class TestFindSpec(unittest.TestCase):
 
     def prepair_modules(self, base_directory):
@@ -71,3 +108,253 @@ class TestFindSpec(unittest.TestCase):
             self.prepair_modules(temp_directory)
 
             self.assertEqual(discovering.find_spec('a.d'), None)
+
+
+class TestModulesIndex(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        discovering.reset_modules_index()
+
+    def tearDown(self):
+        super().tearDown()
+        discovering.reset_modules_index()
+
+    def prepair_modules(self, base_directory):
+        os.makedirs(os.path.join(base_directory, 'a', 'b'))
+        os.makedirs(os.path.join(base_directory, 'a', 'empty'))
+
+        with open(os.path.join(base_directory, 'a', '__init__.py'), 'w') as f:
+            f.write(' ')
+
+        with open(os.path.join(base_directory, 'a', 'x.py'), 'w') as f:
+            f.write(' ')
+
+        with open(os.path.join(base_directory, 'a', 'data.txt'), 'w') as f:
+            f.write(' ')
+
+        with open(os.path.join(base_directory, 'a', 'b', '__init__.py'), 'w') as f:
+            f.write(' ')
+
+    def test_directory_info(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            info = discovering.get_directory_info(os.path.join(temp_directory, 'a'))
+
+            self.assertEqual(info.modules, {'x'})
+            self.assertEqual(info.packages, {'b'})
+
+            self.assertIn('x', info)
+            self.assertIn('b', info)
+            self.assertNotIn('empty', info)
+            self.assertNotIn('__init__', info)
+
+    def test_cached(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            path = os.path.join(temp_directory, 'a')
+
+            self.assertIs(discovering.get_directory_info(path), discovering.get_directory_info(path))
+
+    def test_has_module(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            paths = [os.path.join(temp_directory, 'a')]
+
+            self.assertTrue(discovering.has_module(paths, 'x'))
+            self.assertTrue(discovering.has_module(paths, 'b'))
+            self.assertFalse(discovering.has_module(paths, 'y'))
+
+            self.assertEqual(discovering.find_package_modules(paths), {'x', 'b'})
+
+    def test_find_package_paths(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            self.assertEqual(discovering.find_package_paths('a.b'), [os.path.join(temp_directory, 'a', 'b')])
+            self.assertEqual(discovering.find_package_paths('a.x'), None)
+            self.assertEqual(discovering.find_package_paths('a.y'), None)
+
+    def test_has_module__directory_changed(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            path = os.path.join(temp_directory, 'a')
+
+            self.assertFalse(discovering.has_module([path], 'y'))
+
+            with open(os.path.join(path, 'y.py'), 'w') as f:
+                f.write(' ')
+
+            os.utime(path, ns=(0, 0))
+
+            self.assertTrue(discovering.has_module([path], 'y'))
+
+            self.assertIn('y', discovering.MODULES_INDEX[path])
+
+    def test_has_module__directory_not_changed(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            path = os.path.join(temp_directory, 'a')
+
+            info = discovering.get_directory_info(path)
+
+            self.assertFalse(discovering.has_module([path], 'y'))
+
+            self.assertIs(discovering.MODULES_INDEX[path], info)
+
+    def test_find_package_modules__directory_changed(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            path = os.path.join(temp_directory, 'a')
+
+            self.assertEqual(discovering.find_package_modules([path]), {'x', 'b'})
+
+            os.remove(os.path.join(path, 'x.py'))
+
+            os.utime(path, ns=(0, 0))
+
+            self.assertEqual(discovering.find_package_modules([path]), {'b'})
+
+    def test_forget_specs(self):
+        discovering.SPEC_CACHE['a.y'] = None
+        discovering.SPEC_CACHE['a.b'] = None
+
+        discovering.forget_specs('a', {'y', 'z'})
+
+        self.assertNotIn('a.y', discovering.SPEC_CACHE)
+        self.assertIn('a.b', discovering.SPEC_CACHE)
+
+
+class TestTopLevelIndex(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        discovering.reset_top_level_index()
+
+    def tearDown(self):
+        super().tearDown()
+        discovering.reset_top_level_index()
+
+    def test_index(self):
+        with helpers.test_directory() as temp_directory:
+            with open(os.path.join(temp_directory, 'global_module_x.py'), 'w') as f:
+                f.write(' ')
+
+            index = discovering.get_top_level_index()
+
+            self.assertTrue(index.has_module('global_module_x'))
+            self.assertTrue(index.has_module('json'))
+            self.assertTrue(index.has_module('sys'))
+            self.assertFalse(index.has_module('global_module_y'))
+
+    def test_miss__hook_installed(self):
+        was_installed = hooks.is_installed()
+
+        hooks.install()
+
+        try:
+            index = discovering.get_top_level_index()
+
+            with mock.patch.object(hooks.SmartImportsFinder, 'find_spec') as find_spec:
+                self.assertFalse(index.has_module('global_module_y'))
+
+            find_spec.assert_not_called()
+
+        finally:
+            if not was_installed:
+                hooks.uninstall()
+
+    def test_is_standard_finder(self):
+        self.assertTrue(discovering.is_standard_finder(importlib.machinery.PathFinder))
+        self.assertTrue(discovering.is_standard_finder(hooks.SmartImportsFinder))
+        self.assertFalse(discovering.is_standard_finder(object()))
+
+    def test_cached(self):
+        index_1 = discovering.get_top_level_index()
+        index_2 = discovering.get_top_level_index()
+
+        self.assertIs(index_1, index_2)
+
+    def test_sys_path_changed(self):
+        index_1 = discovering.get_top_level_index()
+
+        with helpers.test_directory() as temp_directory:
+            with open(os.path.join(temp_directory, 'global_module_x.py'), 'w') as f:
+                f.write(' ')
+
+            self.assertFalse(index_1.is_actual())
+
+            index_2 = discovering.get_top_level_index()
+
+            self.assertTrue(index_2.has_module('global_module_x'))
+
+    def test_refresh(self):
+        with helpers.test_directory() as temp_directory:
+            index = discovering.get_top_level_index()
+
+            self.assertFalse(index.refresh())
+
+            with open(os.path.join(temp_directory, 'global_module_x.py'), 'w') as f:
+                f.write(' ')
+
+            os.utime(temp_directory, ns=(0, 0))
+
+            self.assertFalse(index.has_module('global_module_x'))
+
+            self.assertTrue(index.refresh())
+
+            self.assertTrue(index.has_module('global_module_x'))
+
+            self.assertIs(discovering.get_top_level_index(), index)
+
+    @unittest.skipIf(sys.version_info < (3, 8), 'importlib.metadata requires Python 3.8+')
+    def test_distributions_top_level_names(self):
+        with helpers.test_directory() as temp_directory:
+            distribution_path = os.path.join(temp_directory, 'some_distribution-1.0.0.dist-info')
+
+            os.makedirs(distribution_path)
+            os.makedirs(os.path.join(temp_directory, 'namespace_root_x', 'package'))
+
+            with open(os.path.join(temp_directory, 'namespace_root_x', 'package', '__init__.py'), 'w') as f:
+                f.write(' ')
+
+            with open(os.path.join(distribution_path, 'METADATA'), 'w') as f:
+                f.write('Metadata-Version: 2.1\nName: some_distribution\nVersion: 1.0.0\n')
+
+            with open(os.path.join(distribution_path, 'top_level.txt'), 'w') as f:
+                f.write('namespace_root_x\nnot_installed_module_x\nnamespace_root_x/package\n')
+
+            index = discovering.get_top_level_index()
+
+            self.assertFalse(index.has_module('namespace_root_x'))
+            self.assertFalse(index.has_module('not_installed_module_x'))
+            self.assertNotIn('namespace_root_x/package', index.names)
+
+            with mock.patch('smart_imports.discovering._find_spec', return_value=mock.Mock()):
+                discovering.reset_top_level_index()
+
+                self.assertTrue(discovering.get_top_level_index().has_module('not_installed_module_x'))
+
+    def test_persisted(self):
+        with helpers.test_directory() as temp_directory, tempfile.TemporaryDirectory() as cache_dir:
+            with open(os.path.join(temp_directory, 'global_module_x.py'), 'w') as f:
+                f.write(' ')
+
+            discovering.get_top_level_index(cache_dir=cache_dir)
+
+            self.assertTrue(os.path.isfile(os.path.join(cache_dir, discovering.TOP_LEVEL_INDEX_NAME + '.index')))
+
+            discovering.reset_top_level_index()
+
+            with mock.patch('smart_imports.discovering.collect_top_level_modules') as collect_top_level_modules:
+                index = discovering.get_top_level_index(cache_dir=cache_dir)
+
+            collect_top_level_modules.assert_not_called()
+
+            self.assertTrue(index.has_module('global_module_x'))
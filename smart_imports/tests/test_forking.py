@@ -0,0 +1,74 @@
+
+import unittest
+
+from unittest import mock
+
+from .. import rules
+from .. import config
+from .. import forking
+from .. import helpers
+from .. import discovering
+from .. import prefetching
+
+
+class TestPrepareForFork(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.reset_cache()
+        rules.reset_rules_cache()
+
+    def tearDown(self):
+        super().tearDown()
+        config.reset_cache()
+        rules.reset_rules_cache()
+
+    def test_prepare_rules(self):
+        module_config = config.DEFAULT_CONFIG.clone(rules=[{'type': 'rule_stdlib'},
+                                                           {'type': 'rule_group',
+                                                            'rules': [{'type': 'rule_global_modules'}]}])
+
+        rules.get_for_config(module_config)
+
+        with mock.patch('smart_imports.rules.StdLibRule._STDLIB_MODULES', None), \
+             mock.patch('smart_imports.discovering.TOP_LEVEL_INDEX', None):
+
+            forking.prepare_rules()
+
+            self.assertIn('math', rules.StdLibRule._STDLIB_MODULES)
+            self.assertTrue(discovering.TOP_LEVEL_INDEX.has_module('os'))
+
+    def test_compact(self):
+        cache = {i: str(i) for i in range(1000)}
+
+        for i in range(990):
+            del cache[i]
+
+        forking.compact(cache)
+
+        self.assertEqual(cache, {i: str(i) for i in range(990, 1000)})
+
+    def test_compact_caches(self):
+        with helpers.test_directory() as temp_directory:
+            info = discovering.get_directory_info(temp_directory)
+
+            spec_cache = discovering.SPEC_CACHE
+
+            forking.compact_caches()
+
+            self.assertIs(discovering.SPEC_CACHE, spec_cache)
+            self.assertIs(discovering.MODULES_INDEX[temp_directory], info)
+
+            discovering.forget_directory(temp_directory)
+
+    def test_prepare_for_fork(self):
+        prefetching.get_executor()
+
+        with mock.patch('gc.freeze', create=True) as freeze, \
+             mock.patch('smart_imports.forking.prepare_rules') as prepare_rules:
+            forking.prepare_for_fork()
+
+        prepare_rules.assert_called_once_with()
+        freeze.assert_called_once_with()
+
+        self.assertIsNone(prefetching._EXECUTOR)
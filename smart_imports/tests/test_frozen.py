@@ -0,0 +1,229 @@
+
+import io
+import os
+import json
+import math
+import importlib
+import unittest
+
+from unittest import mock
+
+from .. import rules
+from .. import config
+from .. import frozen
+from .. import helpers
+from .. import importer
+from .. import constants
+from .. import exceptions
+from .. import lazy_modules
+from .. import __main__ as main
+
+
+class TestImportStatement(unittest.TestCase):
+
+    def test_module(self):
+        self.assertEqual(frozen.get_import_statement('math', 'math', None), 'import math')
+
+    def test_module__alias(self):
+        self.assertEqual(frozen.get_import_statement('c', 'a.c', None), 'import a.c as c')
+
+    def test_attribute(self):
+        self.assertEqual(frozen.get_import_statement('z', 'a.c', 'z'), 'from a.c import z')
+
+    def test_attribute__alias(self):
+        self.assertEqual(frozen.get_import_statement('y', 'a.c', 'z'), 'from a.c import z as y')
+
+
+class TestFrozen(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.reset_cache()
+        rules.reset_rules_cache()
+
+        patcher = mock.patch('sys.dont_write_bytecode', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        super().tearDown()
+        config.reset_cache()
+        rules.reset_rules_cache()
+        importer.APPLIED_PLANS.clear()
+        lazy_modules.PENDING.clear()
+        helpers.unload_test_packages()
+
+    def prepair_package(self, temp_directory, **config_fields):
+        path = os.path.join(temp_directory, 'a')
+
+        os.makedirs(path)
+
+        config_data = config.DEFAULT_CONFIG.serialize()
+        config_data.update(path=None, frozen=True)
+        config_data.update(config_fields)
+
+        with open(os.path.join(path, constants.CONFIG_FILE_NAME), 'w') as f:
+            json.dump(config_data, f)
+
+        with open(os.path.join(path, '__init__.py'), 'w') as f:
+            f.write('')
+
+        with open(os.path.join(path, 'b.py'), 'w') as f:
+            f.write('import smart_imports\nsmart_imports.all()\nx = math.pi\ny = c.z\nl = len\n')
+
+        with open(os.path.join(path, 'c.py'), 'w') as f:
+            f.write('z = 1\n')
+
+        return path
+
+    def reimport(self):
+        helpers.unload_test_packages()
+        importer.APPLIED_PLANS.clear()
+        importlib.invalidate_caches()
+
+    def test_freeze(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            self.assertEqual(frozen.freeze(['a']), [])
+
+            self.assertEqual(sorted(name for name in os.listdir(path) if name.endswith(frozen.SIDECAR_SUFFIX)),
+                             ['b' + frozen.SIDECAR_SUFFIX])
+
+            with open(os.path.join(path, 'b' + frozen.SIDECAR_SUFFIX)) as f:
+                self.assertEqual(f.read(),
+                                 frozen.HEADER +
+                                 frozen.get_checksum_line(os.path.join(path, 'b.py')) +
+                                 'import a.c as c\nimport math\n')
+
+    def test_freeze__lazy(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory, import_mode=constants.IMPORT_MODE.LAZY.value)
+
+            frozen.freeze(['a'])
+
+            with open(os.path.join(path, 'b' + frozen.SIDECAR_SUFFIX)) as f:
+                self.assertEqual(f.read(),
+                                 frozen.HEADER +
+                                 frozen.get_checksum_line(os.path.join(path, 'b.py')) +
+                                 '\nimport smart_imports.frozen\n\n'
+                                 "smart_imports.frozen.import_lazily(__name__, 'c', 'a.c', None)\n"
+                                 "smart_imports.frozen.import_lazily(__name__, 'math', 'math', None)\n")
+
+            self.reimport()
+
+            module = importlib.import_module('a.b')
+
+            self.assertEqual(module.x, math.pi)
+            self.assertEqual(module.y, 1)
+
+    def test_freeze__custom_commands(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            with mock.patch.object(importer, 'PLANNED_COMMANDS', (rules.NoImportCommand,)):
+                with self.assertRaises(exceptions.ModuleCanNotBeFrozen):
+                    frozen.freeze(['a'])
+
+    def test_import(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            frozen.freeze(['a'])
+
+            self.reimport()
+
+            with mock.patch('smart_imports.importer.process_module') as process_module:
+                module = importlib.import_module('a.b')
+
+            process_module.assert_not_called()
+
+            self.assertEqual(module.x, math.pi)
+            self.assertEqual(module.y, 1)
+            self.assertIs(module.l, len)
+
+    def test_import__changed(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            frozen.freeze(['a'])
+
+            with open(os.path.join(path, 'b.py'), 'a') as f:
+                f.write('j = json\n')
+
+            self.reimport()
+
+            module = importlib.import_module('a.b')
+
+            self.assertEqual(module.j.__name__, 'json')
+            self.assertEqual(module.y, 1)
+            self.assertIn('a.b', importer.APPLIED_PLANS)
+
+    def test_import__sidecar_without_checksum(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            with open(os.path.join(path, 'b' + frozen.SIDECAR_SUFFIX), 'w') as f:
+                f.write(frozen.HEADER + 'x = 0\n')
+
+            module = importlib.import_module('a.b')
+
+            self.assertEqual(module.x, math.pi)
+            self.assertIn('a.b', importer.APPLIED_PLANS)
+
+    def test_import__no_sidecar(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            module = importlib.import_module('a.b')
+
+            self.assertEqual(module.y, 1)
+            self.assertIn('a.b', importer.APPLIED_PLANS)
+
+    def test_import__not_frozen_config(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory, frozen=False)
+
+            frozen.freeze(['a'])
+
+            with open(os.path.join(path, 'b' + frozen.SIDECAR_SUFFIX), 'w') as f:
+                f.write('x = 0\n')
+
+            self.reimport()
+
+            self.assertEqual(importlib.import_module('a.b').x, math.pi)
+
+    def test_check(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            self.assertEqual(frozen.freeze(['a'], check=True), [os.path.join(path, 'b' + frozen.SIDECAR_SUFFIX)])
+
+            frozen.freeze(['a'])
+
+            self.reimport()
+
+            self.assertEqual(frozen.freeze(['a'], check=True), [])
+
+            with open(os.path.join(path, 'b.py'), 'a') as f:
+                f.write('j = json\n')
+
+            self.reimport()
+
+            self.assertEqual(frozen.freeze(['a'], check=True), [os.path.join(path, 'b' + frozen.SIDECAR_SUFFIX)])
+
+    def test_cli(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                self.assertEqual(main.main(['freeze', '--check', 'a']), 1)
+
+            self.assertIn('outdated: ', stderr.getvalue())
+
+            with mock.patch('sys.stdout', new_callable=io.StringIO):
+                self.assertEqual(main.main(['freeze', 'a']), 0)
+
+            self.reimport()
+
+            self.assertEqual(main.main(['freeze', '--check', 'a']), 0)
@@ -0,0 +1,228 @@
+
+import os
+import ast
+import sys
+import math
+import uuid
+import unittest
+import importlib
+
+from unittest import mock
+
+from .. import hooks
+from .. import config
+from .. import helpers
+from .. import importer
+from .. import exceptions
+
+
+class TestHooks(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        hooks.install()
+
+    def tearDown(self):
+        super().tearDown()
+        hooks.uninstall()
+
+    def create_module(self, temp_directory, source):
+        module_name = 'hooks_module_{}'.format(uuid.uuid4().hex)
+
+        with open(os.path.join(temp_directory, module_name + '.py'), 'w') as f:
+            f.write(source)
+
+        return module_name
+
+    def test_install(self):
+        hooks.install()
+
+        self.assertEqual(sys.meta_path.count(hooks.SmartImportsFinder), 1)
+        self.assertNotIn(importlib.machinery.PathFinder, sys.meta_path)
+
+        hooks.uninstall()
+
+        self.assertFalse(hooks.is_installed())
+        self.assertIn(importlib.machinery.PathFinder, sys.meta_path)
+
+    def test_missed_module_searched_once(self):
+        with mock.patch.object(importlib.machinery.PathFinder,
+                               '_get_spec',
+                               side_effect=importlib.machinery.PathFinder._get_spec) as get_spec:
+            with self.assertRaises(ImportError):
+                importlib.import_module('hooks_missed_module_{}'.format(uuid.uuid4().hex))
+
+        self.assertEqual(get_spec.call_count, 1)
+
+    def test_calls_all(self):
+        self.assertTrue(hooks.calls_all(ast.parse('import smart_imports\nsmart_imports.all()\n')))
+        self.assertFalse(hooks.calls_all(ast.parse('import smart_imports\nsmart_imports.all(module)\n')))
+        self.assertFalse(hooks.calls_all(ast.parse('import smart_imports\ndef f():\n    smart_imports.all()\n')))
+        self.assertFalse(hooks.calls_all(ast.parse('import smart_imports\nsmart_imports.lazy()\n')))
+
+    def test_resolved_before_execution(self):
+        source = 'import smart_imports\nsmart_imports.all()\n\nx = math.pi\n'
+
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, source)
+
+            with mock.patch('smart_imports.importer.import_names') as import_names:
+                module = importlib.import_module(module_name)
+
+            import_names.assert_not_called()
+
+            self.assertEqual(module.x, math.pi)
+            self.assertEqual(module.__spec__.loader_state, None)
+
+    def test_single_parse(self):
+        source = 'import smart_imports\nsmart_imports.all()\n\nx = math.pi\n'
+
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, source)
+
+            with mock.patch('smart_imports.importer.extract_variables') as extract_variables:
+                module = importlib.import_module(module_name)
+
+            extract_variables.assert_not_called()
+
+            self.assertIsInstance(module.__loader__, hooks.SmartImportsLoader)
+            self.assertEqual(module.x, math.pi)
+
+            # analysis is released after usage
+            self.assertEqual(module.__spec__.loader_state, None)
+
+    def test_not_smart_imports_module(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, 'x = 1\n')
+
+            with mock.patch('smart_imports.importer.extract_tree_variables') as extract_tree_variables:
+                module = importlib.import_module(module_name)
+
+            extract_tree_variables.assert_not_called()
+
+            self.assertEqual(module.x, 1)
+            self.assertEqual(module.__spec__.loader_state, None)
+
+    def test_no_import_found(self):
+        source = 'import smart_imports\nsmart_imports.all()\n\ndef f():\n    return unknown_variable\n'
+
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, source)
+
+            with self.assertRaises(exceptions.NoImportFound) as error:
+                importlib.import_module(module_name)
+
+            self.assertEqual(error.exception.arguments['lines'], [5])
+
+    def test_package(self):
+        with helpers.test_directory() as temp_directory:
+            os.makedirs(os.path.join(temp_directory, 'a'))
+
+            with open(os.path.join(temp_directory, 'a', '__init__.py'), 'w') as f:
+                f.write('import smart_imports\nsmart_imports.all()\n\nx = b.y\n')
+
+            with open(os.path.join(temp_directory, 'a', 'b.py'), 'w') as f:
+                f.write('y = 13\n')
+
+            module = importlib.import_module('a')
+
+            self.assertIsInstance(module.__loader__, hooks.SmartImportsLoader)
+            self.assertEqual(module.x, 13)
+            self.assertEqual(module.__path__, [os.path.join(temp_directory, 'a')])
+
+
+class TestActivate(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        hooks.activate('a')
+
+    def tearDown(self):
+        super().tearDown()
+        hooks.deactivate('a')
+        hooks.uninstall()
+
+    def create_package(self, temp_directory):
+        os.makedirs(os.path.join(temp_directory, 'a'))
+
+        with open(os.path.join(temp_directory, 'a', '__init__.py'), 'w') as f:
+            f.write('x = math.pi\n')
+
+        with open(os.path.join(temp_directory, 'a', 'b.py'), 'w') as f:
+            f.write('y = c.z + "1"\n')
+
+        with open(os.path.join(temp_directory, 'a', 'c.py'), 'w') as f:
+            f.write('import smart_imports\nsmart_imports.all()\n\nz = json.__name__\n')
+
+        with open(os.path.join(temp_directory, 'a', 'd.py'), 'w') as f:
+            f.write('# smart_imports: off\n\ntry:\n    unknown_variable\nexcept NameError:\n    ok = True\n')
+
+    def test_get_activated_package(self):
+        self.assertEqual(hooks.get_activated_package('a'), 'a')
+        self.assertEqual(hooks.get_activated_package('a.b.c'), 'a')
+        self.assertEqual(hooks.get_activated_package('ab'), None)
+        self.assertEqual(hooks.get_activated_package('b.a'), None)
+
+    def test_package_processed(self):
+        with helpers.test_directory() as temp_directory:
+            self.create_package(temp_directory)
+
+            with mock.patch('smart_imports.importer.import_names', wraps=importer.import_names) as import_names:
+                module = importlib.import_module('a.b')
+
+            self.assertEqual(sys.modules['a'].x, math.pi)
+            self.assertEqual(module.y, 'json1')
+
+            # explicit call of smart_imports.all() in a.c does not process module twice
+            self.assertEqual(import_names.call_count, 3)
+
+            self.assertTrue(importer.is_processed(sys.modules['a.c']))
+
+    def test_config_shared(self):
+        with helpers.test_directory() as temp_directory:
+            self.create_package(temp_directory)
+
+            with mock.patch('smart_imports.config.get', wraps=config.get) as config_get:
+                importlib.import_module('a.b')
+
+            self.assertEqual(config_get.call_count, 1)
+
+    def test_opt_out(self):
+        with helpers.test_directory() as temp_directory:
+            self.create_package(temp_directory)
+
+            module = importlib.import_module('a.d')
+
+            self.assertTrue(module.ok)
+            self.assertFalse(importer.is_processed(module))
+
+    def test_bytecode_cache(self):
+        with helpers.test_directory() as temp_directory:
+            self.create_package(temp_directory)
+
+            with mock.patch.object(sys, 'dont_write_bytecode', False):
+                importlib.import_module('a.b')
+                importlib.import_module('a.d')
+
+            helpers.unload_test_packages()
+
+            with mock.patch('smart_imports.hooks.SmartImportsLoader.source_to_code') as source_to_code:
+                module = importlib.import_module('a.b')
+                other_module = importlib.import_module('a.d')
+
+            source_to_code.assert_not_called()
+
+            self.assertEqual(module.y, 'json1')
+            self.assertTrue(importer.is_processed(module))
+
+            self.assertTrue(other_module.ok)
+            self.assertFalse(importer.is_processed(other_module))
+
+    def test_not_activated_package(self):
+        hooks.deactivate('a')
+
+        with helpers.test_directory() as temp_directory:
+            self.create_package(temp_directory)
+
+            with self.assertRaises(NameError):
+                importlib.import_module('a')
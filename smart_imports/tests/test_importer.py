@@ -1,10 +1,12 @@
 
 import os
+import sys
 import math
 import json
 import uuid
 import unittest
 import importlib
+import threading
 import subprocess
 
 from unittest import mock
@@ -67,6 +69,38 @@ class TestApplyRules(unittest.TestCase):
                                                       source_attribute=None))
 
 
+class TestApplyRulesMany(unittest.TestCase):
+
+    def setUp(self):
+        self.config = config.DEFAULT_CONFIG.clone(path='#config.many',
+                                                  rules=[{'type': 'rule_custom',
+                                                          'variables': {'var_1': {'module': 'math'},
+                                                                        'json': {'module': 'os'}}},
+                                                         {'type': 'rule_stdlib'},
+                                                         {'type': 'rule_predefined_names'}])
+
+        self.module = type(os)
+
+    def test(self):
+        variables = ['var_1', 'json', 'os_path', 'print', 'unknown']
+
+        commands = importer.apply_rules_many(module_config=self.config,
+                                             module=self.module,
+                                             variables=variables)
+
+        self.assertEqual(commands,
+                         {'var_1': rules.ImportCommand(self.module, 'var_1', 'math', None),
+                          'json': rules.ImportCommand(self.module, 'json', 'os', None),
+                          'os_path': rules.ImportCommand(self.module, 'os_path', 'os.path', None),
+                          'print': rules.NoImportCommand()})
+
+        for variable in variables:
+            self.assertEqual(commands.get(variable),
+                             importer.apply_rules(module_config=self.config,
+                                                  module=self.module,
+                                                  variable=variable))
+
+
 class TestGetModuleScopesTree(unittest.TestCase):
 
     def test(self):
@@ -362,6 +396,344 @@ class TestAll(unittest.TestCase):
         self.assertEqual(string.digits, '0123456789')
 
 
+class TestReload(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        # reloaded modules are rewritten in the same second, so stale bytecode can be used
+        patcher = mock.patch('sys.dont_write_bytecode', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_module(self, path, source):
+        with open(path, 'w') as f:
+            f.write(source)
+
+        importlib.invalidate_caches()
+
+    def reload(self, module):
+        with mock.patch('smart_imports.importer.apply_rules_many', wraps=importer.apply_rules_many) as apply_rules_many:
+            importlib.reload(module)
+
+        return apply_rules_many.call_args[1]['variables']
+
+    def test_not_changed(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'reload_module_{}'.format(uuid.uuid4().hex)
+            module_path = os.path.join(temp_directory, module_name + '.py')
+
+            self.write_module(module_path, 'import smart_imports\nsmart_imports.all()\nx = json.dumps(1)')
+
+            module = importlib.import_module(module_name)
+
+            with mock.patch('smart_imports.importer.extract_variables') as extract_variables:
+                self.assertEqual(self.reload(module), [])
+
+            extract_variables.assert_not_called()
+
+            self.assertIs(module.json, json)
+
+    def test_changed(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'reload_module_{}'.format(uuid.uuid4().hex)
+            module_path = os.path.join(temp_directory, module_name + '.py')
+
+            self.write_module(module_path, 'import smart_imports\nsmart_imports.all()\nx = json.dumps(math.pi)')
+
+            module = importlib.import_module(module_name)
+
+            self.assertIs(module.math, math)
+
+            self.write_module(module_path, 'import smart_imports\nsmart_imports.all()\nx = json.dumps(uuid.uuid4().hex)')
+
+            self.assertEqual(self.reload(module), ['uuid'])
+
+            self.assertIs(module.json, json)
+            self.assertIs(module.uuid, uuid)
+            self.assertNotIn('math', module.__dict__)
+
+    def test_new_module_object(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'reload_module_{}'.format(uuid.uuid4().hex)
+
+            self.write_module(os.path.join(temp_directory, module_name + '.py'),
+                              'import smart_imports\nsmart_imports.all()\nx = json.dumps(1)')
+
+            importlib.import_module(module_name)
+
+            del sys.modules[module_name]
+
+            module = importlib.import_module(module_name)
+
+            self.assertIs(importer.APPLIED_PLANS[module_name].module(), module)
+            self.assertIs(module.json, json)
+
+    def test_local_module_added(self):
+        with helpers.test_directory() as temp_directory:
+            os.makedirs(os.path.join(temp_directory, 'a'))
+
+            self.write_module(os.path.join(temp_directory, 'a', '__init__.py'), '')
+            self.write_module(os.path.join(temp_directory, 'a', 'b.py'), 'import smart_imports\nsmart_imports.all()\nx = json.dumps(math.pi)')
+
+            module = importlib.import_module('a.b')
+
+            self.assertIs(module.json, json)
+
+            self.write_module(os.path.join(temp_directory, 'a', 'json.py'), 'dumps = repr')
+
+            self.assertEqual(self.reload(module), ['json'])
+
+            self.assertIs(module.json, sys.modules['a.json'])
+            self.assertIs(module.math, math)
+
+    def test_local_module_added__index_refreshed_by_other_module(self):
+        with helpers.test_directory() as temp_directory:
+            package_name = 'reload_package_{}'.format(uuid.uuid4().hex)
+
+            os.makedirs(os.path.join(temp_directory, package_name))
+
+            self.write_module(os.path.join(temp_directory, package_name, '__init__.py'), '')
+            self.write_module(os.path.join(temp_directory, package_name, 'a.py'), 'import smart_imports\nsmart_imports.all()\nx = json.dumps(1)')
+
+            module = importlib.import_module(package_name + '.a')
+
+            self.assertIs(module.json, json)
+
+            self.write_module(os.path.join(temp_directory, package_name, 'json.py'), 'dumps = repr')
+            self.write_module(os.path.join(temp_directory, package_name, 'b.py'), 'import smart_imports\nsmart_imports.all()\nx = math.pi')
+
+            importlib.import_module(package_name + '.b')
+
+            self.assertEqual(self.reload(module), ['json'])
+
+            self.assertIs(module.json, sys.modules[package_name + '.json'])
+
+    def test_implicit_import_replaced_by_explicit(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'reload_module_{}'.format(uuid.uuid4().hex)
+            module_path = os.path.join(temp_directory, module_name + '.py')
+
+            self.write_module(module_path, 'import smart_imports\nsmart_imports.all()\ndef f(): return json.dumps(1)')
+
+            module = importlib.import_module(module_name)
+
+            self.write_module(module_path, 'import json\nimport smart_imports\nsmart_imports.all()\ndef f(): return json.dumps(1)')
+
+            self.reload(module)
+
+            self.assertIs(module.json, json)
+            self.assertEqual(module.f(), '1')
+
+    def test_rebound_name_is_not_dropped(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'reload_module_{}'.format(uuid.uuid4().hex)
+            module_path = os.path.join(temp_directory, module_name + '.py')
+
+            self.write_module(module_path, 'import smart_imports\nsmart_imports.all()\ndef f(): return math.pi')
+
+            module = importlib.import_module(module_name)
+
+            module.math = 'custom value'
+
+            self.write_module(module_path, 'import smart_imports\nsmart_imports.all()\ndef f(): return json.dumps(1)')
+
+            self.reload(module)
+
+            self.assertEqual(module.math, 'custom value')
+
+
+class TestExecuteCommands(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.module = type(os)('some_module')
+
+    def test_group_commands(self):
+        commands = [rules.ImportCommand(self.module, 'a', 'math', 'pi'),
+                    rules.ImportCommand(self.module, 'b', 'json', None),
+                    rules.LazyImportCommand(self.module, 'c', 'math', None),
+                    rules.ImportCommand(self.module, 'd', 'math', 'e')]
+
+        self.assertEqual(importer.group_commands(commands),
+                         [[commands[0], commands[3]],
+                          [commands[1]],
+                          [commands[2]]])
+
+    def test_execute(self):
+        commands = [rules.ImportCommand(self.module, 'a', 'math', 'pi'),
+                    rules.ImportCommand(self.module, 'b', 'json', None),
+                    rules.LazyImportCommand(self.module, 'c', 'math', None),
+                    rules.ImportCommand(self.module, 'd', 'math', 'e')]
+
+        importer.execute_commands(commands)
+
+        self.assertEqual(self.module.a, math.pi)
+        self.assertIs(self.module.b, json)
+        self.assertIs(self.module.c, math)
+        self.assertEqual(self.module.d, math.e)
+
+    def test_not_imported_module(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'execute_commands_{}'.format(uuid.uuid4().hex)
+
+            # imported module uses value, bound by previous command
+            with open(os.path.join(temp_directory, module_name + '.py'), 'w') as f:
+                f.write('import sys\nx = sys.modules["some_module"].a')
+
+            commands = [rules.ImportCommand(self.module, 'a', 'math', 'pi'),
+                        rules.ImportCommand(self.module, 'b', module_name, 'x')]
+
+            with mock.patch.dict('sys.modules', {'some_module': self.module}):
+                importer.execute_commands(commands)
+
+            self.assertEqual(self.module.b, math.pi)
+
+    def test_module_imported_by_other_thread(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'execute_commands_{}'.format(uuid.uuid4().hex)
+
+            with open(os.path.join(temp_directory, module_name + '.py'), 'w') as f:
+                f.write('import builtins\nbuiltins.IMPORT_STARTED.set()\nimport time\ntime.sleep(0.1)\nVALUE = 1\n')
+
+            import builtins
+
+            builtins.IMPORT_STARTED = threading.Event()
+
+            thread = threading.Thread(target=importlib.import_module, args=(module_name,))
+
+            try:
+                thread.start()
+
+                builtins.IMPORT_STARTED.wait()
+
+                importer.execute_commands([rules.ImportCommand(self.module, 'VALUE', module_name, 'VALUE')])
+
+                self.assertEqual(self.module.VALUE, 1)
+
+            finally:
+                thread.join()
+                del builtins.IMPORT_STARTED
+
+    def test_multiple_target_modules(self):
+        other_module = type(os)('other_module')
+
+        commands = [rules.ImportCommand(self.module, 'a', 'math', 'pi'),
+                    rules.ImportCommand(other_module, 'a', 'math', 'e')]
+
+        importer.execute_commands(commands)
+
+        self.assertEqual(self.module.a, math.pi)
+        self.assertEqual(other_module.a, math.e)
+
+
+class TestLazy(unittest.TestCase):
+
+    def create_module(self, temp_directory, source):
+        module_name = 'lazy_module_{}'.format(uuid.uuid4().hex)
+
+        with open(os.path.join(temp_directory, module_name + '.py'), 'w') as f:
+            f.write(source)
+
+        return importlib.import_module(module_name)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'module __getattr__ requires Python 3.7+')
+    def test_attribute_access(self):
+        with helpers.test_directory() as temp_directory:
+            module = self.create_module(temp_directory, 'import smart_imports\nsmart_imports.lazy()\n')
+
+            self.assertNotIn('json', module.__dict__)
+
+            self.assertIs(module.json, json)
+
+            self.assertIs(module.__dict__['json'], json)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'module __getattr__ requires Python 3.7+')
+    def test_from_import(self):
+        with helpers.test_directory() as temp_directory:
+            module = self.create_module(temp_directory, 'import smart_imports\nsmart_imports.lazy()\n')
+
+            namespace = {}
+
+            exec('from {} import math'.format(module.__name__), namespace)
+
+            self.assertIs(namespace['math'], math)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'module __getattr__ requires Python 3.7+')
+    def test_special_names(self):
+        with helpers.test_directory() as temp_directory:
+            module = self.create_module(temp_directory, 'import smart_imports\nsmart_imports.lazy()\n')
+
+            with mock.patch('smart_imports.importer.apply_rules') as apply_rules:
+                self.assertFalse(hasattr(module, '__wrapped__'))
+
+            apply_rules.assert_not_called()
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'module __getattr__ requires Python 3.7+')
+    def test_predefined_names(self):
+        with helpers.test_directory() as temp_directory:
+            module = self.create_module(temp_directory, 'import smart_imports\nsmart_imports.lazy()\n')
+
+            with self.assertRaises(AttributeError):
+                module.print
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'module __getattr__ requires Python 3.7+')
+    def test_no_import_found(self):
+        source = '''
+import smart_imports
+smart_imports.lazy()
+
+def y():
+    return module.unknown_variable
+'''
+
+        with helpers.test_directory() as temp_directory:
+            module = self.create_module(temp_directory, source)
+
+            self.assertFalse(hasattr(module, 'unknown_variable'))
+
+            with mock.patch('smart_imports.importer.get_undefined_variable_lines') as get_undefined_variable_lines:
+                with self.assertRaises(exceptions.NoLazyImportFound):
+                    module.unknown_variable
+
+                with self.assertRaises(exceptions.NoImportFound) as error:
+                    module.module
+
+            get_undefined_variable_lines.assert_not_called()
+
+            self.assertNotIn('lines', error.exception.arguments)
+
+            self.assertEqual(importer.get_undefined_variable_lines(module, 'unknown_variable'), [])
+            self.assertEqual(importer.get_undefined_variable_lines(module, 'module'), [6])
+
+    @unittest.skipIf(sys.version_info >= (3, 7), 'module __getattr__ is supported')
+    def test_not_supported(self):
+        with self.assertRaises(exceptions.LazyImportsNotSupported):
+            importer.lazy(mock.Mock())
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'module __getattr__ requires Python 3.7+')
+    def test_original_getattr(self):
+        source = '''
+import smart_imports
+
+def __getattr__(name):
+    if name == 'special':
+        return 13
+    raise AttributeError(name)
+
+smart_imports.lazy()
+'''
+
+        with helpers.test_directory() as temp_directory:
+            module = self.create_module(temp_directory, source)
+
+            self.assertIs(module.json, json)
+            self.assertEqual(module.special, 13)
+
+            with self.assertRaises(AttributeError):
+                module.unknown_variable
+
+
 class TestSimpleScript(unittest.TestCase):
 
     def prepair_modules(self, base_directory):
@@ -394,3 +766,48 @@ myprint((__name__, datetime.datetime.now()))
 
             self.assertIn(b"'__main__'", output)
             self.assertIn(b"datetime.datetime", output)
+
+
+class TestOptionalFeatures(unittest.TestCase):
+
+    def get_imported_modules(self, environment):
+        code = ('import sys, smart_imports; '
+                "print(' '.join(sorted(name for name in sys.modules if name.startswith('smart_imports.'))))")
+
+        project_directory = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+        environment = dict(os.environ, PYTHONPATH=project_directory, **environment)
+
+        for environment_variable in (constants.PROFILING_ENVIRONMENT_VARIABLE,
+                                     constants.ANALYSIS_ENVIRONMENT_VARIABLE,
+                                     constants.MANIFEST_ENVIRONMENT_VARIABLE):
+            environment.setdefault(environment_variable, '')
+
+        output = subprocess.check_output([sys.executable, '-c', code], env=environment)
+
+        return set(output.decode('utf-8').split())
+
+    def test_not_imported(self):
+        modules = self.get_imported_modules({})
+
+        for module_name in ('manifest', 'artifacts', 'frozen', 'profiling', 'prefetching',
+                            'hooks', 'preloading', 'forking', 'symbols'):
+            self.assertNotIn('smart_imports.' + module_name, modules)
+
+    def test_enabled_by_environment(self):
+        modules = self.get_imported_modules({constants.PROFILING_ENVIRONMENT_VARIABLE: '1'})
+
+        self.assertIn('smart_imports.profiling', modules)
+        self.assertNotIn('smart_imports.manifest', modules)
+
+    def test_get_enabled_feature(self):
+        from .. import profiling
+
+        self.assertIsNone(importer.get_enabled_feature(importer.PROFILING_MODULE))
+
+        profiling.enable()
+
+        try:
+            self.assertIs(importer.get_enabled_feature(importer.PROFILING_MODULE), profiling)
+        finally:
+            profiling.disable()
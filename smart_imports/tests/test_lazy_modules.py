@@ -0,0 +1,149 @@
+
+import os
+import sys
+import uuid
+import unittest
+
+from .. import lazy_modules
+from .. import rules
+from .. import config
+from .. import helpers
+from .. import importer
+
+
+class TestImportModule(unittest.TestCase):
+
+    def create_module(self, directory, source, name=None):
+        module_name = name or 'lazy_module_{}'.format(uuid.uuid4().hex)
+
+        with open(os.path.join(directory, module_name + '.py'), 'w') as f:
+            f.write(source)
+
+        return module_name
+
+    def test_not_executed(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, 'raise RuntimeError("executed")')
+
+            module = lazy_modules.import_module(module_name)
+
+            self.assertIs(sys.modules[module_name], module)
+
+            with self.assertRaises(RuntimeError):
+                module.x
+
+    def test_executed_on_access(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, 'x = 1')
+
+            module = lazy_modules.import_module(module_name)
+
+            self.assertEqual(module.x, 1)
+
+    def test_already_imported(self):
+        self.assertIs(lazy_modules.import_module('os'), os)
+
+    def test_not_found(self):
+        with self.assertRaises(ImportError):
+            lazy_modules.import_module('lazy_module_{}'.format(uuid.uuid4().hex))
+
+    def test_submodule(self):
+        with helpers.test_directory() as temp_directory:
+            os.makedirs(os.path.join(temp_directory, 'a'))
+            self.create_module(os.path.join(temp_directory, 'a'), ' ', name='__init__')
+            self.create_module(os.path.join(temp_directory, 'a'), 'x = 2', name='b')
+
+            module = lazy_modules.import_module('a.b')
+
+            self.assertIs(sys.modules['a'].b, module)
+            self.assertEqual(module.x, 2)
+
+
+class TestDeferredAttribute(unittest.TestCase):
+
+    def test(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'lazy_module_{}'.format(uuid.uuid4().hex)
+
+            with open(os.path.join(temp_directory, module_name + '.py'), 'w') as f:
+                f.write('def f(): return 42\nf.x = 13')
+
+            target_module = type(os)('target_module')
+
+            handle = lazy_modules.DeferredAttribute(target_module=target_module,
+                                            target_attribute='g',
+                                            source_module=module_name,
+                                            source_attribute='f')
+
+            target_module.g = handle
+
+            self.assertNotIn(module_name, sys.modules)
+
+            self.assertEqual(handle.x, 13)
+            self.assertEqual(handle(), 42)
+
+            self.assertIs(target_module.g, sys.modules[module_name].f)
+
+
+class TestLazyImportMode(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        rules.reset_rules_cache()
+
+    def tearDown(self):
+        super().tearDown()
+        rules.reset_rules_cache()
+
+    def test_global_mode(self):
+        test_config = config.DEFAULT_CONFIG.clone(path='#config.lazy.1',
+                                                  import_mode='lazy',
+                                                  rules=[{'type': 'rule_stdlib'},
+                                                         {'type': 'rule_predefined_names'}])
+
+        module = type(os)('some_module')
+
+        commands = importer.apply_rules_many(test_config, module, ['json', 'print'])
+
+        self.assertIsInstance(commands['json'], rules.LazyImportCommand)
+        self.assertIsInstance(commands['print'], rules.NoImportCommand)
+
+    def test_rule_mode(self):
+        test_config = config.DEFAULT_CONFIG.clone(path='#config.lazy.2',
+                                                  rules=[{'type': 'rule_custom',
+                                                          'import_mode': 'lazy',
+                                                          'variables': {'x': {'module': 'json', 'attribute': 'dumps'}}},
+                                                         {'type': 'rule_stdlib'}])
+
+        module = type(os)('some_module')
+
+        commands = importer.apply_rules_many(test_config, module, ['x', 'json'])
+
+        self.assertEqual(type(commands['x']), rules.LazyImportCommand)
+        self.assertEqual(type(commands['json']), rules.ImportCommand)
+
+        self.assertEqual(type(importer.apply_rules(test_config, module, 'x')), rules.LazyImportCommand)
+
+    def test_command(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = 'lazy_module_{}'.format(uuid.uuid4().hex)
+
+            with open(os.path.join(temp_directory, module_name + '.py'), 'w') as f:
+                f.write('def f(): return 42')
+
+            target_module = type(os)('target_module')
+
+            rules.LazyImportCommand(target_module, 'm', module_name, None)()
+            rules.LazyImportCommand(target_module, 'f', module_name, 'f')()
+
+            self.assertIsInstance(target_module.f, lazy_modules.DeferredAttribute)
+
+            self.assertEqual(target_module.f(), 42)
+
+            self.assertIs(target_module.f, target_module.m.f)
+
+    def test_command__module_not_found(self):
+        target_module = type(os)('target_module')
+
+        with self.assertRaises(ImportError):
+            rules.LazyImportCommand(target_module, 'm', 'lazy_module_{}'.format(uuid.uuid4().hex), None)()
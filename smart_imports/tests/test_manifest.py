@@ -0,0 +1,218 @@
+
+import io
+import os
+import math
+import importlib
+import unittest
+
+from unittest import mock
+
+from .. import rules
+from .. import config
+from .. import helpers
+from .. import importer
+from .. import manifest
+from .. import exceptions
+from .. import lazy_modules
+from .. import __main__ as main
+
+
+class TestFormat(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.manifests = []
+
+    def tearDown(self):
+        super().tearDown()
+
+        for loaded_manifest in self.manifests:
+            loaded_manifest.close()
+
+    def load(self, temp_directory, data):
+        path = os.path.join(temp_directory, 'manifest.bin')
+
+        manifest.write(path, data)
+
+        loaded_manifest = manifest.load(path)
+
+        self.manifests.append(loaded_manifest)
+
+        return loaded_manifest
+
+    def test_get(self):
+        modules = {'module_{}'.format(i): (bytes([i]) * 32,
+                                           [(rules.ImportCommand, 'x', 'math', None),
+                                            (rules.LazyImportCommand, 'y', 'package.module_{}'.format(i), 'attribute')])
+                   for i in range(100)}
+
+        with helpers.test_directory() as temp_directory:
+            loaded_manifest = self.load(temp_directory, manifest.serialize(modules))
+
+            for module_name, entry in modules.items():
+                self.assertEqual(loaded_manifest.get(module_name), entry)
+
+            self.assertIsNone(loaded_manifest.get('module_100'))
+
+    def test_get__empty(self):
+        with helpers.test_directory() as temp_directory:
+            self.assertIsNone(self.load(temp_directory, manifest.serialize({})).get('x'))
+
+    def test_wrong_magic(self):
+        with helpers.test_directory() as temp_directory:
+            with self.assertRaises(exceptions.ManifestHasWrongFormat):
+                self.load(temp_directory, b'x' * 100)
+
+    def test_truncated(self):
+        with helpers.test_directory() as temp_directory:
+            with self.assertRaises(exceptions.ManifestHasWrongFormat):
+                self.load(temp_directory, b'x')
+
+    def test_wrong_cache_tag(self):
+        with helpers.test_directory() as temp_directory:
+            with mock.patch('smart_imports.artifacts.get_cache_tag', lambda: 'other-python'):
+                data = manifest.serialize({})
+
+            with self.assertRaises(exceptions.ManifestHasWrongFormat):
+                self.load(temp_directory, data)
+
+    def test_not_found(self):
+        with helpers.test_directory() as temp_directory:
+            with self.assertRaises(exceptions.ManifestHasWrongFormat):
+                manifest.load(os.path.join(temp_directory, 'manifest.bin'))
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.reset_cache()
+        rules.reset_rules_cache()
+        manifest.disable()
+
+        patcher = mock.patch('sys.dont_write_bytecode', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        super().tearDown()
+        config.reset_cache()
+        rules.reset_rules_cache()
+        manifest.disable()
+        importer.APPLIED_PLANS.clear()
+        lazy_modules.PENDING.clear()
+        helpers.unload_test_packages()
+
+    def prepair_package(self, temp_directory):
+        path = os.path.join(temp_directory, 'a')
+
+        os.makedirs(path)
+
+        with open(os.path.join(path, '__init__.py'), 'w') as f:
+            f.write('')
+
+        with open(os.path.join(path, 'b.py'), 'w') as f:
+            f.write('import smart_imports\nsmart_imports.all()\nx = math.pi\ny = c.z\nl = len\n')
+
+        with open(os.path.join(path, 'c.py'), 'w') as f:
+            f.write('z = 1\n')
+
+        return path
+
+    def build(self, temp_directory):
+        manifest_path = os.path.join(temp_directory, 'manifest.bin')
+
+        manifest.write(manifest_path, manifest.build(['a']))
+
+        helpers.unload_test_packages()
+        importer.APPLIED_PLANS.clear()
+        importlib.invalidate_caches()
+
+        return manifest_path
+
+    def test_build(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            manifest_path = self.build(temp_directory)
+
+            loaded_manifest = manifest.load(manifest_path)
+
+            try:
+                fingerprint, imports = loaded_manifest.get('a.b')
+
+                self.assertEqual(imports, [(rules.ImportCommand, 'c', 'a.c', None),
+                                           (rules.ImportCommand, 'math', 'math', None)])
+
+                self.assertIsNone(loaded_manifest.get('a.c'))
+            finally:
+                loaded_manifest.close()
+
+    def test_import(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            manifest.enable(self.build(temp_directory))
+
+            with mock.patch('smart_imports.importer.process_module') as process_module:
+                module = importlib.import_module('a.b')
+
+            process_module.assert_not_called()
+
+            self.assertEqual(module.x, math.pi)
+            self.assertEqual(module.y, 1)
+            self.assertIs(module.l, len)
+
+    def test_import__changed(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            manifest.enable(self.build(temp_directory))
+
+            with open(os.path.join(path, 'b.py'), 'a') as f:
+                f.write('j = json\n')
+
+            module = importlib.import_module('a.b')
+
+            self.assertEqual(module.j.__name__, 'json')
+            self.assertIn('a.b', importer.APPLIED_PLANS)
+
+    def test_import__not_in_manifest(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            manifest.enable(self.build(temp_directory))
+
+            with open(os.path.join(path, 'd.py'), 'w') as f:
+                f.write('import smart_imports\nsmart_imports.all()\nx = math.pi\n')
+
+            self.assertEqual(importlib.import_module('a.d').x, math.pi)
+
+    def test_build__with_enabled_manifest(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            manifest_path = self.build(temp_directory)
+
+            manifest.enable(manifest_path)
+
+            with open(manifest_path, 'rb') as f:
+                self.assertEqual(manifest.build(['a']), f.read())
+
+            self.assertTrue(manifest.is_enabled())
+
+    def test_cli(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_package(temp_directory)
+
+            manifest_path = os.path.join(temp_directory, 'manifest.bin')
+
+            with mock.patch('sys.stdout', new_callable=io.StringIO):
+                self.assertEqual(main.main(['build-manifest', '-o', manifest_path, 'a']), 0)
+
+            loaded_manifest = manifest.load(manifest_path)
+
+            try:
+                self.assertIsNotNone(loaded_manifest.get('a.b'))
+            finally:
+                loaded_manifest.close()
@@ -0,0 +1,103 @@
+
+import os
+import sys
+import uuid
+import unittest
+import importlib
+import py_compile
+
+from unittest import mock
+
+from .. import rules
+from .. import config
+from .. import helpers
+from .. import importer
+from .. import prefetching
+
+
+class TestPrefetching(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        prefetching.reset()
+
+    def tearDown(self):
+        super().tearDown()
+        prefetching.reset()
+
+    def create_module(self, directory):
+        module_name = 'prefetch_module_{}'.format(uuid.uuid4().hex)
+
+        path = os.path.join(directory, module_name + '.py')
+
+        with open(path, 'w') as f:
+            f.write('x = 1')
+
+        py_compile.compile(path)
+
+        return module_name, path
+
+    def test_can_be_prefetched(self):
+        self.assertFalse(prefetching.can_be_prefetched('os'))
+        self.assertTrue(prefetching.can_be_prefetched('not_imported_module'))
+        self.assertTrue(prefetching.can_be_prefetched('os.not_imported_module'))
+        self.assertFalse(prefetching.can_be_prefetched('not_imported_module.submodule'))
+
+    def test_get_module_files(self):
+        with helpers.test_directory() as temp_directory:
+            module_name, path = self.create_module(temp_directory)
+
+            files = prefetching.get_module_files(module_name)
+
+            self.assertEqual(files, [path, importlib.util.cache_from_source(path)])
+
+            self.assertTrue(all(os.path.isfile(path) for path in files))
+
+    def test_get_module_files__not_found(self):
+        self.assertEqual(prefetching.get_module_files('not_existed_module_{}'.format(uuid.uuid4().hex)), [])
+
+    def test_get_module_files__builtin(self):
+        self.assertEqual(prefetching.get_module_files('sys'), [])
+
+    def test_read_file__not_existed(self):
+        prefetching.read_file('/not/existed/file.py')
+
+    def test_prefetch(self):
+        with helpers.test_directory() as temp_directory:
+            module_name, path = self.create_module(temp_directory)
+
+            with mock.patch('smart_imports.prefetching.read_file') as read_file:
+                futures = prefetching.prefetch(['os', module_name, module_name])
+
+                for future in futures:
+                    future.result()
+
+            self.assertEqual(len(futures), 1)
+
+            self.assertEqual(read_file.call_args_list, [mock.call(path),
+                                                        mock.call(importlib.util.cache_from_source(path))])
+
+            self.assertNotIn(module_name, sys.modules)
+
+    def test_all(self):
+        with helpers.test_directory() as temp_directory:
+            module_name, _ = self.create_module(temp_directory)
+
+            target_module = type(os)('target_module')
+            target_module.__file__ = os.path.join(temp_directory, 'target_module.py')
+
+            test_config = config.DEFAULT_CONFIG.clone(path='#config.prefetch', prefetch=True)
+
+            commands = [rules.ImportCommand(target_module=target_module,
+                                                     target_attribute='x',
+                                                     source_module=module_name,
+                                                     source_attribute=None)]
+
+            with mock.patch('smart_imports.config.get', mock.Mock(return_value=test_config)), \
+                 mock.patch('smart_imports.importer.process_module', mock.Mock(return_value=commands)), \
+                 mock.patch('smart_imports.prefetching.prefetch') as prefetch:
+                importer.all(target_module)
+
+            self.assertEqual(list(prefetch.call_args[0][0]), [module_name])
+
+            self.assertEqual(target_module.x.x, 1)
@@ -0,0 +1,168 @@
+
+import os
+import sys
+import uuid
+import asyncio
+import threading
+import unittest
+import concurrent.futures
+
+from .. import rules
+from .. import helpers
+from .. import preloading
+from .. import lazy_modules
+
+
+class TestPreload(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        preloading.reset()
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        super().tearDown()
+        preloading.reset()
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def create_module(self, directory, source):
+        module_name = 'preload_module_{}'.format(uuid.uuid4().hex)
+
+        with open(os.path.join(directory, module_name + '.py'), 'w') as f:
+            f.write(source)
+
+        return module_name
+
+    def create_target_module(self):
+        target_module = type(os)('target_module_{}'.format(uuid.uuid4().hex))
+        sys.modules[target_module.__name__] = target_module
+        return target_module
+
+    def test_get_modules_names(self):
+        target_module = type(os)('target_module')
+
+        lazy_modules.register_pending(target_module, 'b')
+        lazy_modules.register_pending(target_module, 'a')
+        lazy_modules.register_pending(type(os)('other_module'), 'c')
+
+        self.assertEqual(preloading.get_modules_names(target_module), ['a', 'b'])
+        self.assertEqual(preloading.get_modules_names(type(os)('unknown_module')), [])
+        self.assertEqual(preloading.get_modules_names('x'), ['x'])
+        self.assertEqual(preloading.get_modules_names(('x', 'y')), ['x', 'y'])
+        self.assertEqual(preloading.get_modules_names(None), ['a', 'b', 'c'])
+
+    def test_preload_module(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, 'x = 1')
+
+            target_module = self.create_target_module()
+
+            rules.LazyImportCommand(target_module, 'm', module_name, None)()
+            rules.LazyImportCommand(target_module, 'x', module_name, 'x')()
+
+            self.assertTrue(lazy_modules.is_lazy(sys.modules[module_name]))
+            self.assertIsInstance(target_module.x, lazy_modules.DeferredAttribute)
+
+            self.run_async(preloading.preload(target_module))
+
+            self.assertFalse(lazy_modules.is_lazy(sys.modules[module_name]))
+            self.assertEqual(target_module.x, 1)
+            self.assertNotIn(target_module.__name__, lazy_modules.PENDING)
+
+    def test_preload_names(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, 'x = 1')
+
+            self.run_async(preloading.preload([module_name]))
+
+            self.assertEqual(sys.modules[module_name].x, 1)
+
+    def test_preload_with_executor(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, 'import threading\nthread = threading.current_thread()')
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+                self.run_async(preloading.preload(module_name, executor=executor))
+
+            self.assertIsNot(sys.modules[module_name].thread, threading.current_thread())
+
+    def test_never_imported_twice(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory, 'import time\ntime.sleep(0.05)\nimport builtins\nbuiltins.PRELOAD_COUNTER += 1')
+
+            import builtins
+
+            builtins.PRELOAD_COUNTER = 0
+
+            try:
+                target_module = self.create_target_module()
+
+                rules.LazyImportCommand(target_module, 'm', module_name, None)()
+
+                async def preload_concurrently():
+                    await asyncio.gather(*[preloading.preload(target_module) for i in range(10)])
+
+                with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+                    self.loop.set_default_executor(executor)
+                    self.run_async(preload_concurrently())
+                    self.run_async(preloading.preload(module_name))
+
+                self.assertEqual(builtins.PRELOAD_COUNTER, 1)
+
+            finally:
+                del builtins.PRELOAD_COUNTER
+
+    def test_access_while_preloaded(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_module(temp_directory,
+                                             'import builtins\nbuiltins.PRELOAD_STARTED.set()\n'
+                                             'import time\ntime.sleep(0.1)\nx = 1')
+
+            import builtins
+
+            builtins.PRELOAD_STARTED = threading.Event()
+
+            try:
+                target_module = self.create_target_module()
+
+                rules.LazyImportCommand(target_module, 'm', module_name, None)()
+
+                module = sys.modules[module_name]
+
+                async def access_while_preloaded():
+                    preloaded = asyncio.ensure_future(preloading.preload(target_module))
+
+                    await self.loop.run_in_executor(None, builtins.PRELOAD_STARTED.wait)
+
+                    # event loop thread waits until module is executed in other thread
+                    value = module.x
+
+                    await preloaded
+
+                    return value
+
+                self.assertEqual(self.run_async(access_while_preloaded()), 1)
+
+            finally:
+                del builtins.PRELOAD_STARTED
+
+    def test_idle_preload(self):
+        with helpers.test_directory() as temp_directory:
+            modules_names = [self.create_module(temp_directory, 'x = {}'.format(i)) for i in range(3)]
+
+            broken_module_name = self.create_module(temp_directory, 'raise RuntimeError("broken")')
+
+            target_module = self.create_target_module()
+
+            for i, module_name in enumerate(modules_names + [broken_module_name]):
+                rules.LazyImportCommand(target_module, 'm_{}'.format(i), module_name, None)()
+
+            self.run_async(preloading.idle_preload(delay=0))
+
+            for module_name in modules_names:
+                self.assertFalse(lazy_modules.is_lazy(sys.modules[module_name]))
+
+            self.assertEqual(preloading.get_pending_names(), [broken_module_name])
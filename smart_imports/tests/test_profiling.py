@@ -0,0 +1,134 @@
+
+import io
+import os
+import unittest
+
+from .. import rules
+from .. import config
+from .. import importer
+from .. import profiling
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        profiling.reset()
+        profiling.enable()
+        rules.reset_rules_cache()
+
+        self.config = config.DEFAULT_CONFIG.clone(path='#config.profiling',
+                                                  rules=[{'type': 'rule_predefined_names'},
+                                                         {'type': 'rule_custom',
+                                                          'variables': {'never_used': {'module': 'math'}}},
+                                                         {'type': 'rule_stdlib'}])
+
+        self.module = type(os)('some_module')
+
+    def tearDown(self):
+        super().tearDown()
+        profiling.disable()
+        profiling.reset()
+        rules.reset_rules_cache()
+
+    def apply(self, *variables):
+        for variable in variables:
+            importer.apply_rules(module_config=self.config,
+                                 module=self.module,
+                                 variable=variable)
+
+    def get_statistics(self, rule_type):
+        return profiling.STATISTICS[(self.config.uid, rule_type)]
+
+    def test_disabled(self):
+        profiling.disable()
+
+        self.apply('print', 'math')
+
+        self.assertEqual(profiling.STATISTICS, {})
+
+    def test_counters(self):
+        self.apply('print', 'math', 'os_path', 'unknown_variable')
+
+        predefined_names = self.get_statistics('rule_predefined_names')
+
+        self.assertEqual(predefined_names.calls, 4)
+        self.assertEqual(predefined_names.hits, 1)
+        self.assertEqual(predefined_names.no_imports, 1)
+        self.assertEqual(predefined_names.misses, 3)
+
+        custom = self.get_statistics('rule_custom')
+
+        self.assertEqual(custom.calls, 3)
+        self.assertEqual(custom.hits, 0)
+        self.assertEqual(custom.misses, 3)
+
+        stdlib = self.get_statistics('rule_stdlib')
+
+        self.assertEqual(stdlib.calls, 3)
+        self.assertEqual(stdlib.hits, 2)
+        self.assertEqual(stdlib.misses, 1)
+        self.assertEqual(len(stdlib.times), 3)
+
+    def test_counters__many(self):
+        importer.apply_rules_many(module_config=self.config,
+                                  module=self.module,
+                                  variables=['print', 'math', 'os_path', 'unknown_variable'])
+
+        predefined_names = self.get_statistics('rule_predefined_names')
+
+        self.assertEqual(predefined_names.calls, 4)
+        self.assertEqual(predefined_names.hits, 1)
+        self.assertEqual(predefined_names.no_imports, 1)
+        self.assertEqual(predefined_names.misses, 3)
+
+        stdlib = self.get_statistics('rule_stdlib')
+
+        self.assertEqual(stdlib.calls, 3)
+        self.assertEqual(stdlib.hits, 2)
+        self.assertEqual(stdlib.misses, 1)
+        self.assertEqual(len(stdlib.times), 1)
+
+    def test_result_not_changed(self):
+        command = importer.apply_rules(module_config=self.config,
+                                       module=self.module,
+                                       variable='os_path')
+
+        self.assertEqual(command, rules.ImportCommand(target_module=self.module,
+                                                      target_attribute='os_path',
+                                                      source_module='os.path',
+                                                      source_attribute=None))
+
+    def test_report(self):
+        self.apply('print', 'math', 'os_path', 'unknown_variable')
+
+        report = profiling.report()
+
+        self.assertEqual(len(report), 3)
+
+        for first, second in zip(report, report[1:]):
+            self.assertGreaterEqual(first.total_time, second.total_time)
+
+    def test_percentile(self):
+        statistics = profiling.RuleStatistics(config_uid='x', rule_type='y')
+
+        self.assertEqual(statistics.percentile(50), 0.0)
+
+        for duration in range(1, 101):
+            statistics.register(None, duration)
+
+        self.assertEqual(statistics.percentile(0), 1)
+        self.assertEqual(statistics.percentile(50), 51)
+        self.assertEqual(statistics.percentile(100), 100)
+
+    def test_print_report(self):
+        self.apply('print', 'math', 'os_path', 'unknown_variable')
+
+        stream = io.StringIO()
+
+        profiling.print_report(stream=stream)
+
+        output = stream.getvalue()
+
+        self.assertIn('rule_stdlib', output)
+        self.assertIn('never hit', output)
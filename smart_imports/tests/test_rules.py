@@ -2,6 +2,7 @@
 import os
 import sys
 import uuid
+import tempfile
 import unittest
 import importlib
 
@@ -10,9 +11,40 @@ from unittest import mock
 from .. import rules
 from .. import config
 from .. import helpers
+from .. import symbols
+from .. import watching
+from .. import constants
 from .. import exceptions
 
 
+class TestImportCommand(unittest.TestCase):
+
+    def test_immutable(self):
+        command = rules.ImportCommand(target_module=None,
+                                      target_attribute='x',
+                                      source_module='math',
+                                      source_attribute=None)
+
+        with self.assertRaises(AttributeError):
+            command.source_module = 'json'
+
+        with self.assertRaises(AttributeError):
+            del command.source_module
+
+        self.assertEqual(command.source_module, 'math')
+
+    def test_hash(self):
+        command_1 = rules.ImportCommand(None, 'x', 'math', None)
+        command_2 = rules.ImportCommand(None, 'x', 'math', None)
+        command_3 = rules.LazyImportCommand(None, 'x', 'math', None)
+
+        self.assertEqual(len({command_1, command_2, command_3}), 2)
+
+    def test_no_import_command__single_instance(self):
+        self.assertIs(rules.NoImportCommand(), rules.NoImportCommand())
+        self.assertEqual(rules.NoImportCommand().source_module, None)
+
+
 class TestCustomRule(unittest.TestCase):
 
     def setUp(self):
@@ -156,11 +188,37 @@ class TestStdLibRule(unittest.TestCase):
         self.rule = rules.StdLibRule(config={})
 
     def test_system_modules(self):
-        self.assertEqual(self.rule._STDLIB_MODULES['os'], {'module': 'os'})
-        self.assertEqual(self.rule._STDLIB_MODULES['os_path'], {'module': 'os.path'})
+        self.assertEqual(self.rule.get_stdlib_modules()['os'], 'os')
+        self.assertEqual(self.rule.get_stdlib_modules()['os_path'], 'os.path')
+        self.assertEqual(self.rule.get_stdlib_modules()['collections_abc'], 'collections.abc')
+
+    @unittest.skipIf(sys.version_info < (3, 10), 'sys.stdlib_module_names requires Python 3.10+')
+    def test_not_depends_on_imported_modules(self):
+        with mock.patch.dict(sys.modules, {'json.not_existed_module': sys.modules['json']}):
+            names = rules._find_stdlib_modules()
+
+        self.assertNotIn('json.not_existed_module', names)
+
+        self.assertIn('os.path', names)
+        self.assertIn('xml.parsers.expat.errors', names)
+
+        if os.path.isdir(os.path.join(os.path.dirname(os.__file__), 'test', 'support')):
+            self.assertIn('test.support', names)
 
     def test_builting_modules(self):
-        self.assertTrue(set(sys.builtin_module_names).issubset(set(self.rule._STDLIB_MODULES.keys())))
+        self.assertTrue(set(sys.builtin_module_names).issubset(set(self.rule.get_stdlib_modules().keys())))
+
+    def test_lazy_initialization(self):
+        with mock.patch('smart_imports.rules.StdLibRule._STDLIB_MODULES', None):
+            with mock.patch('smart_imports.rules._collect_stdlib_modules', mock.Mock(return_value={})) as collect:
+                rule = rules.StdLibRule(config={})
+
+                collect.assert_not_called()
+
+                rule.apply('module', 'os')
+                rule.apply('module', 'math')
+
+            collect.assert_called_once_with()
 
     def test_not_system_module(self):
         command = self.rule.apply('module', 'bla_bla')
@@ -181,6 +239,152 @@ class TestStdLibRule(unittest.TestCase):
                                                       source_attribute=None))
 
 
+class TestGlobalSubmodulesRule(unittest.TestCase):
+
+    def prepair_modules(self, base_directory):
+        os.makedirs(os.path.join(base_directory, 'a', 'b'))
+        os.makedirs(os.path.join(base_directory, 'a', '_private'))
+
+        for path in (('a', '__init__.py'),
+                     ('a', 'x.py'),
+                     ('a', '_y.py'),
+                     ('a', 'b', '__init__.py'),
+                     ('a', 'b', 'c.py'),
+                     ('a', '_private', '__init__.py'),
+                     ('a', '_private', 'z.py')):
+            with open(os.path.join(base_directory, *path), 'w') as f:
+                f.write(' ')
+
+    def test_verify_config(self):
+        self.assertTrue(rules.GlobalSubmodulesRule(config={}).verify_config())
+        self.assertTrue(rules.GlobalSubmodulesRule(config={'packages': ['a']}).verify_config())
+        self.assertFalse(rules.GlobalSubmodulesRule(config={'packages': 'a'}).verify_config())
+
+    def test_submodules(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            rule = rules.GlobalSubmodulesRule(config={'packages': ['a']})
+
+            self.assertEqual(rule.get_submodules(), {'a_x': 'a.x',
+                                                     'a_b': 'a.b',
+                                                     'a_b_c': 'a.b.c'})
+
+            self.assertEqual(rule.apply('module', 'a_b_c'), rules.ImportCommand('module', 'a_b_c', 'a.b.c', None))
+            self.assertEqual(rule.apply('module', 'a_y'), None)
+            self.assertEqual(rule.apply('module', 'a'), None)
+
+            self.assertEqual(rule.apply_many('module', ['a_b_c', 'a_x', 'x']),
+                             {'a_b_c': rules.ImportCommand('module', 'a_b_c', 'a.b.c', None),
+                              'a_x': rules.ImportCommand('module', 'a_x', 'a.x', None)})
+
+    def test_namespace_packages(self):
+        with helpers.test_directory() as temp_directory, tempfile.TemporaryDirectory() as other_directory:
+            os.makedirs(os.path.join(temp_directory, 'google', 'protobuf'))
+            os.makedirs(os.path.join(temp_directory, 'google', 'empty'))
+            os.makedirs(os.path.join(other_directory, 'google', 'cloud', 'storage'))
+
+            for path in ((temp_directory, 'google', 'protobuf', 'message.py'),
+                         (other_directory, 'google', 'cloud', 'storage', '__init__.py'),
+                         (other_directory, 'google', 'cloud', 'storage', 'blob.py')):
+                with open(os.path.join(*path), 'w') as f:
+                    f.write(' ')
+
+            with mock.patch('sys.path', sys.path + [other_directory]):
+                rule = rules.GlobalSubmodulesRule(config={'packages': ['google']})
+
+                self.assertEqual(rule.get_submodules(), {'google_protobuf': 'google.protobuf',
+                                                         'google_protobuf_message': 'google.protobuf.message',
+                                                         'google_cloud': 'google.cloud',
+                                                         'google_cloud_storage': 'google.cloud.storage',
+                                                         'google_cloud_storage_blob': 'google.cloud.storage.blob'})
+
+    def test_persisted(self):
+        with helpers.test_directory() as temp_directory, tempfile.TemporaryDirectory() as cache_dir:
+            self.prepair_modules(temp_directory)
+
+            config = {'packages': ['a'], 'cache_dir': cache_dir}
+
+            submodules = rules.GlobalSubmodulesRule(config=config).get_submodules()
+
+            with mock.patch('smart_imports.discovering.collect_submodules') as collect_submodules:
+                self.assertEqual(rules.GlobalSubmodulesRule(config=config).get_submodules(), submodules)
+
+            collect_submodules.assert_not_called()
+
+            # new distribution installed
+            os.makedirs(os.path.join(temp_directory, 'some_package-1.0.0.dist-info'))
+
+            with mock.patch('smart_imports.discovering.collect_submodules', mock.Mock(return_value={})) as collect_submodules:
+                rules.GlobalSubmodulesRule(config=config).get_submodules()
+
+            collect_submodules.assert_called_once()
+
+    def test_invalidate__persisted(self):
+        with helpers.test_directory() as temp_directory, tempfile.TemporaryDirectory() as cache_dir:
+            self.prepair_modules(temp_directory)
+
+            rule = rules.GlobalSubmodulesRule(config={'packages': ['a'], 'cache_dir': cache_dir})
+
+            self.assertNotIn('a_b_d', rule.get_submodules())
+
+            path = os.path.join(temp_directory, 'a', 'b', 'd.py')
+
+            with open(path, 'w') as f:
+                f.write(' ')
+
+            rule.invalidate(watching.Event(constants.WATCH_EVENT.CREATED, path, False))
+
+            self.assertEqual(rule.get_submodules()['a_b_d'], 'a.b.d')
+
+            self.assertEqual(rules.GlobalSubmodulesRule(config=rule.config).get_submodules()['a_b_d'], 'a.b.d')
+
+
+class TestExportedSymbolsRule(unittest.TestCase):
+
+    def test_verify_config(self):
+        self.assertTrue(rules.ExportedSymbolsRule(config={'packages': ['a']}).verify_config())
+        self.assertFalse(rules.ExportedSymbolsRule(config={}).verify_config())
+
+    def test_apply(self):
+        with helpers.test_directory() as temp_directory:
+            os.makedirs(os.path.join(temp_directory, 'a'))
+
+            with open(os.path.join(temp_directory, 'a', '__init__.py'), 'w') as f:
+                f.write(' ')
+
+            with open(os.path.join(temp_directory, 'a', 'models.py'), 'w') as f:
+                f.write('class Order: pass')
+
+            rule = rules.ExportedSymbolsRule(config={'packages': ['a']})
+
+            self.assertEqual(rule.apply('module', 'Order'), rules.ImportCommand('module', 'Order', 'a.models', 'Order'))
+            self.assertEqual(rule.apply('module', 'Item'), None)
+
+            self.assertEqual(rule.apply_many('module', ['Order', 'Item']),
+                             {'Order': rules.ImportCommand('module', 'Order', 'a.models', 'Order')})
+
+    def test_verify_config__index(self):
+        self.assertTrue(rules.ExportedSymbolsRule(config={'packages': ['a'], 'index': 'symbols.json'}).verify_config())
+        self.assertFalse(rules.ExportedSymbolsRule(config={'packages': ['a'], 'index': 1}).verify_config())
+
+    def test_apply__index(self):
+        with helpers.test_directory() as temp_directory:
+            index_path = os.path.join(temp_directory, 'symbols.json')
+
+            symbols.write(index_path, {'protocol_version': symbols.PROTOCOL_VERSION,
+                                       'packages': ['a'],
+                                       'symbols': {'Order': 'a.models'},
+                                       'ambiguous': {}})
+
+            rule = rules.ExportedSymbolsRule(config={'packages': ['a'], 'index': index_path})
+
+            with mock.patch('smart_imports.symbols.get_symbols_index') as get_symbols_index:
+                self.assertEqual(rule.apply('module', 'Order'), rules.ImportCommand('module', 'Order', 'a.models', 'Order'))
+
+            get_symbols_index.assert_not_called()
+
+
 class TestPredifinedNamesRule(unittest.TestCase):
 
     def setUp(self):
@@ -377,6 +581,159 @@ class TestLocalModulesFromNamespaceRule(unittest.TestCase):
                                                           source_attribute=None))
 
 
+class TestRuleGroup(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.config = {'type': 'rule_group',
+                       'unordered': True,
+                       'rules': [{'type': 'rule_custom', 'variables': {'x': {'module': 'math'}}},
+                                 {'type': 'rule_custom', 'variables': {'y': {'module': 'json'},
+                                                                       'z': {'module': 'os'}}}]}
+
+    def test_wrong_config(self):
+        self.assertFalse(rules.RuleGroup(config={'type': 'rule_group'}).verify_config())
+        self.assertFalse(rules.RuleGroup(config={'type': 'rule_group',
+                                                 'rules': [{'type': 'rule_custom'}]}).verify_config())
+
+    def test_not_registered_rule(self):
+        with self.assertRaises(exceptions.RuleNotRegistered):
+            rules.RuleGroup(config={'type': 'rule_group', 'rules': [{'type': 'xxx'}]})
+
+    def test_apply(self):
+        for unordered in (True, False):
+            self.config['unordered'] = unordered
+
+            rule = rules.RuleGroup(config=self.config)
+
+            self.assertEqual(rule.apply('module', 'x'), rules.ImportCommand('module', 'x', 'math', None))
+            self.assertEqual(rule.apply('module', 'z'), rules.ImportCommand('module', 'z', 'os', None))
+            self.assertEqual(rule.apply('module', 'q'), None)
+
+    def test_ordered(self):
+        self.config['unordered'] = False
+        self.config['rules'][1]['variables']['x'] = {'module': 'json'}
+
+        rule = rules.RuleGroup(config=self.config)
+
+        for i in range(rule.REORDER_PERIOD * 2):
+            self.assertEqual(rule.apply('module', 'x'), rules.ImportCommand('module', 'x', 'math', None))
+
+        self.assertEqual(rule.order, [0, 1])
+
+    def test_reorder(self):
+        rule = rules.RuleGroup(config=self.config)
+
+        for i in range(rule.REORDER_PERIOD):
+            rule.apply('module', 'y')
+
+        self.assertEqual(rule.order, [1, 0])
+        self.assertEqual(rule.hits, [0, rule.REORDER_PERIOD])
+
+    def test_order_persisted(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            self.config['cache_dir'] = temp_directory
+
+            rule = rules.RuleGroup(config=self.config)
+
+            for i in range(rule.REORDER_PERIOD):
+                rule.apply('module', 'z')
+
+            self.assertEqual(rule.order, [1, 0])
+
+            self.assertEqual(rules.RuleGroup(config=self.config).order, [1, 0])
+
+    def test_check_overlaps(self):
+        self.config['check_overlaps'] = True
+        self.config['rules'][1]['variables']['x'] = {'module': 'json'}
+
+        rule = rules.RuleGroup(config=self.config)
+
+        self.assertEqual(rule.apply('module', 'y'), rules.ImportCommand('module', 'y', 'json', None))
+
+        with self.assertRaises(exceptions.RuleGroupHasOverlaps):
+            rule.apply('module', 'x')
+
+    def test_get_for_config(self):
+        rules.reset_rules_cache()
+
+        test_config = config.DEFAULT_CONFIG.clone(path='#config.group',
+                                                  rules=[{'type': 'rule_predefined_names'}, self.config])
+
+        found_rules = rules.get_for_config(test_config)
+
+        self.assertIsInstance(found_rules[1], rules.RuleGroup)
+
+        rules.reset_rules_cache()
+
+
+class TestApplyMany(unittest.TestCase):
+
+    VARIABLES = ['x', 'y', 'p', 'os', 'os_path', 'print', '__file__', 'json', 'some_variable', 'unknown']
+
+    def check_rule(self, rule, module='module'):
+        expected_commands = {}
+
+        for variable in self.VARIABLES:
+            command = rule.apply(module, variable)
+
+            if command:
+                expected_commands[variable] = command
+
+        self.assertEqual(rule.apply_many(module, self.VARIABLES), expected_commands)
+
+        return expected_commands
+
+    def test_custom(self):
+        commands = self.check_rule(rules.CustomRule(config={'variables': {'y': {'module': 'z'},
+                                                                          'p': {'module': 'q', 'attribute': 'w'}}}))
+        self.assertEqual(set(commands), {'y', 'p'})
+
+    def test_stdlib(self):
+        commands = self.check_rule(rules.StdLibRule(config={}))
+        self.assertEqual(set(commands), {'os', 'os_path', 'json'})
+
+    def test_predefined_names(self):
+        commands = self.check_rule(rules.PredefinedNamesRule(config={}))
+        self.assertEqual(set(commands), {'print', '__file__'})
+
+    def test_prefix(self):
+        commands = self.check_rule(rules.PrefixRule(config={'prefixes': [{"prefix": "some_", "module": "aaa.bbb"}]}))
+        self.assertEqual(set(commands), {'some_variable'})
+
+    def test_global_modules(self):
+        commands = self.check_rule(rules.GlobalModulesRule(config={}))
+        self.assertEqual(set(commands), {'os', 'json'})
+
+    def test_local_modules(self):
+        with helpers.test_directory() as temp_directory:
+            os.makedirs(os.path.join(temp_directory, 'a'))
+
+            for name in ('__init__', 'x', 'json'):
+                with open(os.path.join(temp_directory, 'a', name + '.py'), 'w') as f:
+                    f.write(' ')
+
+            module = importlib.import_module('a.x')
+
+            commands = self.check_rule(rules.LocalModulesRule(config={}), module=module)
+
+            self.assertEqual(set(commands), {'x', 'json'})
+
+            self.assertEqual(rules.LocalModulesRule(config={}).apply_many(type(os)('some_module'), self.VARIABLES), {})
+
+    def test_group(self):
+        for unordered in (True, False):
+            rule = rules.RuleGroup(config={'type': 'rule_group',
+                                           'unordered': unordered,
+                                           'rules': [{'type': 'rule_predefined_names'},
+                                                     {'type': 'rule_stdlib'},
+                                                     {'type': 'rule_custom', 'variables': {'x': {'module': 'math'}}}]})
+
+            commands = self.check_rule(rule)
+
+            self.assertEqual(set(commands), {'print', '__file__', 'os', 'os_path', 'json', 'x'})
+
+
 class TestDefaultRules(unittest.TestCase):
 
     def test(self):
@@ -387,7 +744,10 @@ class TestDefaultRules(unittest.TestCase):
                                                       'rule_local_modules_from_namespace',
                                                       'rule_local_modules',
                                                       'rule_global_modules',
-                                                      'rule_custom'})
+                                                      'rule_global_submodules',
+                                                      'rule_exported_symbols',
+                                                      'rule_custom',
+                                                      'rule_group'})
 
 
 class TestRegister(unittest.TestCase):
@@ -411,6 +771,89 @@ class TestRegister(unittest.TestCase):
             rules.register('xxx', 'my.rule')
 
 
+class TestGetFabric(unittest.TestCase):
+
+    RULE_SOURCE = '''
+from smart_imports import rules
+
+class MyRule(rules.BaseRule):
+    pass
+'''
+
+    def setUp(self):
+        super().setUp()
+        rules.remove('xxx')
+        rules.reset_entry_points_cache()
+
+    def tearDown(self):
+        super().tearDown()
+        rules.remove('xxx')
+        rules.reset_entry_points_cache()
+
+    def create_rule_module(self, temp_directory):
+        module_name = 'rule_module_{}'.format(uuid.uuid4().hex)
+
+        with open(os.path.join(temp_directory, module_name + '.py'), 'w') as f:
+            f.write(self.RULE_SOURCE)
+
+        return module_name
+
+    def test_class(self):
+        self.assertIs(rules.get_fabric('rule_stdlib'), rules.StdLibRule)
+
+    def test_not_registered(self):
+        with self.assertRaises(exceptions.RuleNotRegistered):
+            rules.get_fabric('xxx')
+
+    def test_lazy_registration(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_rule_module(temp_directory)
+
+            rules.register('xxx', '{}:MyRule'.format(module_name))
+
+            self.assertNotIn(module_name, sys.modules)
+
+            fabric = rules.get_fabric('xxx')
+
+            self.assertIs(fabric, sys.modules[module_name].MyRule)
+            self.assertIs(rules._FABRICS['xxx'], fabric)
+
+    def test_dotted_path(self):
+        fabric_type = 'smart_imports.rules:StdLibRule'
+
+        try:
+            self.assertIs(rules.get_fabric(fabric_type), rules.StdLibRule)
+        finally:
+            rules.remove(fabric_type)
+
+    def test_entry_point(self):
+        with helpers.test_directory() as temp_directory:
+            module_name = self.create_rule_module(temp_directory)
+
+            with mock.patch('smart_imports.rules._ENTRY_POINTS', {'xxx': '{}:MyRule'.format(module_name)}):
+                self.assertNotIn(module_name, sys.modules)
+
+                fabric = rules.get_fabric('xxx')
+
+            self.assertIs(fabric, sys.modules[module_name].MyRule)
+
+    def test_entry_points_cached(self):
+        self.assertIs(rules.get_entry_points(), rules.get_entry_points())
+
+    def test_can_not_be_loaded(self):
+        rules.register('xxx', 'unknown_module_{}:MyRule'.format(uuid.uuid4().hex))
+
+        with self.assertRaises(exceptions.RuleCanNotBeLoaded):
+            rules.get_fabric('xxx')
+
+        rules.remove('xxx')
+
+        rules.register('xxx', 'smart_imports.rules:UnknownRule')
+
+        with self.assertRaises(exceptions.RuleCanNotBeLoaded):
+            rules.get_fabric('xxx')
+
+
 class TestGetForConfig(unittest.TestCase):
 
     def setUp(self):
@@ -437,3 +880,35 @@ class TestGetForConfig(unittest.TestCase):
 
         for rule_1, rule_2 in zip(found_rules_1, found_rules_2):
             self.assertIs(rule_1, rule_2)
+
+    def test_same_rules_shared(self):
+        test_rules = [{"type": "rule_local_modules"},
+                      {"type": "rule_stdlib"}]
+
+        test_config_1 = config.DEFAULT_CONFIG.clone(path='/a/smart_imports.json', rules=test_rules)
+        test_config_2 = config.DEFAULT_CONFIG.clone(path='/b/smart_imports.json', rules=test_rules)
+        test_config_3 = config.DEFAULT_CONFIG.clone(path='/c/smart_imports.json', rules=test_rules[:1])
+
+        self.assertIs(rules.get_for_config(test_config_1), rules.get_for_config(test_config_2))
+        self.assertIsNot(rules.get_for_config(test_config_1), rules.get_for_config(test_config_3))
+
+        self.assertEqual(rules.get_chains_statistics(), (2, 3))
+
+    def test_forget_config(self):
+        test_rules = [{"type": "rule_local_modules"},
+                      {"type": "rule_stdlib"}]
+
+        test_config_1 = config.DEFAULT_CONFIG.clone(path='/a/smart_imports.json', rules=test_rules)
+        test_config_2 = config.DEFAULT_CONFIG.clone(path='/b/smart_imports.json', rules=test_rules)
+
+        chain = rules.get_for_config(test_config_1)
+        rules.get_for_config(test_config_2)
+
+        rules.forget_config(test_config_1.uid)
+
+        self.assertEqual(rules.get_chains_statistics(), (1, 1))
+        self.assertIs(rules.get_for_config(test_config_2), chain)
+
+        rules.forget_config(test_config_2.uid)
+
+        self.assertEqual(rules.get_chains_statistics(), (0, 0))
@@ -0,0 +1,199 @@
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+import warnings
+
+from unittest import mock
+
+from .. import helpers
+from .. import symbols
+from .. import exceptions
+from .. import __main__ as main
+
+
+class TestExtractSymbols(unittest.TestCase):
+
+    def test_all(self):
+        source = '''
+__all__ = ['A', 'b']
+
+class A: pass
+
+def b(): pass
+
+def c(): pass
+'''
+        self.assertEqual(symbols.extract_symbols(source), ['A', 'b'])
+
+    def test_not_literal_all(self):
+        source = '''
+__all__ = [name for name in ('A',)]
+
+class A: pass
+
+async def b(): pass
+
+_c = 1
+d: int = 2
+e = f = 3
+'''
+        self.assertEqual(symbols.extract_symbols(source), ['A', 'b', 'd', 'e', 'f'])
+
+    def test_imports_ignored(self):
+        source = '''
+import os
+from json import loads
+
+X = 1
+'''
+        self.assertEqual(symbols.extract_symbols(source), ['X'])
+
+
+class TestSymbolsIndex(unittest.TestCase):
+
+    def prepair_modules(self, base_directory):
+        os.makedirs(os.path.join(base_directory, 'a', 'models'))
+        os.makedirs(os.path.join(base_directory, 'a', 'views'))
+
+        sources = {('a', '__init__.py'): '',
+                   ('a', 'models', '__init__.py'): 'from .order import Order\n__all__ = ["Order"]',
+                   ('a', 'models', 'order.py'): 'class Order: pass\nclass Item: pass',
+                   ('a', 'views', '__init__.py'): '',
+                   ('a', 'views', 'order.py'): 'def Item(): pass\ndef show(): pass',
+                   ('a', '_private.py'): 'def hidden(): pass'}
+
+        for path, source in sources.items():
+            with open(os.path.join(base_directory, *path), 'w') as f:
+                f.write(source)
+
+    def test_find_source_files(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            files = symbols.find_source_files('a.models')
+
+            self.assertEqual(files, [('a.models', os.path.join(temp_directory, 'a', 'models', '__init__.py')),
+                                     ('a.models.order', os.path.join(temp_directory, 'a', 'models', 'order.py'))])
+
+            self.assertEqual(symbols.find_source_files('a.views.order'),
+                             [('a.views.order', os.path.join(temp_directory, 'a', 'views', 'order.py'))])
+
+            self.assertEqual(symbols.find_source_files('a.unknown'), [])
+
+            self.assertNotIn('a', sys.modules)
+
+    def test_index(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter("always")
+
+                index = symbols.get_symbols_index(packages=['a'])
+
+            self.assertEqual(index, {'Order': 'a.models',
+                                     'show': 'a.views.order'})
+
+            self.assertEqual(len(w), 1)
+            self.assertIn(symbols.AMBIGUOUS_SYMBOLS_WARNING, str(w[0].message))
+            self.assertIn('Item (a.models.order, a.views.order)', str(w[0].message))
+
+    def test_not_parsed_modules(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            with open(os.path.join(temp_directory, 'a', 'views', 'broken.py'), 'w') as f:
+                f.write('def broken(:\n')
+
+            with open(os.path.join(temp_directory, 'a', 'views', 'binary.py'), 'wb') as f:
+                f.write(b'def binary(): pass\nx = "\xff"\n')
+
+            with open(os.path.join(temp_directory, 'a', 'views', 'latin.py'), 'wb') as f:
+                f.write(b'# -*- coding: latin-1 -*-\ndef latin(): return "\xe9"\n')
+
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter("always")
+
+                index = symbols.get_symbols_index(packages=['a.views'])
+
+            self.assertEqual(index, {'Item': 'a.views.order', 'show': 'a.views.order', 'latin': 'a.views.latin'})
+
+            messages = sorted(str(warning.message) for warning in w)
+
+            self.assertEqual(len(messages), 2)
+            self.assertIn(os.path.join(temp_directory, 'a', 'views', 'binary.py'), messages[0])
+            self.assertIn(os.path.join(temp_directory, 'a', 'views', 'broken.py'), messages[1])
+            self.assertTrue(all(symbols.NOT_PARSED_MODULE_WARNING in message for message in messages))
+
+    def test_build_and_load(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            index_path = os.path.join(temp_directory, 'symbols.json')
+
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter("always")
+
+                data = symbols.build(['a'])
+
+            self.assertEqual(w, [])
+
+            self.assertEqual(data['ambiguous'], {'Item': ['a.models.order', 'a.views.order']})
+
+            symbols.write(index_path, data)
+
+            with mock.patch('smart_imports.symbols.extract_symbols') as extract_symbols:
+                index = symbols.load(index_path, packages=['a'])
+
+            extract_symbols.assert_not_called()
+
+            self.assertEqual(index, {'Order': 'a.models', 'show': 'a.views.order'})
+
+            with self.assertRaises(exceptions.SymbolsIndexHasWrongFormat):
+                symbols.load(index_path, packages=['a.views'])
+
+            with self.assertRaises(exceptions.SymbolsIndexHasWrongFormat):
+                symbols.load(os.path.join(temp_directory, 'unknown.json'), packages=['a'])
+
+    def test_cli(self):
+        with helpers.test_directory() as temp_directory:
+            self.prepair_modules(temp_directory)
+
+            index_path = os.path.join(temp_directory, 'symbols.json')
+
+            with mock.patch('sys.stdout', new_callable=io.StringIO), \
+                 mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                self.assertEqual(main.main(['build-symbols-index', '-o', index_path, 'a']), 0)
+
+            self.assertIn('Item (a.models.order, a.views.order)', stderr.getvalue())
+
+            self.assertEqual(symbols.load(index_path, packages=['a']), {'Order': 'a.models', 'show': 'a.views.order'})
+
+    def test_incremental_update(self):
+        with helpers.test_directory() as temp_directory, tempfile.TemporaryDirectory() as cache_dir:
+            self.prepair_modules(temp_directory)
+
+            with warnings.catch_warnings(record=True):
+                warnings.simplefilter("always")
+
+                symbols.get_symbols_index(packages=['a.views'], cache_dir=cache_dir)
+
+                with mock.patch('smart_imports.symbols.extract_symbols') as extract_symbols:
+                    index = symbols.get_symbols_index(packages=['a.views'], cache_dir=cache_dir)
+
+                extract_symbols.assert_not_called()
+
+                self.assertEqual(index, {'Item': 'a.views.order', 'show': 'a.views.order'})
+
+                with open(os.path.join(temp_directory, 'a', 'views', 'order.py'), 'w') as f:
+                    f.write('def show_all(): pass')
+
+                with mock.patch('smart_imports.symbols.extract_symbols', mock.Mock(return_value=['show_all'])) as extract_symbols:
+                    index = symbols.get_symbols_index(packages=['a.views'], cache_dir=cache_dir)
+
+                self.assertEqual(extract_symbols.call_count, 1)
+
+                self.assertEqual(index, {'show_all': 'a.views.order'})
@@ -0,0 +1,331 @@
+
+import os
+import json
+import time
+import importlib
+import unittest
+
+from .. import rules
+from .. import config
+from .. import helpers
+from .. import watching
+from .. import constants
+from .. import discovering
+
+
+EVENT = constants.WATCH_EVENT
+
+
+class WatcherTestsMixin:
+
+    backend = None
+
+    def setUp(self):
+        super().setUp()
+        self.watchers = []
+
+    def tearDown(self):
+        super().tearDown()
+
+        for watcher in self.watchers:
+            watcher.close()
+
+    def create_watcher(self, path):
+        watcher = watching.create_watcher([path], backend=self.backend)
+        self.watchers.append(watcher)
+        return watcher
+
+    def write(self, path, content=' '):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def test_created_and_deleted(self):
+        with helpers.test_directory() as temp_directory:
+            watcher = self.create_watcher(temp_directory)
+
+            module_path = os.path.join(temp_directory, 'x.py')
+            package_path = os.path.join(temp_directory, 'p')
+
+            self.write(module_path)
+            os.makedirs(package_path)
+
+            self.assertCountEqual([event for event in watcher.poll() if event.kind != EVENT.MODIFIED],
+                                  [watching.Event(EVENT.CREATED, module_path, False),
+                                   watching.Event(EVENT.CREATED, package_path, True)])
+
+            os.remove(module_path)
+
+            self.assertEqual(watcher.poll(), [watching.Event(EVENT.DELETED, module_path, False)])
+
+    def test_modified(self):
+        with helpers.test_directory() as temp_directory:
+            config_path = os.path.join(temp_directory, constants.CONFIG_FILE_NAME)
+
+            self.write(config_path, '{}')
+
+            watcher = self.create_watcher(temp_directory)
+
+            self.write(config_path, '{"rules": []}')
+            os.utime(config_path, ns=(0, 0))
+
+            self.assertIn(watching.Event(EVENT.MODIFIED, config_path, False), watcher.poll())
+
+    def test_subdirectories(self):
+        with helpers.test_directory() as temp_directory:
+            os.makedirs(os.path.join(temp_directory, 'a', 'b'))
+
+            watcher = self.create_watcher(temp_directory)
+
+            module_path = os.path.join(temp_directory, 'a', 'b', 'x.py')
+
+            self.write(module_path)
+
+            self.assertIn(watching.Event(EVENT.CREATED, module_path, False), watcher.poll())
+
+    def test_not_watched_files(self):
+        with helpers.test_directory() as temp_directory:
+            watcher = self.create_watcher(temp_directory)
+
+            self.write(os.path.join(temp_directory, 'data.txt'))
+            os.makedirs(os.path.join(temp_directory, '__pycache__'))
+
+            self.assertEqual(watcher.poll(), [])
+
+
+class TestPollingWatcher(WatcherTestsMixin, unittest.TestCase):
+    backend = 'polling'
+
+
+@unittest.skipUnless(watching.is_inotify_available(), 'inotify is not available')
+class TestInotifyWatcher(WatcherTestsMixin, unittest.TestCase):
+    backend = 'inotify'
+
+
+class TestProcessEvents(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.reset_cache()
+        rules.reset_rules_cache()
+
+    def tearDown(self):
+        super().tearDown()
+        config.reset_cache()
+        rules.reset_rules_cache()
+        helpers.unload_test_packages()
+
+    def prepair_package(self, temp_directory):
+        os.makedirs(os.path.join(temp_directory, 'a', 'b'))
+
+        with open(os.path.join(temp_directory, 'a', '__init__.py'), 'w') as f:
+            f.write(' ')
+
+        with open(os.path.join(temp_directory, 'a', 'x.py'), 'w') as f:
+            f.write(' ')
+
+        importlib.import_module('a')
+
+        return os.path.join(temp_directory, 'a')
+
+    def test_config_created(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            default_config = config.get(path)
+
+            rules.get_for_config(default_config)
+
+            config_path = os.path.join(path, constants.CONFIG_FILE_NAME)
+
+            with open(config_path, 'w') as f:
+                json.dump({'rules': [{'type': 'rule_stdlib'}]}, f)
+
+            watching.process_events([watching.Event(EVENT.CREATED, config_path, False)])
+
+            self.assertNotIn(path, config.CONFIGS_CACHE)
+
+            self.assertEqual(config.get(path).path, config_path)
+
+    def test_config_changed(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            config_path = os.path.join(path, constants.CONFIG_FILE_NAME)
+
+            with open(config_path, 'w') as f:
+                json.dump({'rules': [{'type': 'rule_stdlib'}]}, f)
+
+            old_config = config.get(os.path.join(path, 'b'))
+
+            rules.get_for_config(old_config)
+
+            with open(config_path, 'w') as f:
+                json.dump({'rules': [{'type': 'rule_predefined_names'}]}, f)
+
+            watching.process_events([watching.Event(EVENT.MODIFIED, config_path, False)])
+
+            self.assertEqual(config.CONFIGS_CACHE, {})
+            self.assertEqual(config.LOADED_CONFIGS, {})
+            self.assertEqual(rules.get_chains_statistics(), (0, 0))
+
+            self.assertEqual(config.get(os.path.join(path, 'b')).rules, [{'type': 'rule_predefined_names'}])
+
+    def test_module_created(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            self.assertFalse(discovering.has_module([path], 'y'))
+            self.assertIsNone(discovering.find_spec('a.y'))
+
+            discovering.find_spec('a.x')
+
+            module_path = os.path.join(path, 'y.py')
+
+            with open(module_path, 'w') as f:
+                f.write(' ')
+
+            importlib.invalidate_caches()
+
+            watching.process_events([watching.Event(EVENT.CREATED, module_path, False)])
+
+            self.assertTrue(discovering.has_module([path], 'y'))
+            self.assertNotIn('a.y', discovering.SPEC_CACHE)
+            self.assertIn('a.x', discovering.SPEC_CACHE)
+
+            self.assertIsNotNone(discovering.find_spec('a.y'))
+
+    def test_module_created__listing_not_cached(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            self.assertIsNone(discovering.find_spec('a.y'))
+
+            discovering.find_spec('a.x')
+
+            watching.process_events([watching.Event(EVENT.CREATED, os.path.join(path, 'y.py'), False)])
+
+            self.assertNotIn('a.y', discovering.SPEC_CACHE)
+            self.assertIn('a.x', discovering.SPEC_CACHE)
+
+    def test_directory_deleted(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            discovering.get_directory_info(path)
+            discovering.get_directory_info(os.path.join(path, 'b'))
+
+            os.rmdir(os.path.join(path, 'b'))
+
+            watching.process_events([watching.Event(EVENT.DELETED, os.path.join(path, 'b'), True)])
+
+            self.assertNotIn(os.path.join(path, 'b'), discovering.MODULES_INDEX)
+
+            self.assertNotIn('b', discovering.get_directory_info(path))
+
+    def test_module_modified(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            info = discovering.get_directory_info(path)
+
+            watching.process_events([watching.Event(EVENT.MODIFIED, os.path.join(path, 'x.py'), False)])
+
+            self.assertIs(discovering.get_directory_info(path), info)
+
+    def create_rules(self):
+        module_config = config.DEFAULT_CONFIG.clone(rules=[{'type': 'rule_exported_symbols', 'packages': ['a']},
+                                                           {'type': 'rule_group',
+                                                            'rules': [{'type': 'rule_global_submodules', 'packages': ['a']}]}])
+
+        symbols_rule, group = rules.get_for_config(module_config)
+
+        return symbols_rule, group.rules[0]
+
+    def test_module_modified__exported_symbols(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            symbols_rule, submodules_rule = self.create_rules()
+
+            self.assertEqual(symbols_rule.get_symbols(), {})
+
+            with open(os.path.join(path, 'x.py'), 'w') as f:
+                f.write('def order(): pass')
+
+            watching.process_events([watching.Event(EVENT.MODIFIED, os.path.join(path, 'x.py'), False)])
+
+            self.assertEqual(symbols_rule.get_symbols(), {'order': 'a.x'})
+
+    def test_module_modified__not_indexed(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            symbols_rule, submodules_rule = self.create_rules()
+
+            exported_symbols = symbols_rule.get_symbols()
+            submodules = submodules_rule.get_submodules()
+
+            watching.process_events([watching.Event(EVENT.MODIFIED, os.path.join(temp_directory, 'other.py'), False),
+                                     watching.Event(EVENT.MODIFIED, os.path.join(path, '__pycache__', 'x.pyc'), False),
+                                     watching.Event(EVENT.MODIFIED, os.path.join(path, 'x.py'), False)])
+
+            self.assertIs(submodules_rule.get_submodules(), submodules)
+
+            self.assertIsNot(symbols_rule.get_symbols(), exported_symbols)
+
+    def test_module_created__global_submodules(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            symbols_rule, submodules_rule = self.create_rules()
+
+            self.assertEqual(submodules_rule.get_submodules(), {'a_x': 'a.x'})
+
+            with open(os.path.join(path, 'y.py'), 'w') as f:
+                f.write(' ')
+
+            watching.process_events([watching.Event(EVENT.CREATED, os.path.join(path, 'y.py'), False)])
+
+            self.assertEqual(submodules_rule.get_submodules(), {'a_x': 'a.x', 'a_y': 'a.y'})
+
+    def test_overflow(self):
+        with helpers.test_directory() as temp_directory:
+            path = self.prepair_package(temp_directory)
+
+            config.get(path)
+            discovering.get_directory_info(path)
+
+            watching.process_events([watching.Event(EVENT.OVERFLOW, None, False)])
+
+            self.assertEqual(config.CONFIGS_CACHE, {})
+            self.assertEqual(discovering.MODULES_INDEX, {})
+
+
+class TestWatching(unittest.TestCase):
+
+    def test_start_stop(self):
+        with helpers.test_directory() as temp_directory:
+            path = os.path.join(temp_directory, 'a')
+
+            os.makedirs(path)
+
+            discovering.get_directory_info(path)
+
+            watching_thread = watching.start([temp_directory], interval=0.01, backend='polling')
+
+            try:
+                with open(os.path.join(path, 'y.py'), 'w') as f:
+                    f.write(' ')
+
+                for i in range(100):
+                    if discovering.has_module([path], 'y'):
+                        break
+
+                    time.sleep(0.01)
+
+                self.assertTrue(discovering.has_module([path], 'y'))
+
+            finally:
+                watching_thread.stop()
+
+            self.assertFalse(watching_thread.thread.is_alive())
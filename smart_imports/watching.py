@@ -0,0 +1,361 @@
+
+import os
+import sys
+import struct
+import ctypes
+import threading
+import ctypes.util
+import importlib.machinery
+
+from . import hooks
+from . import rules
+from . import config
+from . import constants
+from . import discovering
+
+
+# watcher maps changes of files to invalidations of smart_imports caches:
+#
+# - config file changed, added or removed -> configs of affected directories and their rules chains
+# - module or package added or removed -> modules listing of its directory and specs of changed modules
+# - directory removed -> modules listings of it and its subdirectories
+#
+# changes of modules content do not affect caches
+
+
+class Event:
+    __slots__ = ('kind', 'path', 'is_directory')
+
+    def __init__(self, kind, path, is_directory):
+        self.kind = kind
+        self.path = path
+        self.is_directory = is_directory
+
+    def __eq__(self, other):
+        return (self.__class__ == other.__class__ and
+                self.kind == other.kind and
+                self.path == other.path and
+                self.is_directory == other.is_directory)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return 'Event({}, {!r}, is_directory={!r})'.format(self.kind.value, self.path, self.is_directory)
+
+
+def is_watched_file(name, config_name):
+    if name == config_name:
+        return True
+
+    return any(name.endswith(suffix) for suffix in importlib.machinery.all_suffixes())
+
+
+def is_watched_directory(name):
+    return name != '__pycache__' and not name.startswith('.')
+
+
+class PollingWatcher:
+    # compares modification times of watched files and directories between calls of poll()
+
+    __slots__ = ('paths', 'config_name', 'snapshot')
+
+    def __init__(self, paths, config_name=constants.CONFIG_FILE_NAME):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.config_name = config_name
+        self.snapshot = self.scan()
+
+    def scan(self):
+        # path -> (is directory, mtime)
+        snapshot = {}
+
+        for path in self.paths:
+            self.scan_directory(path, snapshot)
+
+        return snapshot
+
+    def scan_directory(self, path, snapshot):
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if is_watched_directory(entry.name):
+                        snapshot[entry.path] = (True, entry.stat().st_mtime_ns)
+                        self.scan_directory(entry.path, snapshot)
+
+                elif is_watched_file(entry.name, self.config_name):
+                    snapshot[entry.path] = (False, entry.stat().st_mtime_ns)
+
+            except OSError:
+                continue
+
+    def poll(self):
+        snapshot = self.scan()
+
+        events = []
+
+        for path, (is_directory, mtime) in snapshot.items():
+            old_state = self.snapshot.get(path)
+
+            if old_state is None:
+                events.append(Event(constants.WATCH_EVENT.CREATED, path, is_directory))
+
+            elif not is_directory and old_state[1] != mtime:
+                events.append(Event(constants.WATCH_EVENT.MODIFIED, path, is_directory))
+
+        for path, (is_directory, mtime) in self.snapshot.items():
+            if path not in snapshot:
+                events.append(Event(constants.WATCH_EVENT.DELETED, path, is_directory))
+
+        self.snapshot = snapshot
+
+        return events
+
+    def close(self):
+        self.snapshot = {}
+
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+
+_INOTIFY_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+_INOTIFY_BUFFER_SIZE = 64 * 1024
+
+_LIBC = None
+
+
+def get_libc():
+    global _LIBC
+
+    if _LIBC is None:
+        _LIBC = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+    return _LIBC
+
+
+def is_inotify_available():
+    if not sys.platform.startswith('linux'):
+        return False
+
+    try:
+        return hasattr(get_libc(), 'inotify_init1')
+    except OSError:
+        return False
+
+
+class InotifyWatcher:
+    # receives changes from Linux kernel, so poll() does not walk watched directories
+
+    __slots__ = ('paths', 'config_name', 'fd', 'directories')
+
+    def __init__(self, paths, config_name=constants.CONFIG_FILE_NAME):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.config_name = config_name
+
+        self.fd = get_libc().inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        # watch descriptor -> directory
+        self.directories = {}
+
+        for path in self.paths:
+            self.watch(path)
+
+    def watch(self, path):
+        # inotify is not recursive, so every directory is watched separately
+        descriptor = get_libc().inotify_add_watch(self.fd, os.fsencode(path), _INOTIFY_MASK)
+
+        if descriptor < 0:
+            return
+
+        self.directories[descriptor] = path
+
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+
+        for entry in entries:
+            if entry.is_dir() and is_watched_directory(entry.name):
+                self.watch(entry.path)
+
+    def poll(self):
+        events = []
+
+        while True:
+            try:
+                data = os.read(self.fd, _INOTIFY_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+
+            if not data:
+                break
+
+            self.parse(data, events)
+
+        return events
+
+    def parse(self, data, events):
+        offset = 0
+
+        while offset < len(data):
+            descriptor, mask, cookie, length = _INOTIFY_EVENT.unpack_from(data, offset)
+
+            offset += _INOTIFY_EVENT.size
+
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                events.append(Event(constants.WATCH_EVENT.OVERFLOW, None, False))
+                continue
+
+            if mask & _IN_IGNORED:
+                self.directories.pop(descriptor, None)
+                continue
+
+            directory = self.directories.get(descriptor)
+
+            if directory is None or not name:
+                continue
+
+            is_directory = bool(mask & _IN_ISDIR)
+
+            if is_directory and not is_watched_directory(name):
+                continue
+
+            if not is_directory and not is_watched_file(name, self.config_name):
+                continue
+
+            path = os.path.join(directory, name)
+
+            if mask & (_IN_CREATE | _IN_MOVED_TO):
+                if is_directory:
+                    self.watch(path)
+
+                events.append(Event(constants.WATCH_EVENT.CREATED, path, is_directory))
+
+            elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                events.append(Event(constants.WATCH_EVENT.DELETED, path, is_directory))
+
+            elif not is_directory:
+                events.append(Event(constants.WATCH_EVENT.MODIFIED, path, is_directory))
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+BACKENDS = {'polling': PollingWatcher,
+            'inotify': InotifyWatcher}
+
+
+def create_watcher(paths, backend=None, config_name=constants.CONFIG_FILE_NAME):
+    if backend is None:
+        backend = 'inotify' if is_inotify_available() else 'polling'
+
+    return BACKENDS[backend](paths, config_name=config_name)
+
+
+def forget_config(config_path):
+    for dropped_config in config.forget(config_path):
+        rules.forget_config(dropped_config.uid)
+
+        # activated packages find their config again
+        for package_name, package_config in list(hooks.ACTIVATED_PACKAGES.items()):
+            if package_config is dropped_config:
+                hooks.ACTIVATED_PACKAGES[package_name] = None
+
+
+def reset_caches():
+    config.reset_cache()
+    rules.reset_rules_cache()
+    discovering.SPEC_CACHE.clear()
+    discovering.reset_modules_index()
+    discovering.reset_top_level_index()
+
+    for package_name in hooks.ACTIVATED_PACKAGES:
+        hooks.ACTIVATED_PACKAGES[package_name] = None
+
+
+def process_events(events, config_name=constants.CONFIG_FILE_NAME):
+    changed_directories = set()
+
+    for event in events:
+        if event.kind == constants.WATCH_EVENT.OVERFLOW:
+            reset_caches()
+            return
+
+        if event.is_directory and event.kind == constants.WATCH_EVENT.DELETED:
+            discovering.forget_directory(event.path)
+
+        if os.path.basename(event.path) == config_name:
+            forget_config(event.path)
+
+        # rules drop own indexes, which depend on content of modules or on layout of packages
+        rules.invalidate(event)
+
+        # directories indexes depend only on appearance and removal of modules
+        if event.kind != constants.WATCH_EVENT.MODIFIED:
+            changed_directories.add(os.path.dirname(event.path))
+
+    for directory in changed_directories:
+        discovering.invalidate_directory(directory)
+
+
+class Watching:
+    # background thread, which processes changes of files every interval seconds
+
+    __slots__ = ('watcher', 'interval', 'config_name', 'thread', 'stop_event')
+
+    def __init__(self, watcher, interval, config_name=constants.CONFIG_FILE_NAME):
+        self.watcher = watcher
+        self.interval = interval
+        self.config_name = config_name
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='smart_imports.watching', daemon=True)
+
+    def check(self):
+        process_events(self.watcher.poll(), config_name=self.config_name)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.check()
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+        if self.thread.is_alive():
+            self.thread.join()
+
+        self.watcher.close()
+
+
+def start(paths, interval=1.0, backend=None, config_name=constants.CONFIG_FILE_NAME):
+    watching = Watching(watcher=create_watcher(paths, backend=backend, config_name=config_name),
+                        interval=interval,
+                        config_name=config_name)
+
+    watching.start()
+
+    return watching